@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import yaml
+from ase.data import atomic_masses
+
+from mof_ase_md.md.analysis import (
+    CellAccumulator,
+    DensityAccumulator,
+    MSDAccumulator,
+    RDFAccumulator,
+    VACFAccumulator,
+    write_columns,
+    write_results,
+)
+
+
+QUANTITIES = ("rdf", "msd", "vacf", "density", "lattice")
+DEFAULT_CHUNK_FRAMES = 500
+
+
+class UlmFrames:
+    """
+    Frame arrays straight from an ASE .traj (ulm) file, one frame at a time:
+    only the requested arrays are read, no Atoms objects are built.
+    """
+
+    def __init__(self, path):
+        import ase.io.ulm as ulm
+
+        self.path = Path(path)
+        self.backend = ulm.open(str(path), "r")
+        if self.backend.get_tag() != "ASE-Trajectory":
+            raise ValueError(f"Not an ASE trajectory: {path}")
+        if len(self.backend) == 0:
+            raise ValueError(f"Empty trajectory: {path}")
+
+        first = self.backend[0]
+        self.numbers = np.asarray(first.numbers)
+        self.pbc = np.asarray(first.pbc)
+        masses = first.get("masses")
+        self.masses = atomic_masses[self.numbers] if masses is None else np.asarray(masses)
+        self.has_velocities = "momenta" in first
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def read(self, indices, velocities: bool = False) -> dict:
+        positions = np.empty((len(indices), len(self.numbers), 3))
+        cells = np.empty((len(indices), 3, 3))
+        momenta = np.empty_like(positions) if velocities else None
+
+        for k, index in enumerate(indices):
+            frame = self.backend[int(index)]
+            positions[k] = frame.positions
+            cells[k] = frame.cell
+            if velocities:
+                momenta[k] = frame.momenta
+
+        data = {"positions": positions, "cell": cells}
+        if velocities:
+            data["velocities"] = momenta / self.masses[None, :, None]
+        return data
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+class ChunkedFrames:
+    """
+    Same interface over a chunked trajectory store (output.trajectory_format: chunked).
+    """
+
+    def __init__(self, path):
+        from mof_ase_md.md.chunked_trajectory import ChunkedTrajectory
+
+        self.path = Path(path)
+        self.store = ChunkedTrajectory(path)
+        if "cell" not in self.store.columns:
+            raise ValueError(f"Chunked trajectory has no cell column: {path}")
+        self.numbers = self.store.numbers
+        self.pbc = self.store.pbc
+        self.masses = self.store.masses
+        self.has_velocities = "velocities" in self.store.columns
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def read(self, indices, velocities: bool = False) -> dict:
+        indices = np.asarray(indices)
+        start, stop = int(indices[0]), int(indices[-1]) + 1
+        step = int(indices[1] - indices[0]) if len(indices) > 1 else 1
+
+        data = {
+            "positions": self.store.column("positions", start, stop, step).astype(np.float64),
+            "cell": self.store.column("cell", start, stop, step).astype(np.float64),
+        }
+        if velocities:
+            data["velocities"] = self.store.column("velocities", start, stop, step).astype(np.float64)
+        return data
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def open_frames(path):
+    path = Path(path)
+    if path.is_dir():
+        return ChunkedFrames(path)
+    return UlmFrames(path)
+
+
+def _config_used(path) -> dict | None:
+    config = Path(path).parent / "config_used.yaml"
+    if not config.exists():
+        return None
+    with config.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _adaptive_run(cfg: dict | None) -> bool:
+    if not isinstance(cfg, dict):
+        return False
+    return bool((cfg.get("adaptive_timestep") or {}).get("enabled", False))
+
+
+def frame_spacing_fs(path) -> float | None:
+    """
+    Time between stored frames from the run's config_used.yaml
+    (md.timestep_fs * output.traj_interval), if it sits next to the trajectory.
+    None if unknown or not constant (adaptive timestep).
+    """
+    cfg = _config_used(path)
+    if cfg is None or _adaptive_run(cfg):
+        return None
+    try:
+        return float(cfg["md"]["timestep_fs"]) * int(cfg["output"]["traj_interval"])
+    except (KeyError, TypeError):
+        return None
+
+
+def _accumulators(numbers, options: dict, sample_dt_fs: float, first_cell: np.ndarray) -> dict:
+    accumulators = {}
+    quantities = options["quantities"]
+    indices = options.get("indices")
+
+    if "rdf" in quantities:
+        accumulators["rdf"] = RDFAccumulator(numbers, r_max=options["r_max"], n_bins=options["bins"])
+    if "msd" in quantities:
+        accumulators["msd"] = MSDAccumulator(numbers, options["max_lag"], indices=indices, sample_dt_fs=sample_dt_fs)
+    if "vacf" in quantities:
+        accumulators["vacf"] = VACFAccumulator(numbers, options["max_lag"], indices=indices, sample_dt_fs=sample_dt_fs)
+    if "density" in quantities:
+        accumulators["density"] = DensityAccumulator(numbers, grid=options["grid"], indices=indices)
+    if "lattice" in quantities:
+        accumulators["cell"] = CellAccumulator()
+        accumulators["cell"].init_range(first_cell)
+
+    return accumulators
+
+
+def _analyze_chunk(task: dict) -> dict:
+    """
+    Accumulate frames[task["indices"]]; the correlators are first warmed up
+    on the max_lag frames before the chunk so that chunk results add up to
+    exactly the sequential result.
+    """
+    frames = open_frames(task["path"])
+    options = task["options"]
+    velocities = "vacf" in options["quantities"]
+
+    accumulators = _accumulators(frames.numbers, options, task["sample_dt_fs"], np.asarray(task["first_cell"]))
+    correlators = [accumulators[name] for name in ("msd", "vacf") if name in accumulators]
+
+    lattice = []
+    block = options["read_frames"]
+
+    for phase, indices in (("warmup", task["warmup"]), ("chunk", task["indices"])):
+        if not len(indices) or (phase == "warmup" and not correlators):
+            continue
+        for correlator in correlators:
+            correlator.recording = phase == "chunk"
+
+        for start in range(0, len(indices), block):
+            part = indices[start:start + block]
+            data = frames.read(part, velocities=velocities)
+            for k in range(len(part)):
+                positions = data["positions"][k]
+                cell = data["cell"][k]
+                frame_velocities = data["velocities"][k] if velocities else None
+
+                if phase == "warmup":
+                    for correlator in correlators:
+                        correlator.sample(positions, cell, frames.pbc, frame_velocities)
+                    continue
+
+                for accumulator in accumulators.values():
+                    accumulator.sample(positions, cell, frames.pbc, frame_velocities)
+                if "cell" in accumulators:
+                    lattice.append(np.concatenate([[part[k]], CellAccumulator.values(cell)]))
+
+    frames.close()
+    return {
+        "states": accumulators,
+        "lattice": np.array(lattice) if lattice else np.empty((0, 8)),
+    }
+
+
+def analyze(
+    path,
+    quantities: list[str] | None = None,
+    output=None,
+    start: int = 0,
+    stop: int | None = None,
+    every: int = 1,
+    r_max: float = 8.0,
+    bins: int = 200,
+    max_lag: int = 200,
+    elements: list[str] | None = None,
+    grid=(40, 40, 40),
+    dt_fs: float | None = None,
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+    workers: int = 1,
+) -> dict:
+    """
+    Out-of-core analysis of a trajectory (.traj file or chunked store).
+
+    Frames are read in chunks of chunk_frames straight into NumPy arrays and
+    fed to the streaming accumulators of md/analysis.py; chunks can be spread
+    over a process pool and their accumulators are merged. Writes RDF, MSD,
+    VACF (CSV), density maps (.npy) and the lattice-parameter time series
+    (lattice.csv) plus cell histograms/statistics. MSD and VACF need evenly
+    spaced frames and are refused for a run with an adaptive timestep.
+    Returns {"output": output directory, "files": [written file paths]}.
+    """
+    from ase.data import chemical_symbols
+
+    t0 = time.perf_counter()
+    path = Path(path)
+
+    frames = open_frames(path)
+    n_total = len(frames)
+    numbers = frames.numbers
+    has_velocities = frames.has_velocities
+    indices = np.arange(n_total)[start:stop:every]
+    first_cell = frames.read(indices[:1])["cell"][0] if len(indices) else None
+    frames.close()
+
+    if len(indices) == 0:
+        raise ValueError(f"No frames selected from {path} ({n_total} frames)")
+
+    requested = quantities is not None
+    if quantities is None:
+        quantities = list(QUANTITIES)
+    for name in quantities:
+        if name not in QUANTITIES:
+            raise ValueError(f"Unknown quantity: {name}. Available: {list(QUANTITIES)}")
+
+    uneven = [name for name in ("msd", "vacf") if name in quantities]
+    if uneven and _adaptive_run(_config_used(path)):
+        if requested:
+            raise ValueError(
+                f"Cannot compute {' and '.join(name.upper() for name in uneven)}: {path} comes from a run with "
+                "adaptive_timestep enabled, its frames are not evenly spaced"
+            )
+        print("MSD/VACF skipped: the run used an adaptive timestep, frames are not evenly spaced")
+        quantities = [name for name in quantities if name not in uneven]
+    if "vacf" in quantities and not has_velocities:
+        print("VACF skipped: the trajectory has no momenta/velocities")
+        quantities = [name for name in quantities if name != "vacf"]
+
+    if dt_fs is None:
+        dt_fs = frame_spacing_fs(path)
+    if dt_fs is None:
+        print("Frame spacing unknown (no config_used.yaml or adaptive timestep, no --dt-fs): times are given in fs = frames")
+        dt_fs = 1.0
+
+    selected = None
+    if elements:
+        wanted = [chemical_symbols.index(symbol) for symbol in elements]
+        selected = np.nonzero(np.isin(numbers, wanted))[0]
+        if len(selected) == 0:
+            raise ValueError(f"No atoms of elements {elements} in {path}")
+
+    options = {
+        "quantities": quantities,
+        "r_max": r_max,
+        "bins": bins,
+        "max_lag": max_lag,
+        "grid": tuple(grid),
+        "indices": selected,
+        "read_frames": 64,
+    }
+    sample_dt_fs = dt_fs * every
+
+    tasks = []
+    for first in range(0, len(indices), chunk_frames):
+        tasks.append({
+            "path": str(path),
+            "options": options,
+            "sample_dt_fs": sample_dt_fs,
+            "first_cell": first_cell,
+            "indices": indices[first:first + chunk_frames],
+            "warmup": indices[max(0, first - max_lag):first],
+        })
+
+    print(f"Analyze: {path} ({n_total} frames, {len(indices)} selected, {len(numbers)} atoms), "
+          f"{len(tasks)} chunks on {workers} worker(s): {', '.join(quantities)}")
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            parts = list(pool.map(_analyze_chunk, tasks))
+    else:
+        parts = [_analyze_chunk(task) for task in tasks]
+
+    merged = parts[0]["states"]
+    for part in parts[1:]:
+        for name, accumulator in part["states"].items():
+            merged[name].merge(accumulator)
+
+    if output is None:
+        output = path.parent / f"{path.stem}_analysis"
+    output = Path(output)
+    written = write_results(output, merged)
+
+    if "lattice" in quantities:
+        series = np.concatenate([part["lattice"] for part in parts])
+        columns = {"frame": series[:, 0], "time_ps": series[:, 0] * dt_fs / 1000.0}
+        for k, name in enumerate(CellAccumulator.NAMES):
+            columns[name] = series[:, k + 1]
+        write_columns(output / "lattice.csv", columns)
+        written.append(output / "lattice.csv")
+
+    print(f"Analysis written to {output} ({time.perf_counter() - t0:.1f} s)")
+    for item in written:
+        print(" ", item.name)
+
+    return {"output": str(output), "files": [str(item) for item in written]}
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import csv
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+from ase import Atoms
+
+from mof_ase_md.config.defaults import apply_defaults
+from mof_ase_md.md.methods import METHOD_REGISTRY
+
+
+BENCH_FORMAT = "mof_ase_md.bench"
+BENCH_VERSION = 1
+
+DEFAULT_SIZES = [1, 2, 3, 4]
+DEFAULT_STEPS = 50
+DEFAULT_WARMUP = 5
+
+# Stand-in calculator blocks (see calculator/factory.py). The LJ parameters put
+# the potential minimum near the 1.3-1.9 A bonds of the synthetic framework.
+BENCH_CALCULATORS = {
+    "emt": {"name": "emt"},
+    "lj": {"name": "lj", "parameters": {"sigma": 1.2, "epsilon": 0.05, "rc": 4.0}},
+    "orb": {
+        "name": "orb",
+        "model": "pretrained.orb_v3_conservative_omol",
+        "model_parameters": {"device": "cpu", "compile": False},
+        "wrapper_parameters": {"conservative": True, "device": "cpu"},
+    },
+}
+
+RESULT_COLUMNS = [
+    "method",
+    "ensemble",
+    "calculator",
+    "repeat",
+    "natoms",
+    "steps",
+    "ms_per_step",
+    "force_ms_per_step",
+    "integrator_ms_per_step",
+    "integrator_p99_ms",
+    "integrator_us_per_atom",
+    "peak_rss_mb",
+    "status",
+    "error",
+]
+
+
+def mof_like_cell(a: float = 10.6) -> Atoms:
+    """
+    Synthetic cubic framework unit cell (25 atoms): a Cu node at the origin
+    and an O-C-C-C-C-O linker with two H along each axis, leaving a large
+    open pore. Only meant to give MOF-like density and neighbour counts.
+    """
+    linker = [("O", 1.9), ("C", 3.2), ("C", 4.6), ("C", 6.0), ("C", 7.4), ("O", 8.7)]
+    hydrogens = [4.6, 6.0]
+
+    symbols = ["Cu"]
+    positions = [(0.0, 0.0, 0.0)]
+    for axis in range(3):
+        side = (axis + 1) % 3
+        for symbol, x in linker:
+            position = [0.0, 0.0, 0.0]
+            position[axis] = x * a / 10.6
+            symbols.append(symbol)
+            positions.append(tuple(position))
+        for x in hydrogens:
+            position = [0.0, 0.0, 0.0]
+            position[axis] = x * a / 10.6
+            position[side] = 1.08
+            symbols.append("H")
+            positions.append(tuple(position))
+
+    atoms = Atoms(symbols=symbols, positions=positions, cell=[a, a, a], pbc=True)
+    atoms.info["charge"] = 0
+    atoms.info["spin"] = 1
+    return atoms
+
+
+def mof_like_supercell(repeat: int) -> Atoms:
+    atoms = mof_like_cell().repeat((repeat, repeat, repeat))
+    atoms.info["charge"] = 0
+    atoms.info["spin"] = 1
+    return atoms
+
+
+def bench_config(method: str, calculator: dict, steps: int, timestep_fs: float = 0.5) -> dict:
+    """
+    Minimal resolved config for one benchmark case (method defaults applied).
+    """
+    cfg = {
+        "system": {"input_file": "<synthetic>", "pbc": True, "charge": 0, "spin": 1},
+        "calculator": calculator,
+        "md": {
+            "ensemble": METHOD_REGISTRY[method]["ensemble"],
+            "method": method,
+            "total_steps": steps,
+            "timestep_fs": timestep_fs,
+        },
+        "state": {"temperature_K": 300.0, "pressure_bar": 1.0},
+        "velocities": {"initialize": True, "method": "maxwell", "seed": 0},
+    }
+    return apply_defaults(cfg)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is per address space; ru_maxrss survives exec on Linux and would
+    # report the parent's peak in a freshly spawned worker
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        return rss / 1024**2
+    return rss / 1024
+
+
+def orb_weights_available(calculator: dict | None = None) -> bool:
+    """
+    True if orb_models is installed and the ORB model is already in the
+    on-disk model cache, so benchmarking it needs no download.
+    """
+    if importlib.util.find_spec("orb_models") is None:
+        return False
+
+    from mof_ase_md.calculator.cache import DEFAULT_CACHE_DIR, model_cache_key
+
+    if calculator is None:
+        calculator = BENCH_CALCULATORS["orb"]
+
+    cache_cfg = calculator.get("cache", {}) or {}
+    cache_dir = Path(os.path.expanduser(cache_cfg.get("dir", DEFAULT_CACHE_DIR)))
+    key = model_cache_key(calculator["model"], calculator.get("model_parameters", {}) or {})
+    return (cache_dir / f"{key}.pt").exists()
+
+
+def bench_case(case: dict) -> dict:
+    """
+    Run one (method, calculator, size) case and return its result row.
+    """
+    from mof_ase_md.calculator.factory import build_calculator
+    from mof_ase_md.md.dynamics import make_dynamics
+    from mof_ase_md.md.profiling import StepProfiler
+    from mof_ase_md.md.velocities import initialize_velocities
+
+    cfg = bench_config(case["method"], case["calculator"], case["steps"])
+    atoms = mof_like_supercell(case["repeat"])
+
+    row = {
+        "method": case["method"],
+        "ensemble": cfg["md"]["ensemble"],
+        "calculator": case["calculator"]["name"],
+        "repeat": case["repeat"],
+        "natoms": len(atoms),
+        "steps": case["steps"],
+    }
+
+    try:
+        atoms.calc = build_calculator(cfg)
+        initialize_velocities(atoms, cfg)
+        dynamics = make_dynamics(atoms, cfg)
+
+        # first force call, neighbour lists, lazy init, ...
+        dynamics.run(case["warmup"])
+
+        profiler = StepProfiler()
+        profiler.instrument(dynamics, atoms)
+
+        t0 = time.perf_counter()
+        dynamics.run(case["steps"])
+        profiler.wall_time = time.perf_counter() - t0
+        profiler.n_steps = case["steps"]
+
+        sections = profiler.report()["sections"]
+        steps = case["steps"]
+        force_s = sections.get("calculator", {}).get("total_s", 0.0)
+
+        row["ms_per_step"] = 1e3 * profiler.wall_time / steps
+        row["force_ms_per_step"] = 1e3 * force_s / steps
+        row["integrator_ms_per_step"] = sections["integrator"]["mean_ms"]
+        row["integrator_p99_ms"] = sections["integrator"]["p99_ms"]
+        row["integrator_us_per_atom"] = 1e3 * sections["integrator"]["mean_ms"] / len(atoms)
+        row["status"] = "ok"
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+
+def fit_scaling(rows: list[dict]) -> list[dict]:
+    """
+    Per (method, calculator): exponent b of ms_per_step ~ natoms**b, and the
+    same for the integrator-only time, from a least-squares fit in log space.
+    """
+    groups = {}
+    for row in rows:
+        if row.get("status") == "ok":
+            groups.setdefault((row["method"], row["calculator"]), []).append(row)
+
+    scaling = []
+    for (method, calculator), group in groups.items():
+        if len({row["natoms"] for row in group}) < 2:
+            continue
+
+        log_n = np.log([row["natoms"] for row in group])
+        entry = {"method": method, "calculator": calculator}
+        for column, name in (("ms_per_step", "step_exponent"), ("integrator_ms_per_step", "integrator_exponent")):
+            values = np.array([row[column] for row in group])
+            if np.any(values <= 0):
+                continue
+            entry[name] = float(np.polyfit(log_n, np.log(values), 1)[0])
+        scaling.append(entry)
+
+    return scaling
+
+
+def _environment() -> dict:
+    import ase
+
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "ase": ase.__version__,
+    }
+    if importlib.util.find_spec("torch") is not None:
+        import torch
+        env["torch"] = torch.__version__
+    return env
+
+
+def write_results(path, results: dict) -> None:
+    """
+    JSON (rows, scaling fits and environment) or, for *.csv, the rows only.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.suffix == ".csv":
+        with path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, restval="")
+            writer.writeheader()
+            for row in results["results"]:
+                writer.writerow(row)
+        return
+
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+
+
+def load_results(path) -> dict:
+    path = Path(path)
+    if path.suffix == ".csv":
+        with path.open("r", newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for key in ("natoms", "repeat", "steps"):
+                row[key] = int(row[key])
+            for key in ("ms_per_step", "force_ms_per_step", "integrator_ms_per_step"):
+                row[key] = float(row[key]) if row.get(key) else math.nan
+        return {"results": rows}
+
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.2) -> list[dict]:
+    """
+    Cases whose integrator time per step grew by more than `tolerance`
+    (relative) against a baseline bench file.
+    """
+    def key(row):
+        return row["method"], row["calculator"], row["natoms"]
+
+    reference = {key(row): row for row in baseline["results"] if row.get("status") == "ok"}
+
+    regressions = []
+    for row in current["results"]:
+        if row.get("status") != "ok" or key(row) not in reference:
+            continue
+        before = reference[key(row)]["integrator_ms_per_step"]
+        after = row["integrator_ms_per_step"]
+        if before > 0 and after / before > 1.0 + tolerance:
+            regressions.append({
+                "method": row["method"],
+                "calculator": row["calculator"],
+                "natoms": row["natoms"],
+                "baseline_ms": before,
+                "current_ms": after,
+                "ratio": after / before,
+            })
+
+    return regressions
+
+
+def run_bench(
+    methods: list | None = None,
+    sizes: list | None = None,
+    calculators: list | None = None,
+    steps: int = DEFAULT_STEPS,
+    warmup: int = DEFAULT_WARMUP,
+    output: str = "bench.json",
+    isolate: bool = True,
+    orb_calculator: dict | None = None,
+) -> dict:
+    """
+    Benchmark every method in METHOD_REGISTRY on synthetic framework
+    supercells of increasing size.
+
+    Each case runs in a fresh process (isolate=True) so that peak RSS is per
+    case; without isolation it is the peak of the whole benchmark so far.
+    ORB is included by default only if its weights are already cached.
+    """
+    if methods is None:
+        methods = list(METHOD_REGISTRY)
+    if sizes is None:
+        sizes = list(DEFAULT_SIZES)
+
+    calculator_blocks = dict(BENCH_CALCULATORS)
+    if orb_calculator is not None:
+        calculator_blocks["orb"] = orb_calculator
+
+    if calculators is None:
+        calculators = ["emt", "lj"]
+        if orb_weights_available(calculator_blocks["orb"]):
+            calculators.append("orb")
+
+    for name in calculators:
+        if name not in calculator_blocks:
+            raise ValueError(f"Unknown bench calculator: {name}. Available: {list(calculator_blocks)}")
+    for method in methods:
+        if method not in METHOD_REGISTRY:
+            raise ValueError(f"Unknown md.method: {method}. Available: {sorted(METHOD_REGISTRY)}")
+
+    cases = [
+        {
+            "method": method,
+            "calculator": calculator_blocks[name],
+            "repeat": repeat,
+            "steps": steps,
+            "warmup": warmup,
+        }
+        for name in calculators
+        for repeat in sizes
+        for method in methods
+    ]
+
+    print(f"Benchmark: {len(methods)} methods x {len(sizes)} sizes x {len(calculators)} calculators, {steps} steps each")
+
+    rows = []
+    for case in cases:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                row = pool.submit(bench_case, case).result()
+        else:
+            row = bench_case(case)
+        rows.append(row)
+
+        if row["status"] == "ok":
+            print(
+                f"{row['method']:<22} {row['calculator']:<4} {row['natoms']:>6} atoms  "
+                f"{row['ms_per_step']:9.3f} ms/step  integrator {row['integrator_ms_per_step']:8.3f} ms  "
+                f"RSS {row['peak_rss_mb']:8.1f} MB"
+            )
+        else:
+            print(f"{row['method']:<22} {row['calculator']:<4} {row['natoms']:>6} atoms  FAILED: {row['error']}")
+
+    results = {
+        "format": BENCH_FORMAT,
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": _environment(),
+        "steps": steps,
+        "warmup": warmup,
+        "results": rows,
+        "scaling": fit_scaling(rows),
+    }
+
+    write_results(output, results)
+    print("Results:", output)
+
+    return results
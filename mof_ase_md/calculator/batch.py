@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+
+from ase.calculators.calculator import Calculator, all_changes
+
+
+class ReplicaBatch:
+    """
+    Collect force requests from replicas running in lockstep threads and
+    answer them with a single batched evaluation.
+
+    `evaluate` takes a list of Atoms and returns one results dict per Atoms.
+    Before `start()` is called (e.g. while dynamics objects are being built),
+    requests are evaluated one at a time without waiting for the others.
+    """
+
+    def __init__(self, evaluate):
+        self._evaluate = evaluate
+        self._cond = threading.Condition()
+        self._active = 0
+        self._lockstep = False
+        self._pending = {}
+        self._results = {}
+        self._error = None
+        self._generation = 0
+
+        self.n_evaluations = 0
+        self.n_structures = 0
+
+    def start(self, n_replicas: int) -> None:
+        with self._cond:
+            self._active = n_replicas
+            self._lockstep = True
+
+    def leave(self) -> None:
+        """
+        Called by a replica thread when it stops requesting forces.
+        """
+        with self._cond:
+            self._active -= 1
+            if self._active <= 0:
+                self._lockstep = False
+            if self._pending and len(self._pending) >= self._active:
+                self._flush()
+
+    def request(self, index: int, atoms) -> dict:
+        with self._cond:
+            if not self._lockstep:
+                self._pending[index] = atoms
+                self._flush()
+            else:
+                self._pending[index] = atoms
+                generation = self._generation
+
+                if len(self._pending) >= self._active:
+                    self._flush()
+                else:
+                    while generation == self._generation:
+                        self._cond.wait()
+
+            error = self._error
+            if error is not None:
+                raise RuntimeError("Batched force evaluation failed") from error
+
+            return self._results.pop(index)
+
+    def _flush(self) -> None:
+        indices = sorted(self._pending)
+        atoms_list = [self._pending[i] for i in indices]
+
+        try:
+            results = self._evaluate(atoms_list)
+        except Exception as e:
+            self._error = e
+        else:
+            for i, res in zip(indices, results):
+                self._results[i] = res
+            self.n_evaluations += 1
+            self.n_structures += len(atoms_list)
+
+        self._pending = {}
+        self._generation += 1
+        self._cond.notify_all()
+
+
+class ReplicaCalculator(Calculator):
+    """
+    Per-replica ASE calculator that forwards its requests to a shared ReplicaBatch.
+    """
+
+    def __init__(self, batch: ReplicaBatch, index: int, implemented_properties: list):
+        Calculator.__init__(self)
+        self.batch = batch
+        self.index = index
+        self.implemented_properties = list(implemented_properties)
+
+    def calculate(self, atoms=None, properties=None, system_changes=all_changes):
+        Calculator.calculate(self, atoms)
+        self.results = self.batch.request(self.index, self.atoms)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import numpy as np
+from ase.calculators.calculator import Calculator, all_changes
+from ase.data import chemical_symbols
+from ase.neighborlist import natural_cutoffs, neighbor_list
+
+
+class HarmonicBondCalculator(Calculator):
+    """
+    Cheap bonded force field: one harmonic spring per covalent bond.
+
+    Bonds are detected on the first structure seen (pairs closer than
+    cutoff_scale x the sum of covalent radii) and their rest lengths are
+    taken from that structure. Force constants are k_eV_A2 for every bond,
+    or one per element pair fitted to another calculator with
+    fit_force_constants(). Intended as the fast inner model of RESPA, where
+    it only has to capture bond vibrations; it is not a standalone force field.
+    """
+
+    implemented_properties = ["energy", "free_energy", "forces"]
+
+    def __init__(self, k_eV_A2: float = 20.0, cutoff_scale: float = 1.2, **kwargs):
+        super().__init__(**kwargs)
+        self.k_default = float(k_eV_A2)
+        self.cutoff_scale = float(cutoff_scale)
+        self.bonds = None
+
+    def detect_bonds(self, atoms) -> None:
+        cutoffs = natural_cutoffs(atoms, mult=self.cutoff_scale)
+        i, j, shifts, distances = neighbor_list("ijSd", atoms, cutoffs)
+        keep = i < j
+        n_bonds = int(keep.sum())
+        self.bonds = {
+            "i": i[keep],
+            "j": j[keep],
+            "shifts": shifts[keep].astype(float),
+            "r0": distances[keep],
+            "k": np.full(n_bonds, self.k_default),
+        }
+
+    def get_state(self) -> tuple:
+        bonds = self.bonds
+        return bonds["i"], bonds["j"], bonds["shifts"], bonds["r0"], bonds["k"]
+
+    def set_state(self, state: tuple) -> None:
+        i, j, shifts, r0, k = (np.array(x) for x in state)
+        self.bonds = {"i": i, "j": j, "shifts": shifts, "r0": r0, "k": k}
+        self.reset()
+
+    def _bond_vectors(self, atoms) -> np.ndarray:
+        bonds = self.bonds
+        positions = atoms.positions
+        return positions[bonds["j"]] - positions[bonds["i"]] + bonds["shifts"] @ atoms.cell.array
+
+    def fit_force_constants(self, atoms, calculator, n_samples: int = 2, amplitude: float = 0.01, seed: int = 0) -> dict:
+        """
+        Fit one force constant per element pair to the force response of
+        `calculator` to small random displacements (central differences,
+        2 * n_samples calls). Returns {"A-B": k} in eV/A^2.
+        """
+        if self.bonds is None:
+            self.detect_bonds(atoms)
+
+        bonds = self.bonds
+        numbers = atoms.numbers
+        pair = np.sort(np.stack([numbers[bonds["i"]], numbers[bonds["j"]]], axis=1), axis=1)
+        types, type_index = np.unique(pair, axis=0, return_inverse=True)
+        type_index = type_index.reshape(-1)
+
+        vectors = self._bond_vectors(atoms)
+        directions = vectors / np.linalg.norm(vectors, axis=1)[:, None]
+
+        probe = atoms.copy()
+        probe.calc = calculator
+        rng = np.random.default_rng(seed)
+
+        rows = []
+        targets = []
+        for _ in range(n_samples):
+            delta = amplitude * rng.standard_normal(atoms.positions.shape)
+
+            probe.set_positions(atoms.positions + delta)
+            forces_plus = probe.get_forces()
+            probe.set_positions(atoms.positions - delta)
+            forces_minus = probe.get_forces()
+            targets.append(0.5 * (forces_plus - forces_minus).ravel())
+
+            # linear response of each bond type with unit force constant
+            stretch = np.einsum("bk,bk->b", delta[bonds["j"]] - delta[bonds["i"]], directions)
+            pair_forces = stretch[:, None] * directions
+            columns = []
+            for t in range(len(types)):
+                mask = type_index == t
+                response = np.zeros_like(delta)
+                np.add.at(response, bonds["i"][mask], pair_forces[mask])
+                np.add.at(response, bonds["j"][mask], -pair_forces[mask])
+                columns.append(response.ravel())
+            rows.append(np.stack(columns, axis=1))
+
+        k_types, *_ = np.linalg.lstsq(np.concatenate(rows), np.concatenate(targets), rcond=None)
+        k_types = np.clip(k_types, 0.0, None)
+
+        bonds["k"] = k_types[type_index]
+        self.reset()
+
+        return {
+            f"{chemical_symbols[a]}-{chemical_symbols[b]}": float(k)
+            for (a, b), k in zip(types, k_types)
+        }
+
+    def calculate(self, atoms=None, properties=None, system_changes=all_changes):
+        Calculator.calculate(self, atoms, properties, system_changes)
+
+        if self.bonds is None:
+            self.detect_bonds(self.atoms)
+
+        bonds = self.bonds
+        vectors = self._bond_vectors(self.atoms)
+        lengths = np.linalg.norm(vectors, axis=1)
+        stretch = lengths - bonds["r0"]
+
+        energy = 0.5 * np.sum(bonds["k"] * stretch**2)
+
+        pair_forces = (bonds["k"] * stretch / lengths)[:, None] * vectors
+        forces = np.zeros_like(self.atoms.positions)
+        np.add.at(forces, bonds["i"], pair_forces)
+        np.add.at(forces, bonds["j"], -pair_forces)
+
+        self.results["energy"] = energy
+        self.results["free_energy"] = energy
+        self.results["forces"] = forces
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import torch
+
+
+DEFAULT_CACHE_DIR = "~/.cache/mof_ase_md/models"
+DEFAULT_MAX_SIZE_GB = 5.0
+
+# In-process layer: key -> loaded model. Shared by every code path in the process
+# (run, replicas, sweeps, ...), so a model is built at most once per process.
+_MEMORY_CACHE: dict[str, object] = {}
+_LOCK = threading.Lock()
+
+
+def model_cache_key(model_name: str, model_parameters: dict) -> str:
+    """
+    Stable key for a model name + its construction parameters.
+    """
+    payload = json.dumps(
+        {"model": model_name, "parameters": model_parameters},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def clear_memory_cache() -> None:
+    with _LOCK:
+        _MEMORY_CACHE.clear()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_paths(cache_dir: Path, key: str) -> tuple[Path, Path]:
+    return cache_dir / f"{key}.pt", cache_dir / f"{key}.json"
+
+
+def _remove_entry(cache_dir: Path, key: str) -> None:
+    for path in _entry_paths(cache_dir, key):
+        if path.exists():
+            path.unlink()
+
+
+def _load_from_disk(cache_dir: Path, key: str, device, verify: bool):
+    weights_path, meta_path = _entry_paths(cache_dir, key)
+    if not weights_path.exists() or not meta_path.exists():
+        return None
+
+    with meta_path.open("r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("torch_version") != torch.__version__:
+        _remove_entry(cache_dir, key)
+        return None
+
+    if weights_path.stat().st_size != meta.get("size_bytes"):
+        _remove_entry(cache_dir, key)
+        return None
+
+    if verify and _file_sha256(weights_path) != meta.get("sha256"):
+        _remove_entry(cache_dir, key)
+        return None
+
+    model = torch.load(
+        weights_path,
+        map_location=device,
+        mmap=True,
+        weights_only=False,
+    )
+
+    # mark as recently used for eviction
+    os.utime(weights_path)
+    return model
+
+
+def _store_on_disk(cache_dir: Path, key: str, model, model_name: str, model_parameters: dict) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    weights_path, meta_path = _entry_paths(cache_dir, key)
+
+    tmp_path = weights_path.with_suffix(f".pt.tmp{os.getpid()}")
+    try:
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, weights_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    meta = {
+        "key": key,
+        "model": model_name,
+        "parameters": model_parameters,
+        "sha256": _file_sha256(weights_path),
+        "size_bytes": weights_path.stat().st_size,
+        "torch_version": torch.__version__,
+        "created": time.time(),
+    }
+    tmp_meta = meta_path.with_suffix(f".json.tmp{os.getpid()}")
+    with tmp_meta.open("w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+    os.replace(tmp_meta, meta_path)
+
+
+def evict(cache_dir: Path, max_size_bytes: int, keep: str | None = None) -> list[str]:
+    """
+    Delete least recently used entries until the cache fits in max_size_bytes.
+    """
+    entries = []
+    for weights_path in cache_dir.glob("*.pt"):
+        stat = weights_path.stat()
+        entries.append((stat.st_mtime, stat.st_size, weights_path.stem))
+
+    total = sum(size for _, size, _ in entries)
+    removed = []
+
+    for _, size, key in sorted(entries):
+        if total <= max_size_bytes:
+            break
+        if key == keep:
+            continue
+        _remove_entry(cache_dir, key)
+        total -= size
+        removed.append(key)
+
+    return removed
+
+
+def get_cached_model(model_name: str, model_parameters: dict, loader, cache_cfg: dict | None = None):
+    """
+    Return (model, source, seconds) for model_name + model_parameters.
+
+    Lookup order: in-process cache -> on-disk cache -> loader().
+    `source` is one of "memory", "disk", "fresh".
+
+    cache_cfg keys (all optional):
+      memory       (default True)
+      disk         (default True)
+      dir          (default ~/.cache/mof_ase_md/models)
+      max_size_gb  (default 5.0)
+      verify       (default False) also check the sha256 of disk entries before
+                   loading; size and torch version are always checked
+    """
+    if cache_cfg is None:
+        cache_cfg = {}
+
+    use_memory = cache_cfg.get("memory", True)
+    use_disk = cache_cfg.get("disk", True)
+    cache_dir = Path(os.path.expanduser(cache_cfg.get("dir", DEFAULT_CACHE_DIR)))
+    max_size_gb = float(cache_cfg.get("max_size_gb", DEFAULT_MAX_SIZE_GB))
+    verify = cache_cfg.get("verify", False)
+
+    key = model_cache_key(model_name, model_parameters)
+    device = model_parameters.get("device", None)
+
+    t0 = time.perf_counter()
+
+    with _LOCK:
+        if use_memory and key in _MEMORY_CACHE:
+            return _MEMORY_CACHE[key], "memory", time.perf_counter() - t0
+
+        model = None
+        source = "fresh"
+
+        if use_disk:
+            model = _load_from_disk(cache_dir, key, device, verify)
+            if model is not None:
+                source = "disk"
+
+        if model is None:
+            model = loader()
+
+            if use_disk:
+                try:
+                    _store_on_disk(cache_dir, key, model, model_name, model_parameters)
+                    evict(cache_dir, int(max_size_gb * 1024**3), keep=key)
+                except Exception as e:
+                    # e.g. compiled models are not picklable; the run itself is unaffected
+                    print(f"Model cache: could not store {model_name} on disk ({e})")
+
+        if use_memory:
+            _MEMORY_CACHE[key] = model
+
+    return model, source, time.perf_counter() - t0
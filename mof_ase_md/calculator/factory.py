@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from mof_ase_md.utils import startup
+
+
+CALCULATOR_NAMES = ("orb", "emt", "lj", "bonds")
+
+# calculator.precision (ORB only)
+PRECISIONS = ("float64", "float32", "mixed")
+
+
+def build_calculator(cfg: dict):
+    """
+    ASE calculator named by calculator.name.
+
+      orb  ORB force field (calculator.model, model/wrapper parameters)
+      emt  ASE EMT, a cheap local stand-in (H, C, N, O, Al, Ni, Cu, Pd, Ag, Pt, Au)
+      lj   ASE LennardJones, single-species parameters from calculator.parameters:
+           sigma (A), epsilon (eV), rc (A), smooth (bool)
+      bonds harmonic springs fitted to the first structure (calculator/bonded.py),
+           parameters: k_eV_A2, cutoff_scale; the default RESPA inner model
+
+    The stand-ins are meant for tests, benchmarks and cheap dry runs; ORB is
+    only imported when it is actually used.
+    """
+    calculator_cfg = cfg["calculator"]
+    name = calculator_cfg["name"].lower()
+
+    if name == "orb":
+        with startup.phase("import torch + orb_models"):
+            from mof_ase_md.calculator.orb import build_orb_calculator
+        return build_orb_calculator(cfg)
+
+    if name == "emt":
+        from ase.calculators.emt import EMT
+        return EMT()
+
+    if name == "lj":
+        from ase.calculators.lj import LennardJones
+
+        params = calculator_cfg.get("parameters", {})
+        if params is None:
+            params = {}
+
+        sigma = params.get("sigma", 3.0)
+        return LennardJones(
+            sigma=sigma,
+            epsilon=params.get("epsilon", 0.01),
+            rc=params.get("rc", 3.0 * sigma),
+            smooth=params.get("smooth", True),
+        )
+
+    if name == "bonds":
+        from mof_ase_md.calculator.bonded import HarmonicBondCalculator
+
+        params = calculator_cfg.get("parameters", {})
+        if params is None:
+            params = {}
+
+        return HarmonicBondCalculator(
+            k_eV_A2=params.get("k_eV_A2", 20.0),
+            cutoff_scale=params.get("cutoff_scale", 1.2),
+        )
+
+    raise ValueError(f"Unknown calculator.name: {name}. Available: {list(CALCULATOR_NAMES)}")
@@ -1,32 +1,332 @@
 from __future__ import annotations
+import numpy as np
+import torch
+from ase.calculators.calculator import Calculator, all_changes
+from ase.geometry import cell_to_cellpar
+from ase.neighborlist import neighbor_list
 from orb_models.forcefield import pretrained
+from orb_models.forcefield.atomic_system import ase_atoms_to_atom_graphs
+from orb_models.forcefield.base import batch_graphs
 from orb_models.forcefield.calculator import ORBCalculator
 
+from mof_ase_md.calculator.cache import get_cached_model
 
-def build_orb_calculator(cfg: dict):
+
+# calculator.precision -> orb_models `precision` argument
+_ORB_PRECISION = {
+    "float64": "float64",
+    "float32": "float32-high",
+    "mixed": "float32-highest",
+}
+
+
+def apply_precision(precision: str) -> None:
     """
-    ORB calculator.
+    Set the process-wide torch dtype / matmul precision for calculator.precision.
+
+    orb_models does this when it builds a model; models served from the cache
+    skip that, so it is repeated here for every calculator that is built.
+    """
+    if precision == "float64":
+        torch.set_default_dtype(torch.float64)
+        return
+
+    torch.set_default_dtype(torch.float32)
+    torch.set_float32_matmul_precision("highest" if precision == "mixed" else "high")
+
+
+def float64_results(results: dict) -> None:
+    """
+    Promote float32 model outputs to float64 in place and remove the net
+    force left by float32 round-off (exactly zero for a translation-invariant
+    model), so momentum is conserved to float64 accuracy.
     """
+    for name, value in results.items():
+        if isinstance(value, np.ndarray) and value.dtype == np.float32:
+            results[name] = value.astype(np.float64)
 
+    forces = results.get("forces")
+    if forces is not None and len(forces) > 1:
+        results["forces"] = forces - forces.mean(axis=0)
+
+
+def build_orb_model(cfg: dict):
+    """
+    ORB model (weights + architecture) named by calculator.model.
+
+    Models are served from the model cache (calculator.cache) when possible;
+    the load time and where the model came from are reported.
+    """
     calculator_cfg = cfg["calculator"]
     model_name = calculator_cfg["model"]
     model_parameters = calculator_cfg.get("model_parameters", {})
-    wrapper_parameters = calculator_cfg.get("wrapper_parameters", {})
+    cache_cfg = calculator_cfg.get("cache", {})
 
     if model_parameters is None:
         model_parameters = {}
 
-    if wrapper_parameters is None:
-        wrapper_parameters = {}
+    if cache_cfg is None:
+        cache_cfg = {}
 
     if model_name == "pretrained.orb_v3_conservative_omol":
-        orbff = pretrained.orb_v3_conservative_omol(**model_parameters)
+        loader = pretrained.orb_v3_conservative_omol
     else:
         raise ValueError(f"Unknown ORB model in config: {model_name}")
 
+    precision = calculator_cfg.get("precision", "float32")
+    orb_precision = _ORB_PRECISION[precision]
+
+    if cache_cfg.get("enabled", True) is False:
+        orbff = loader(precision=orb_precision, **model_parameters)
+        apply_precision(precision)
+        return orbff
+
+    # float32 is the orb_models default: keep the cache keys of existing entries
+    key_parameters = dict(model_parameters)
+    if precision != "float32":
+        key_parameters["precision"] = precision
+
+    orbff, source, seconds = get_cached_model(
+        model_name,
+        key_parameters,
+        lambda: loader(precision=orb_precision, **model_parameters),
+        cache_cfg,
+    )
+    apply_precision(precision)
+    print(f"Model load: {seconds:.2f} s ({source}, {precision})")
+
+    return orbff
+
+
+def build_orb_calculator(cfg: dict):
+    """
+    ORB calculator.
+
+    calculator.precision:
+      float64  double-precision model and graphs
+      float32  orb_models default (float32, "high" matmul precision)
+      mixed    float32 forward at "highest" matmul precision; energy, forces
+               and stress are accumulated in float64 (see float64_results)
+    """
+
+    calculator_cfg = cfg["calculator"]
+    wrapper_parameters = calculator_cfg.get("wrapper_parameters", {})
+
+    if wrapper_parameters is None:
+        wrapper_parameters = {}
+
+    orbff = build_orb_model(cfg)
+    mixed = calculator_cfg.get("precision", "float32") == "mixed"
+
+    skin = float(calculator_cfg.get("skin_A", 0.0))
+    if skin > 0.0:
+        return SkinGraphORBCalculator(orbff, skin=skin, mixed=mixed, **wrapper_parameters)
+
+    if mixed:
+        return MixedPrecisionORBCalculator(orbff, **wrapper_parameters)
+
     calculator = ORBCalculator(
         orbff,
         **wrapper_parameters
     )
 
     return calculator
+
+
+class MixedPrecisionORBCalculator(ORBCalculator):
+    """
+    ORBCalculator with float64 results for a float32 model
+    (calculator.precision: mixed).
+    """
+
+    def _update_results(self, out):
+        super()._update_results(out)
+        float64_results(self.results)
+
+
+class SkinGraphORBCalculator(ORBCalculator):
+    """
+    ORBCalculator that reuses its edge list between force calls (Verlet skin).
+
+    Edges are built out to radius + skin (ase.neighborlist, any cell shape) and
+    kept until an atom has moved more than skin / 2 since the last build; in
+    between only positions, cell and edge vectors are refreshed. The model's
+    distance cutoff envelope is zero beyond the radius, so the extra edges do
+    not change energies or forces. Like the "effectively unlimited" ORB v3
+    models, all neighbours are kept (no max_num_neighbors cap). With mixed,
+    results are promoted to float64 as in MixedPrecisionORBCalculator.
+
+    NPT: edges keep their integer cell shifts, so edge vectors follow the
+    current cell. The rebuild test accounts for cell strain: a pair outside
+    radius + skin at build time can only come within the radius once
+      sigma_min(H_ref^-1 H) * (radius + skin - 2 * max_displacement) < radius
+    with displacements measured in the reference cell metric.
+    """
+
+    def __init__(self, model, skin: float = 1.0, mixed: bool = False, **kwargs):
+        super().__init__(model, **kwargs)
+        self.skin = float(skin)
+        self.mixed = mixed
+        self.radius = float(self.system_config.radius)
+
+        self.n_builds = 0
+        self.n_reuses = 0
+        self._template = None
+        self._graph = None
+        self._ref = None
+
+    def _update_results(self, out):
+        super()._update_results(out)
+        if self.mixed:
+            float64_results(self.results)
+
+    def graph_stats(self) -> dict:
+        return {"skin_A": self.skin, "graph_builds": self.n_builds, "graph_reuses": self.n_reuses}
+
+    def reset(self):
+        super().reset()
+        self._template = None
+        self._graph = None
+        self._ref = None
+
+    def _identity(self, atoms) -> tuple:
+        constraints = tuple(repr(c) for c in atoms.constraints)
+        return (
+            atoms.numbers.tobytes(),
+            atoms.pbc.tobytes(),
+            atoms.info.get("charge"),
+            atoms.info.get("spin"),
+            constraints,
+        )
+
+    def _needs_rebuild(self, atoms) -> bool:
+        ref = self._ref
+        if ref is None or self._identity(atoms) != ref["identity"]:
+            return True
+
+        cell = atoms.cell.array
+        if ref["periodic"]:
+            frac = atoms.positions @ np.linalg.inv(cell)
+            displacement = (frac - ref["frac"]) @ ref["cell"]
+            strain = np.linalg.solve(ref["cell"], cell)
+            sigma_min = np.linalg.svd(strain, compute_uv=False).min()
+        else:
+            displacement = atoms.positions - ref["positions"]
+            sigma_min = 1.0
+
+        max_displacement = np.sqrt((displacement**2).sum(axis=1).max())
+        return sigma_min * (self.radius + self.skin - 2.0 * max_displacement) < self.radius
+
+    def _build(self, atoms) -> None:
+        identity = self._identity(atoms)
+
+        # node/system features only depend on species, pbc, charge/spin and constraints
+        if self._ref is None or identity != self._ref["identity"]:
+            self._template = ase_atoms_to_atom_graphs(
+                atoms,
+                system_config=self.system_config,
+                max_num_neighbors=self.max_num_neighbors,
+                edge_method=self.edge_method,
+                half_supercell=self.half_supercell,
+                device=self.device,
+            ).to(self.device)
+
+        template = self._template
+        reference = template.node_features["positions"]
+
+        senders, receivers, shifts = neighbor_list("ijS", atoms, self.radius + self.skin)
+        senders = torch.as_tensor(senders, dtype=template.senders.dtype, device=reference.device)
+        receivers = torch.as_tensor(receivers, dtype=template.receivers.dtype, device=reference.device)
+        shifts = torch.as_tensor(shifts, dtype=reference.dtype, device=reference.device)
+
+        self._graph = template._replace(
+            senders=senders,
+            receivers=receivers,
+            n_edge=torch.tensor([len(senders)], dtype=template.n_edge.dtype, device=template.n_edge.device),
+            edge_features={**template.edge_features, "unit_shifts": shifts},
+        )
+
+        periodic = bool(np.any(atoms.pbc)) and atoms.cell.rank == 3
+        self._ref = {
+            "identity": identity,
+            "periodic": periodic,
+            "positions": atoms.get_positions(),
+            "cell": atoms.cell.array.copy(),
+        }
+        if periodic:
+            self._ref["frac"] = atoms.positions @ np.linalg.inv(atoms.cell.array)
+
+        self.n_builds += 1
+
+    def _current_graph(self, atoms):
+        graph = self._graph
+        reference = graph.node_features["positions"]
+
+        # unwrapped positions: the integer shifts were computed for these
+        positions = torch.as_tensor(atoms.positions, dtype=reference.dtype, device=reference.device)
+        cell = torch.as_tensor(atoms.cell.array, dtype=reference.dtype, device=reference.device)
+        lattice = torch.as_tensor(cell_to_cellpar(atoms.cell.array), dtype=reference.dtype, device=reference.device)
+
+        vectors = positions[graph.receivers] - positions[graph.senders] + graph.edge_features["unit_shifts"] @ cell
+
+        return graph._replace(
+            node_features={**graph.node_features, "positions": positions},
+            edge_features={**graph.edge_features, "vectors": vectors},
+            system_features={
+                **graph.system_features,
+                "cell": cell.unsqueeze(0),
+                "lattice": lattice.unsqueeze(0),
+            },
+        )
+
+    def calculate(self, atoms=None, properties=None, system_changes=all_changes):
+        Calculator.calculate(self, atoms)
+
+        if self.expects_charge_and_spin:
+            if ("charge" not in atoms.info) or ("spin" not in atoms.info):
+                raise ValueError("atoms.info must contain both 'charge' and 'spin'")
+
+        if self._needs_rebuild(atoms):
+            self._build(atoms)
+        else:
+            self.n_reuses += 1
+
+        out = self.model.predict(self._current_graph(atoms))
+        self._update_results(out)
+
+
+def predict_batch(calculator: ORBCalculator, atoms_list: list) -> list[dict]:
+    """
+    Evaluate several Atoms with one batched forward pass of the calculator's model.
+
+    Returns one results dict per Atoms, in the same layout ORBCalculator
+    stores in `calculator.results` for a single structure.
+    """
+    graphs = []
+    for atoms in atoms_list:
+        if calculator.expects_charge_and_spin:
+            if ("charge" not in atoms.info) or ("spin" not in atoms.info):
+                raise ValueError("atoms.info must contain both 'charge' and 'spin'")
+
+        graph = ase_atoms_to_atom_graphs(
+            atoms,
+            system_config=calculator.system_config,
+            max_num_neighbors=calculator.max_num_neighbors,
+            edge_method=calculator.edge_method,
+            half_supercell=calculator.half_supercell,
+            device=calculator.device,
+        )
+        graphs.append(graph)
+
+    batch = batch_graphs(graphs).to(calculator.device)
+    out = calculator.model.predict(batch, split=True)
+
+    results = []
+    for index in range(len(atoms_list)):
+        out_single = {name: pred[index] for name, pred in out.items()}
+        calculator._update_results(out_single)
+        results.append(calculator.results)
+
+    calculator.results = {}
+
+    return results
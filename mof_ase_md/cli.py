@@ -1,23 +1,288 @@
 from __future__ import annotations
 
+from mof_ase_md.utils import startup
+
 import argparse
 import sys
 import yaml
 
 from mof_ase_md.config.loader import load_config
 from mof_ase_md.config.defaults import apply_defaults
-from mof_ase_md.config.validator import validate_config, ConfigError
+from mof_ase_md.config.validator import validate_config, resolve_stages, ConfigError
 from mof_ase_md.md.methods import list_methods
-from mof_ase_md.run import run as run_md
+
+# Only light modules above: run, sweep, ASE integrators, torch and
+# orb_models are imported by the commands that need them, so validate /
+# list-methods / print-config start without them (check with --timing).
+startup.mark("cli imports")
+
+
+def _import_run():
+    with startup.phase("import mof_ase_md.run"):
+        import mof_ase_md.run as run_module
+    return run_module
+
+
+def resource_flags(args: argparse.Namespace) -> dict:
+    return {
+        "threads": args.threads,
+        "interop_threads": args.interop_threads,
+        "cpus": args.cpus,
+        "numa_node": args.numa_node,
+    }
+
+
+def add_resource_flags(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("resources (override the config's resources block)")
+    group.add_argument("--threads", type=int, default=None, help="torch intra-op / OpenMP / BLAS threads")
+    group.add_argument("--interop-threads", type=int, default=None, help="torch inter-op threads")
+    group.add_argument("--cpus", default=None, help="Core affinity, e.g. 0-15 or 0-7,32-39")
+    group.add_argument("--numa-node", type=int, default=None, help="Restrict to the cores of this NUMA node")
 
 
 def cmd_run(args: argparse.Namespace) -> int:
-    run_md(args.config)
+    _import_run().run(args.config, resources=resource_flags(args))
+    return 0
+
+
+def cmd_resume(args: argparse.Namespace) -> int:
+    _import_run().resume(args.path, extra_steps=args.steps, resources=resource_flags(args))
+    return 0
+
+
+def cmd_profile(args: argparse.Namespace) -> int:
+    _import_run().profile(
+        args.config,
+        args.steps,
+        workdir=args.workdir,
+        report=args.report,
+        resources=resource_flags(args),
+    )
+    return 0
+
+
+def cmd_partition(args: argparse.Namespace) -> int:
+    import subprocess
+
+    from mof_ase_md.resources import parse_cpu_list, partition
+
+    n_runs = args.runs if args.runs is not None else len(args.configs)
+    if n_runs < 1:
+        raise ConfigError("partition needs --runs or at least one config")
+    if args.configs and len(args.configs) != n_runs:
+        raise ConfigError(f"--runs {n_runs} does not match {len(args.configs)} configs")
+
+    cpus = parse_cpu_list(args.cpus) if args.cpus is not None else None
+    slots = partition(n_runs, cpus=cpus, smt=args.smt)
+
+    commands = []
+    for index, slot in enumerate(slots):
+        flags = ["--cpus", slot["cpus"], "--threads", str(slot["threads"]), "--interop-threads", "1"]
+        if slot["numa_node"] is not None:
+            flags += ["--numa-node", str(slot["numa_node"])]
+        config = args.configs[index] if args.configs else "<config>"
+        commands.append([sys.executable, "-m", "mof_ase_md.cli", "run", config] + flags)
+        print(f"run {index}: cpus {slot['cpus']} ({slot['threads']} threads)"
+              + ("" if slot["numa_node"] is None else f", NUMA node {slot['numa_node']}"))
+
+    if not args.configs:
+        for command in commands:
+            print(" ".join(command[1:]))
+        return 0
+
+    processes = [subprocess.Popen(command) for command in commands]
+    codes = [process.wait() for process in processes]
+    for config, code in zip(args.configs, codes):
+        print(f"{config}: exit {code}")
+    return 1 if any(codes) else 0
+
+
+def cmd_calibrate_threads(args: argparse.Namespace) -> int:
+    from mof_ase_md.bench import BENCH_CALCULATORS
+    from mof_ase_md.resources import calibrate, parse_cpu_list
+
+    if args.config is not None:
+        calculator = load_config(args.config)["calculator"]
+    elif args.calculator is not None:
+        calculator = BENCH_CALCULATORS[args.calculator]
+    else:
+        raise ConfigError("calibrate-threads needs --config (its calculator block) or --calculator")
+
+    thread_counts = None
+    if args.threads is not None:
+        thread_counts = [int(item) for item in args.threads.split(",") if item.strip()]
+
+    calibrate(
+        args.atoms,
+        thread_counts=thread_counts,
+        calculator=calculator,
+        steps=args.steps,
+        warmup=args.warmup,
+        cpus=parse_cpu_list(args.cpus) if args.cpus is not None else None,
+        smt=args.smt,
+    )
+    return 0
+
+
+def cmd_precision_check(args: argparse.Namespace) -> int:
+    modes = None
+    if args.modes is not None:
+        modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+
+    rows = _import_run().precision_check(
+        args.config,
+        steps=args.steps,
+        modes=modes,
+        timestep_fs=args.timestep_fs,
+        max_drift=args.max_drift,
+    )
+    failed = [row for row in rows if row.get("ok") is False]
+    return 1 if failed else 0
+
+
+def cmd_tune_timestep(args: argparse.Namespace) -> int:
+    from mof_ase_md.tune import tune_timestep
+
+    timesteps = None
+    if args.timesteps is not None:
+        timesteps = [float(dt) for dt in args.timesteps.split(",") if dt.strip()]
+
+    result = tune_timestep(
+        args.config,
+        timesteps=timesteps,
+        steps=args.steps,
+        tolerance=args.tolerance,
+        workers=args.workers,
+        pin=args.pin,
+        write=args.write,
+    )
+    return 0 if result["recommended_fs"] is not None else 1
+
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    from mof_ase_md.analyze import QUANTITIES, analyze
+
+    quantities = [name for name in QUANTITIES if getattr(args, name)] or None
+    elements = None
+    if args.elements is not None:
+        elements = [symbol.strip() for symbol in args.elements.split(",") if symbol.strip()]
+
+    grid = [int(n) for n in args.density_grid.split(",")]
+    if len(grid) != 3 or min(grid) < 1:
+        raise ConfigError("--density-grid must be three positive integers, e.g. 40,40,40")
+
+    try:
+        analyze(
+            args.trajectory,
+            quantities=quantities,
+            output=args.output,
+            start=args.start,
+            stop=args.stop,
+            every=args.every,
+            r_max=args.r_max,
+            bins=args.bins,
+            max_lag=args.max_lag,
+            elements=elements,
+            grid=grid,
+            dt_fs=args.dt_fs,
+            chunk_frames=args.chunk_frames,
+            workers=args.workers,
+        )
+    except ValueError as e:
+        raise ConfigError(str(e))
+    return 0
+
+
+def cmd_library(args: argparse.Namespace) -> int:
+    from mof_ase_md.system.library import build_library
+
+    try:
+        rows = build_library(args.inputs, fmt=args.format, library_dir=args.dir, workers=args.workers, force=args.force)
+    except ValueError as e:
+        raise ConfigError(str(e))
+
+    for row in rows:
+        n_atoms = "" if row["n_atoms"] is None else f"{row['n_atoms']:>7d} atoms"
+        print(f"{row['status']:<8} {row['seconds']:7.2f} s {n_atoms:>13}  {row['path']}")
+        if row["error"] is not None:
+            print(f"         {row['error']} (set --format?)")
+
+    errors = sum(1 for row in rows if row["status"] == "error")
+    added = sum(1 for row in rows if row["status"] == "added")
+    print(f"Structure library: {added} added, {len(rows) - added - errors} already cached, {errors} failed")
+    return 1 if errors else 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from mof_ase_md.serve import serve
+
+    serve(socket_path=args.socket, workers=args.workers, preload=args.preload)
     return 0
 
 
+def cmd_submit(args: argparse.Namespace) -> int:
+    import json
+
+    from mof_ase_md.serve import request, submit
+
+    if args.status or args.shutdown:
+        action = "status" if args.status else "shutdown"
+        for event in request({"action": action}, args.socket):
+            print(json.dumps(event, indent=2, default=str))
+        return 0
+
+    if not args.configs:
+        raise ConfigError("submit needs at least one config (or --status / --shutdown)")
+
+    failures = submit(args.configs, socket_path=args.socket, wait=not args.no_wait)
+    return 1 if failures else 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    from mof_ase_md.bench import compare_results, load_results, run_bench
+
+    def split(value):
+        if value is None:
+            return None
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    sizes = split(args.sizes)
+    if sizes is not None:
+        sizes = [int(size) for size in sizes]
+
+    orb_calculator = None
+    if args.config is not None:
+        orb_calculator = load_config(args.config)["calculator"]
+
+    results = run_bench(
+        methods=split(args.methods),
+        sizes=sizes,
+        calculators=split(args.calculators),
+        steps=args.steps,
+        warmup=args.warmup,
+        output=args.output,
+        isolate=not args.no_isolate,
+        orb_calculator=orb_calculator,
+    )
+
+    if args.compare is None:
+        return 0
+
+    regressions = compare_results(load_results(args.compare), results, tolerance=args.tolerance)
+    for item in regressions:
+        print(
+            f"REGRESSION {item['method']} {item['calculator']} {item['natoms']} atoms: "
+            f"integrator {item['baseline_ms']:.3f} -> {item['current_ms']:.3f} ms/step (x{item['ratio']:.2f})"
+        )
+    return 1 if regressions else 0
+
+
 def cmd_validate(args: argparse.Namespace) -> int:
     cfg = load_config(args.config)
+    if cfg.get("stages") is not None:
+        stage_cfgs = resolve_stages(cfg)
+        print(f"CONFIG VALID ({len(stage_cfgs)} stages)")
+        return 0
     cfg = apply_defaults(cfg)
     validate_config(cfg)
     print("CONFIG VALID")
@@ -32,24 +297,180 @@ def cmd_list_methods(args: argparse.Namespace) -> int:
 
 def cmd_print_config(args: argparse.Namespace) -> int:
     cfg = load_config(args.config)
+    if cfg.get("stages") is not None:
+        # one YAML document per stage
+        yaml.safe_dump_all(resolve_stages(cfg), stream=sys.stdout, sort_keys=False)
+        return 0
     cfg = apply_defaults(cfg)
     cfg = validate_config(cfg)
     yaml.safe_dump(cfg, stream=sys.stdout, sort_keys=False)
     return 0
 
 
+def cmd_sweep(args: argparse.Namespace) -> int:
+    with startup.phase("import mof_ase_md.sweep"):
+        from mof_ase_md.sweep import load_grid_file, parse_grid_args, run_sweep
+
+    grid = {}
+    if args.grid_file is not None:
+        grid.update(load_grid_file(args.grid_file))
+    grid.update(parse_grid_args(args.grid))
+
+    if not grid:
+        raise ConfigError("sweep needs at least one --grid key=v1,v2 or a --grid-file")
+
+    rows = run_sweep(args.config, grid, workers=args.workers, summary_file=args.summary, pin=args.pin)
+    failed = [row for row in rows if row["status"] != "ok"]
+    return 1 if failed else 0
+
+
+def cmd_screen(args: argparse.Namespace) -> int:
+    from mof_ase_md.screen import run_screen
+
+    rows = run_screen(
+        args.structures,
+        args.config,
+        pattern=args.pattern,
+        fmt=args.format,
+        workers=args.workers,
+        summary_file=args.summary,
+        max_volume_change=args.max_volume_change,
+        force=args.force,
+        pin=args.pin,
+    )
+    failed = [row for row in rows if not str(row["status"]).startswith(("ok", "unstable"))]
+    return 1 if failed else 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="mof_ase_md",
         description="MOF MD runner using ASE + ML force fields",
     )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Report import / start-up time per phase on stderr when the command ends",
+    )
 
     sub = parser.add_subparsers(dest="command", required=True)
 
     p_run = sub.add_parser("run", help="Run MD from a config file")
     p_run.add_argument("config", help="Path to YAML config file")
+    add_resource_flags(p_run)
     p_run.set_defaults(func=cmd_run)
 
+    p_resume = sub.add_parser("resume", help="Continue a run from its latest checkpoint")
+    p_resume.add_argument("path", help="Run workdir, checkpoint directory or checkpoint file")
+    p_resume.add_argument(
+        "--steps",
+        type=int,
+        default=None,
+        help="Run this many steps past the checkpoint (default: up to md.total_steps)",
+    )
+    add_resource_flags(p_resume)
+    p_resume.set_defaults(func=cmd_resume)
+
+    p_profile = sub.add_parser("profile", help="Run N steps with per-section timing and print the breakdown")
+    p_profile.add_argument("config", help="Path to YAML config")
+    p_profile.add_argument("--steps", type=int, default=200, help="Number of MD steps to profile")
+    p_profile.add_argument("--workdir", default=None, help="Output directory (default: <workdir>/profile)")
+    p_profile.add_argument("--report", default=None, help="Report file name, .json or .csv (default: timing.json)")
+    add_resource_flags(p_profile)
+    p_profile.set_defaults(func=cmd_profile)
+
+    p_partition = sub.add_parser("partition", help="Split this node's cores across concurrent runs (print plan or launch)")
+    p_partition.add_argument("configs", nargs="*", help="Configs to launch, one pinned run each (omit to print the plan)")
+    p_partition.add_argument("--runs", type=int, default=None, help="Number of concurrent runs (default: number of configs)")
+    p_partition.add_argument("--cpus", default=None, help="CPUs to split (default: this process's affinity)")
+    p_partition.add_argument("--smt", action="store_true", help="Also use SMT siblings (default: one CPU per physical core)")
+    p_partition.set_defaults(func=cmd_partition)
+
+    p_calibrate = sub.add_parser("calibrate-threads", help="Find the threads-per-run with the best node throughput")
+    p_calibrate.add_argument("--atoms", type=int, required=True, help="Approximate atom count of the production system")
+    p_calibrate.add_argument("--threads", default=None, help="Comma-separated threads per run to try (default: powers of 2)")
+    p_calibrate.add_argument("--calculator", default=None, choices=["emt", "lj", "orb"], help="ORB, or a stand-in that does not use torch threads")
+    p_calibrate.add_argument("--config", default=None, help="Take the calculator block from this config (overrides --calculator)")
+    p_calibrate.add_argument("--steps", type=int, default=20, help="Timed steps per run")
+    p_calibrate.add_argument("--warmup", type=int, default=3, help="Untimed steps per run")
+    p_calibrate.add_argument("--cpus", default=None, help="CPUs to use (default: this process's affinity)")
+    p_calibrate.add_argument("--smt", action="store_true", help="Also use SMT siblings")
+    p_calibrate.set_defaults(func=cmd_calibrate_threads)
+
+    p_precision = sub.add_parser("precision-check", help="NVE energy drift of each ORB precision mode on a config's structure")
+    p_precision.add_argument("config", help="Path to YAML config")
+    p_precision.add_argument("--steps", type=int, default=200, help="NVE steps per mode")
+    p_precision.add_argument("--modes", default=None, help="Comma-separated: float64,float32,mixed (default: all)")
+    p_precision.add_argument("--timestep-fs", type=float, default=None, help="Probe timestep (default: md.timestep_fs)")
+    p_precision.add_argument("--max-drift", type=float, default=None, help="Allowed |drift| in meV/atom/ps; exit 1 if a mode exceeds it")
+    p_precision.set_defaults(func=cmd_precision_check)
+
+    p_tune = sub.add_parser("tune-timestep", help="NVE drift probes at a ladder of timesteps; recommend the largest within tolerance")
+    p_tune.add_argument("config", help="Path to YAML config")
+    p_tune.add_argument("--timesteps", default=None, help="Comma-separated timesteps in fs (default: 0.5,1,1.5,2,2.5,3,4,5 up to the system's limit)")
+    p_tune.add_argument("--steps", type=int, default=200, help="NVE steps per probe")
+    p_tune.add_argument("--tolerance", type=float, default=1.0, help="Largest accepted |drift| in meV/atom/ps")
+    p_tune.add_argument("--workers", type=int, default=1, help="Probes run in parallel on this many worker processes")
+    p_tune.add_argument("--pin", action="store_true", help="Partition the node's cores across workers and pin each worker")
+    p_tune.add_argument("--write", default=None, help="Write the resolved config with the recommended md.timestep_fs to this path")
+    p_tune.set_defaults(func=cmd_tune_timestep)
+
+    p_library = sub.add_parser("library", help="Parse structure files in parallel into the binary structure library")
+    p_library.add_argument("inputs", nargs="+", help="Structure files or glob patterns (quote them; ** is recursive)")
+    p_library.add_argument("--format", default=None, help="ASE format (default: guessed per file)")
+    p_library.add_argument("--dir", default=None, help="Library directory (default: ~/.cache/mof_ase_md/structures)")
+    p_library.add_argument("--workers", type=int, default=1, help="Parser processes")
+    p_library.add_argument("--force", action="store_true", help="Parse again even if a record exists")
+    p_library.set_defaults(func=cmd_library)
+
+    p_analyze = sub.add_parser("analyze", help="Out-of-core RDF/MSD/VACF/density/lattice analysis of a trajectory")
+    p_analyze.add_argument("trajectory", help=".traj file or chunked trajectory directory")
+    p_analyze.add_argument("--rdf", action="store_true", help="Radial distribution functions")
+    p_analyze.add_argument("--msd", action="store_true", help="Mean squared displacement per element")
+    p_analyze.add_argument("--vacf", action="store_true", help="Velocity autocorrelation per element (needs momenta)")
+    p_analyze.add_argument("--density", action="store_true", help="Fractional-coordinate density maps per element")
+    p_analyze.add_argument("--lattice", action="store_true", help="Lattice-parameter time series and histograms")
+    p_analyze.add_argument("--r-max", type=float, default=8.0, help="RDF cutoff in A")
+    p_analyze.add_argument("--bins", type=int, default=200, help="RDF bins")
+    p_analyze.add_argument("--max-lag", type=int, default=200, help="MSD/VACF correlation length in (selected) frames")
+    p_analyze.add_argument("--elements", default=None, help="Comma-separated elements for MSD/VACF/density (default: all)")
+    p_analyze.add_argument("--density-grid", default="40,40,40", help="Density grid along a,b,c")
+    p_analyze.add_argument("--start", type=int, default=0, help="First frame")
+    p_analyze.add_argument("--stop", type=int, default=None, help="Stop before this frame")
+    p_analyze.add_argument("--every", type=int, default=1, help="Use every n-th frame")
+    p_analyze.add_argument("--dt-fs", type=float, default=None, help="Time between stored frames (default: from config_used.yaml)")
+    p_analyze.add_argument("--chunk-frames", type=int, default=500, help="Frames per work chunk")
+    p_analyze.add_argument("--workers", type=int, default=1, help="Worker processes")
+    p_analyze.add_argument("--output", default=None, help="Output directory (default: <trajectory>_analysis)")
+    p_analyze.set_defaults(func=cmd_analyze)
+
+    p_serve = sub.add_parser("serve", help="Job daemon: keep models loaded and run submitted configs")
+    p_serve.add_argument("--socket", default=None, help="Unix socket path (default: $XDG_RUNTIME_DIR or /tmp)")
+    p_serve.add_argument("--workers", type=int, default=1, help="Concurrent job slots (worker processes)")
+    p_serve.add_argument("--preload", action="append", default=[], help="Build this config's calculator in every worker at start-up (repeatable)")
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_submit = sub.add_parser("submit", help="Send configs to a running serve daemon")
+    p_submit.add_argument("configs", nargs="*", help="Config files (relative paths are resolved here)")
+    p_submit.add_argument("--socket", default=None, help="Unix socket path of the daemon")
+    p_submit.add_argument("--no-wait", action="store_true", help="Return once the jobs are queued")
+    p_submit.add_argument("--status", action="store_true", help="Print the daemon's job counts")
+    p_submit.add_argument("--shutdown", action="store_true", help="Stop the daemon after its running jobs")
+    p_submit.set_defaults(func=cmd_submit)
+
+    p_bench = sub.add_parser("bench", help="Benchmark every MD method on synthetic supercells")
+    p_bench.add_argument("--methods", default=None, help="Comma-separated md.method names (default: all)")
+    p_bench.add_argument("--sizes", default=None, help="Comma-separated supercell repeats of the 25-atom cell (default: 1,2,3,4)")
+    p_bench.add_argument("--calculators", default=None, help="Comma-separated: emt,lj,orb (default: emt,lj + orb if cached)")
+    p_bench.add_argument("--steps", type=int, default=50, help="Timed steps per case")
+    p_bench.add_argument("--warmup", type=int, default=5, help="Untimed steps per case")
+    p_bench.add_argument("--output", default="bench.json", help="Results file, .json or .csv")
+    p_bench.add_argument("--config", default=None, help="Take the ORB calculator block from this config")
+    p_bench.add_argument("--no-isolate", action="store_true", help="Run all cases in this process (RSS is then cumulative)")
+    p_bench.add_argument("--compare", default=None, help="Baseline results file; exit 1 on integrator regressions")
+    p_bench.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown for --compare")
+    p_bench.set_defaults(func=cmd_bench)
+
     p_val = sub.add_parser("validate", help="Validate config (after applying defaults)")
     p_val.add_argument("config", help="Path to YAML config file")
     p_val.set_defaults(func=cmd_validate)
@@ -61,19 +482,57 @@ def build_parser() -> argparse.ArgumentParser:
     p_print.add_argument("config", help="Path to YAML config file")
     p_print.set_defaults(func=cmd_print_config)
 
+    p_sweep = sub.add_parser("sweep", help="Run a grid of configs on a local process pool")
+    p_sweep.add_argument("config", help="Path to base YAML config file")
+    p_sweep.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="Grid axis as dotted.key=v1,v2,... (repeatable), e.g. state.temperature_K=300,350",
+    )
+    p_sweep.add_argument("--grid-file", default=None, help="YAML file mapping dotted keys to value lists")
+    p_sweep.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    p_sweep.add_argument("--pin", action="store_true", help="Partition the node's cores across workers and pin each worker")
+    p_sweep.add_argument("--summary", default=None, help="Summary CSV path (default: <workdir>/sweep_summary.csv)")
+    p_sweep.set_defaults(func=cmd_sweep)
+
+    p_screen = sub.add_parser("screen", help="Run one protocol over a directory of structures, largest first")
+    p_screen.add_argument("structures", help="Directory with structure files")
+    p_screen.add_argument("config", help="Protocol config (plain or with stages); system.input_file is set per structure")
+    p_screen.add_argument("--pattern", default=None, help="Glob for the structure files, e.g. '*.cif' (default: known structure suffixes)")
+    p_screen.add_argument("--format", default=None, help="ASE format of the structure files (default: system.format or guessed)")
+    p_screen.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    p_screen.add_argument("--pin", action="store_true", help="Partition the node's cores across workers and pin each worker")
+    p_screen.add_argument("--max-volume-change", type=float, default=0.1, help="Largest |V/V0 - 1| still counted as stable")
+    p_screen.add_argument("--force", action="store_true", help="Rerun structures that already finished")
+    p_screen.add_argument("--summary", default=None, help="Summary CSV path (default: <workdir>/screen_summary.csv)")
+    p_screen.set_defaults(func=cmd_screen)
+
     return parser
 
 
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
+    startup.mark("parse arguments")
 
     try:
-        rc = args.func(args)
+        with startup.phase(f"command {args.command}"):
+            rc = args.func(args)
         raise SystemExit(rc)
     except ConfigError as e:
         print(f"CONFIG ERROR: {e}", file=sys.stderr)
         raise SystemExit(2)
+    except Exception as e:
+        # md.safety is only loaded by commands that run dynamics
+        safety = sys.modules.get("mof_ase_md.md.safety")
+        if safety is None or not isinstance(e, safety.SafetyError):
+            raise
+        print(f"SAFETY STOP: {e}", file=sys.stderr)
+        raise SystemExit(3)
+    finally:
+        if args.timing:
+            startup.report()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import copy
+from pathlib import Path
+
 
 def _deep_merge(base: dict, override: dict) -> dict:
     """
@@ -111,6 +114,27 @@ def get_defaults_for_method(method: str) -> dict:
             }
         }
 
+    if method in ("respa", "respa_langevin"):
+        defaults = {
+            "respa": {
+                "inner_steps": 4,
+                "fit_inner": True,
+                "inner_calculator": {
+                    "name": "bonds",
+                    "parameters": {
+                        "k_eV_A2": 20.0,
+                        "cutoff_scale": 1.2,
+                    },
+                },
+            }
+        }
+        if method == "respa_langevin":
+            defaults["thermostat"] = {
+                "langevin": {
+                    "friction_per_fs": 0.01
+                }
+            }
+        return defaults
 
     # No defaults for unknown methods yet
     return {}
@@ -131,3 +155,28 @@ def apply_defaults(cfg: dict) -> dict:
     merged = _deep_merge(defaults, cfg)
 
     return merged
+
+
+def expand_stages(cfg: dict) -> list[dict]:
+    """
+    One config per entry of cfg["stages"]: the base config (without
+    stages) with the stage's blocks merged over it, method defaults applied
+    to md stages, and output.workdir set to <workdir>/<NN>_<name>.
+    """
+    base = {key: value for key, value in cfg.items() if key != "stages"}
+    workdir = Path(base["output"]["workdir"])
+
+    configs = []
+    for index, stage in enumerate(cfg["stages"]):
+        stage_type = stage.get("type", "md")
+        overlay = {key: value for key, value in stage.items() if key not in ("name", "type")}
+
+        stage_cfg = copy.deepcopy(_deep_merge(base, overlay))
+        if stage_type == "md":
+            stage_cfg = apply_defaults(stage_cfg)
+
+        stage_cfg["output"]["workdir"] = str(workdir / f"{index + 1:02d}_{stage['name']}")
+        stage_cfg["stage"] = {"index": index, "name": stage["name"], "type": stage_type}
+        configs.append(stage_cfg)
+
+    return configs
@@ -1,11 +1,25 @@
 from __future__ import annotations
+from mof_ase_md.config.defaults import expand_stages
 from mof_ase_md.md.methods import get_method_info
+from mof_ase_md.calculator.factory import CALCULATOR_NAMES, PRECISIONS
+from mof_ase_md.resources import parse_cpu_list
+from mof_ase_md.md.log_columns import COLUMN_SPECS as LOG_COLUMNS, LOG_FORMATS
 
 
 class ConfigError(ValueError):
     pass
 
 
+STAGE_TYPES = ("md", "minimize")
+OPTIMIZERS = ("fire", "bfgs", "lbfgs")
+CELL_FILTERS = ("none", "frechet", "exp", "unit")
+
+# fastest timestep (fs) allowed for systems with hydrogen, without and with
+# system.mass_repartitioning; safety.max_timestep_fs overrides both
+HYDROGEN_MAX_TIMESTEP_FS = 1.0
+HMR_MAX_TIMESTEP_FS = 2.0
+
+
 def _require(cfg: dict, path: str):
     cur = cfg
     for key in path.split("."):
@@ -55,7 +69,7 @@ def _require_num(cfg: dict, path: str) -> float:
     return float(val)
 
 
-def validate_config(cfg: dict) -> dict:
+def _validate_system_and_calculator(cfg: dict) -> None:
     # system
     _require_str(cfg, "system.input_file")
     _require_bool(cfg, "system.pbc")
@@ -64,15 +78,36 @@ def validate_config(cfg: dict) -> dict:
     charge = _require_int(cfg, "system.charge")
     spin = _require_int(cfg, "system.spin")
 
-    method = _require_str(cfg, "md.method").lower()
-    cfg["md"]["method"] = method
-
     if spin <= 0:
         raise ConfigError("system.spin must be an int > 0")
 
+    cache_cfg = cfg["system"].get("cache", None)
+    if cache_cfg is not None and not isinstance(cache_cfg, bool):
+        if not isinstance(cache_cfg, dict):
+            raise ConfigError("system.cache must be true/false or a dict")
+        if "enabled" in cache_cfg:
+            _require_bool(cfg, "system.cache.enabled")
+        if "dir" in cache_cfg:
+            _require_str(cfg, "system.cache.dir")
+
+    hmr_cfg = cfg["system"].get("mass_repartitioning", None)
+    if hmr_cfg is not None:
+        if not isinstance(hmr_cfg, dict):
+            raise ConfigError("system.mass_repartitioning must be a dict")
+        if "enabled" in hmr_cfg:
+            _require_bool(cfg, "system.mass_repartitioning.enabled")
+        if "hydrogen_mass" in hmr_cfg:
+            _require_num_gt(cfg, "system.mass_repartitioning.hydrogen_mass", 1.0)
+        if "cutoff_scale" in hmr_cfg:
+            _require_num_gt(cfg, "system.mass_repartitioning.cutoff_scale", 0.0)
+
     # calculator (force field choice)
-    _require_str(cfg, "calculator.name")
-    _require_str(cfg, "calculator.model")
+    calculator_name = _require_str(cfg, "calculator.name").lower()
+    if calculator_name not in CALCULATOR_NAMES:
+        raise ConfigError(f"calculator.name must be one of: {', '.join(CALCULATOR_NAMES)}")
+    cfg["calculator"]["name"] = calculator_name
+    if calculator_name == "orb":
+        _require_str(cfg, "calculator.model")
 
     params = cfg.get("calculator", {}).get("parameters", {})
     if params is None:
@@ -81,7 +116,41 @@ def validate_config(cfg: dict) -> dict:
     if not isinstance(params, dict):
         raise ConfigError("calculator.parameters must be a dict")
 
+    if "skin_A" in cfg["calculator"]:
+        if calculator_name != "orb":
+            raise ConfigError("calculator.skin_A is only supported for calculator.name 'orb'")
+        skin = _require_num(cfg, "calculator.skin_A")
+        if skin < 0.0:
+            raise ConfigError("calculator.skin_A must be >= 0")
+
+    if "precision" in cfg["calculator"]:
+        if calculator_name != "orb":
+            raise ConfigError("calculator.precision is only supported for calculator.name 'orb'")
+        precision = _require_str(cfg, "calculator.precision").lower()
+        if precision not in PRECISIONS:
+            raise ConfigError(f"calculator.precision must be one of: {', '.join(PRECISIONS)}")
+        cfg["calculator"]["precision"] = precision
+
+    cache = cfg["calculator"].get("cache", None)
+    if cache is not None:
+        if not isinstance(cache, dict):
+            raise ConfigError("calculator.cache must be a dict")
+        for key in ("enabled", "memory", "disk", "verify"):
+            if key in cache:
+                _require_bool(cfg, f"calculator.cache.{key}")
+        if "dir" in cache:
+            _require_str(cfg, "calculator.cache.dir")
+        if "max_size_gb" in cache:
+            _require_num_gt(cfg, "calculator.cache.max_size_gb", 0.0)
+
+
+def validate_config(cfg: dict) -> dict:
+    _validate_system_and_calculator(cfg)
+
     # md
+    method = _require_str(cfg, "md.method").lower()
+    cfg["md"]["method"] = method
+
     ensemble = _require_str(cfg, "md.ensemble").lower()
     if ensemble not in ("nve", "nvt", "npt"):
         raise ConfigError("md.ensemble must be one of: nve, nvt, npt")
@@ -103,6 +172,56 @@ def validate_config(cfg: dict) -> dict:
     total_steps = _require_int_gt(cfg, "md.total_steps", 0)
     timestep_fs = _require_num_gt(cfg, "md.timestep_fs", 0.0)
 
+    # replicas (optional): N lockstep copies with batched force evaluation
+    if "replicas" in cfg["md"]:
+        n_replicas = _require_int_gt(cfg, "md.replicas", 0)
+
+        replicas_cfg = cfg.get("replicas", {})
+        if replicas_cfg is None:
+            replicas_cfg = {}
+        if not isinstance(replicas_cfg, dict):
+            raise ConfigError("replicas must be a dict")
+
+        for key in ("temperatures_K", "seeds"):
+            values = replicas_cfg.get(key, None)
+            if values is None:
+                continue
+            if not isinstance(values, list) or len(values) != n_replicas:
+                raise ConfigError(f"replicas.{key} must be a list with md.replicas entries")
+
+        temperature_range = replicas_cfg.get("temperature_range_K", None)
+        if temperature_range is not None:
+            if replicas_cfg.get("temperatures_K", None) is not None:
+                raise ConfigError("Set only one of replicas.temperatures_K and replicas.temperature_range_K")
+            if (
+                not isinstance(temperature_range, list)
+                or len(temperature_range) != 2
+                or not all(isinstance(t, (int, float)) and t > 0 for t in temperature_range)
+                or temperature_range[0] >= temperature_range[1]
+            ):
+                raise ConfigError("replicas.temperature_range_K must be [T_min, T_max] with 0 < T_min < T_max")
+
+        # replica exchange (parallel tempering) between neighbouring temperatures
+        if replicas_cfg.get("exchange_interval", None) is not None:
+            _require_int_gt(cfg, "replicas.exchange_interval", 0)
+            if n_replicas < 2:
+                raise ConfigError("replicas.exchange_interval requires md.replicas >= 2")
+            if ensemble != "nvt":
+                raise ConfigError("replicas.exchange_interval requires md.ensemble 'nvt'")
+
+            temperatures_K = replicas_cfg.get("temperatures_K", None)
+            if temperatures_K is None and temperature_range is None:
+                raise ConfigError("replicas.exchange_interval requires replicas.temperatures_K or replicas.temperature_range_K")
+            if temperatures_K is not None and any(
+                not isinstance(t, (int, float)) or t <= 0 for t in temperatures_K
+            ):
+                raise ConfigError("replicas.temperatures_K must be positive numbers")
+            if temperatures_K is not None and any(a >= b for a, b in zip(temperatures_K, temperatures_K[1:])):
+                raise ConfigError("replicas.temperatures_K must be increasing for replica exchange")
+
+            if replicas_cfg.get("exchange_seed", None) is not None:
+                _require_int(cfg, "replicas.exchange_seed")
+
     # state
     if ensemble in ("nvt", "npt"):
         _require_num_gt(cfg, "state.temperature_K", 0.0)
@@ -133,6 +252,19 @@ def validate_config(cfg: dict) -> dict:
     elif method == "nvt_berendsen":
         _require_num_gt(cfg, "thermostat.berendsen.taut_fs", 0.0)
 
+    elif method in ("respa", "respa_langevin"):
+        _require_int_gt(cfg, "respa.inner_steps", 0)
+        if "fit_inner" in cfg["respa"]:
+            _require_bool(cfg, "respa.fit_inner")
+        inner_name = _require_str(cfg, "respa.inner_calculator.name").lower()
+        if inner_name not in CALCULATOR_NAMES or inner_name == "orb":
+            raise ConfigError("respa.inner_calculator.name must be one of: bonds, emt, lj")
+        inner_params = cfg["respa"]["inner_calculator"].get("parameters", {})
+        if inner_params is not None and not isinstance(inner_params, dict):
+            raise ConfigError("respa.inner_calculator.parameters must be a dict")
+        if method == "respa_langevin":
+            _require_num_gt(cfg, "thermostat.langevin.friction_per_fs", 0.0)
+
     # -------- NPT methods --------
     elif method == "npt_berendsen":
         _require_num_gt(cfg, "barostat.berendsen.taup_fs", 0.0)
@@ -175,9 +307,221 @@ def validate_config(cfg: dict) -> dict:
     _require_str(cfg, "output.trajectory_file")
     _require_str(cfg, "output.log_file")
 
+    traj_format = cfg["output"].get("trajectory_format", "ase")
+    if traj_format not in ("ase", "chunked"):
+        raise ConfigError("output.trajectory_format must be one of: ase, chunked")
+
+    chunked_cfg = cfg["output"].get("chunked", None)
+    if chunked_cfg is not None:
+        if not isinstance(chunked_cfg, dict):
+            raise ConfigError("output.chunked must be a dict")
+        if "chunk_frames" in chunked_cfg:
+            _require_int_gt(cfg, "output.chunked.chunk_frames", 0)
+        if "compression" in chunked_cfg:
+            _require_bool(cfg, "output.chunked.compression")
+        if "columns" in chunked_cfg:
+            columns = chunked_cfg["columns"]
+            allowed = ("positions", "velocities", "forces", "cell", "energy", "stress")
+            if not isinstance(columns, list) or "positions" not in columns:
+                raise ConfigError("output.chunked.columns must be a list that includes 'positions'")
+            for name in columns:
+                if name not in allowed:
+                    raise ConfigError(f"output.chunked.columns: unknown column '{name}' (allowed: {', '.join(allowed)})")
+
+    async_cfg = cfg["output"].get("async_writes", None)
+    if async_cfg is not None:
+        if not isinstance(async_cfg, dict):
+            raise ConfigError("output.async_writes must be a dict")
+        if "enabled" in async_cfg:
+            _require_bool(cfg, "output.async_writes.enabled")
+        if "queue_size" in async_cfg:
+            _require_int_gt(cfg, "output.async_writes.queue_size", 0)
+        if "backpressure" in async_cfg:
+            backpressure = _require_str(cfg, "output.async_writes.backpressure")
+            if backpressure not in ("block", "drop"):
+                raise ConfigError("output.async_writes.backpressure must be one of: block, drop")
+        if "flush_on_error" in async_cfg:
+            _require_bool(cfg, "output.async_writes.flush_on_error")
+
     traj_interval = _require_int_gt(cfg, "output.traj_interval", 0)
     log_interval = _require_int_gt(cfg, "output.log_interval", 0)
 
+    logging_cfg = cfg.get("logging", None)
+    if logging_cfg is not None:
+        if not isinstance(logging_cfg, dict):
+            raise ConfigError("logging must be a dict")
+        if "mode" in logging_cfg:
+            if _require_str(cfg, "logging.mode") not in ("w", "a"):
+                raise ConfigError("logging.mode must be one of: w, a")
+        if "format" in logging_cfg:
+            log_format = _require_str(cfg, "logging.format")
+            if log_format not in LOG_FORMATS:
+                raise ConfigError(f"logging.format must be one of: {', '.join(LOG_FORMATS)}")
+        if "columns" in logging_cfg:
+            columns = logging_cfg["columns"]
+            if not isinstance(columns, list) or not columns:
+                raise ConfigError("logging.columns must be a non-empty list")
+            for name in columns:
+                if name not in LOG_COLUMNS:
+                    raise ConfigError(f"logging.columns: unknown column '{name}' (allowed: {', '.join(LOG_COLUMNS)})")
+            if len(set(columns)) != len(columns):
+                raise ConfigError("logging.columns must not repeat a column")
+        if "chunk_rows" in logging_cfg:
+            _require_int_gt(cfg, "logging.chunk_rows", 0)
+        if "flush_interval_s" in logging_cfg:
+            _require_num_gt(cfg, "logging.flush_interval_s", 0.0)
+
+    checkpoint_cfg = cfg.get("checkpoint", None)
+    if checkpoint_cfg is not None:
+        if not isinstance(checkpoint_cfg, dict):
+            raise ConfigError("checkpoint must be a dict")
+        if "interval" in checkpoint_cfg:
+            _require_int_gt(cfg, "checkpoint.interval", 0)
+        if "keep" in checkpoint_cfg:
+            _require_int_gt(cfg, "checkpoint.keep", 0)
+        if "directory" in checkpoint_cfg:
+            _require_str(cfg, "checkpoint.directory")
+
+    # safety watchdog (optional)
+    safety_cfg = cfg.get("safety", None)
+    if safety_cfg is not None:
+        if not isinstance(safety_cfg, dict):
+            raise ConfigError("safety must be a dict")
+        for key in ("check_nan_energy", "fix_com"):
+            if key in safety_cfg:
+                _require_bool(cfg, f"safety.{key}")
+        for key in ("max_temperature_K", "max_force_eV_A", "min_volume_ratio", "max_volume_ratio", "max_timestep_fs"):
+            if safety_cfg.get(key, None) is not None:
+                _require_num_gt(cfg, f"safety.{key}", 0.0)
+        min_ratio = safety_cfg.get("min_volume_ratio", None)
+        max_ratio = safety_cfg.get("max_volume_ratio", None)
+        if min_ratio is not None and min_ratio >= 1.0:
+            raise ConfigError("safety.min_volume_ratio must be < 1")
+        if max_ratio is not None and max_ratio <= 1.0:
+            raise ConfigError("safety.max_volume_ratio must be > 1")
+        if "action" in safety_cfg:
+            action = _require_str(cfg, "safety.action")
+            if action not in ("abort", "rollback"):
+                raise ConfigError("safety.action must be 'abort' or 'rollback'")
+        for key in ("check_interval", "snapshot_interval", "ring_size", "max_rollbacks"):
+            if key in safety_cfg:
+                _require_int_gt(cfg, f"safety.{key}", 0)
+        if "timestep_factor" in safety_cfg:
+            factor = _require_num_gt(cfg, "safety.timestep_factor", 0.0)
+            if factor >= 1.0:
+                raise ConfigError("safety.timestep_factor must be < 1")
+
+    # adaptive timestep (optional)
+    adaptive_cfg = cfg.get("adaptive_timestep", None)
+    if adaptive_cfg is not None:
+        if not isinstance(adaptive_cfg, dict):
+            raise ConfigError("adaptive_timestep must be a dict")
+        if "enabled" in adaptive_cfg:
+            _require_bool(cfg, "adaptive_timestep.enabled")
+        for key in ("min_timestep_fs", "max_timestep_fs", "max_displacement_A"):
+            if adaptive_cfg.get(key, None) is not None:
+                _require_num_gt(cfg, f"adaptive_timestep.{key}", 0.0)
+        if "interval" in adaptive_cfg:
+            _require_int_gt(cfg, "adaptive_timestep.interval", 0)
+        if "growth_factor" in adaptive_cfg:
+            if _require_num_gt(cfg, "adaptive_timestep.growth_factor", 0.0) <= 1.0:
+                raise ConfigError("adaptive_timestep.growth_factor must be > 1")
+        lower = adaptive_cfg.get("min_timestep_fs", None)
+        upper = adaptive_cfg.get("max_timestep_fs", None)
+        if lower is not None and upper is not None and lower > upper:
+            raise ConfigError("adaptive_timestep.min_timestep_fs must be <= max_timestep_fs")
+        if adaptive_cfg.get("enabled", False) and cfg["md"].get("replicas", 1) > 1:
+            raise ConfigError("adaptive_timestep is not supported with md.replicas > 1")
+        # MSD/VACF lags are counted in samples of a fixed number of steps,
+        # which no longer span a fixed time once dt changes
+        analysis_cfg = cfg.get("analysis", None) or {}
+        if adaptive_cfg.get("enabled", False) and isinstance(analysis_cfg, dict):
+            for name in ("msd", "vacf"):
+                if analysis_cfg.get(name) is not None:
+                    raise ConfigError(f"analysis.{name} needs a fixed timestep and cannot be combined with adaptive_timestep")
+
+    # profiling (optional)
+    profiling_cfg = cfg.get("profiling", None)
+    if profiling_cfg is not None:
+        if not isinstance(profiling_cfg, dict):
+            raise ConfigError("profiling must be a dict")
+        if "enabled" in profiling_cfg:
+            _require_bool(cfg, "profiling.enabled")
+        if "report" in profiling_cfg:
+            report = _require_str(cfg, "profiling.report")
+            if not report.endswith((".json", ".csv")):
+                raise ConfigError("profiling.report must end with .json or .csv")
+
+    # on-the-fly analysis (optional)
+    analysis_cfg = cfg.get("analysis", None)
+    if analysis_cfg is not None:
+        if not isinstance(analysis_cfg, dict):
+            raise ConfigError("analysis must be a dict")
+        if "interval" in analysis_cfg:
+            _require_int_gt(cfg, "analysis.interval", 0)
+        if "output" in analysis_cfg:
+            _require_str(cfg, "analysis.output")
+        for name in ("rdf", "msd", "vacf", "density", "cell"):
+            block = analysis_cfg.get(name, None)
+            if block is None:
+                continue
+            if not isinstance(block, dict):
+                raise ConfigError(f"analysis.{name} must be a dict")
+            if "interval" in block:
+                _require_int_gt(cfg, f"analysis.{name}.interval", 0)
+        if analysis_cfg.get("rdf") is not None:
+            rdf = analysis_cfg["rdf"]
+            if "r_max" in rdf:
+                _require_num_gt(cfg, "analysis.rdf.r_max", 0.0)
+            if "bins" in rdf:
+                _require_int_gt(cfg, "analysis.rdf.bins", 0)
+        density = analysis_cfg.get("density")
+        if density is not None and "grid" in density:
+            grid = density["grid"]
+            if not isinstance(grid, list) or len(grid) != 3 or not all(isinstance(n, int) and n > 0 for n in grid):
+                raise ConfigError("analysis.density.grid must be a list of 3 ints > 0")
+        for name in ("msd", "vacf", "density"):
+            block = analysis_cfg.get(name)
+            if block is None:
+                continue
+            if "max_lag" in block:
+                _require_int_gt(cfg, f"analysis.{name}.max_lag", 0)
+            if block.get("elements") is not None:
+                if not isinstance(block["elements"], list) or not all(isinstance(x, str) for x in block["elements"]):
+                    raise ConfigError(f"analysis.{name}.elements must be a list of element symbols")
+            if block.get("indices") is not None:
+                if not isinstance(block["indices"], list) or not all(isinstance(x, int) for x in block["indices"]):
+                    raise ConfigError(f"analysis.{name}.indices must be a list of ints")
+        if analysis_cfg.get("cell") is not None:
+            cell = analysis_cfg["cell"]
+            if "bins" in cell:
+                _require_int_gt(cfg, "analysis.cell.bins", 0)
+            if "width" in cell:
+                width = _require_num_gt(cfg, "analysis.cell.width", 0.0)
+                if width >= 1.0:
+                    raise ConfigError("analysis.cell.width must be < 1")
+
+    # resources (optional)
+    resources_cfg = cfg.get("resources", None)
+    if resources_cfg is not None:
+        if not isinstance(resources_cfg, dict):
+            raise ConfigError("resources must be a dict")
+        for key in ("threads", "interop_threads"):
+            if resources_cfg.get(key, None) is not None:
+                _require_int_gt(cfg, f"resources.{key}", 0)
+        if resources_cfg.get("numa_node", None) is not None:
+            numa_node = _require_int(cfg, "resources.numa_node")
+            if numa_node < 0:
+                raise ConfigError("resources.numa_node must be >= 0")
+        cpus = resources_cfg.get("cpus", None)
+        if cpus is not None:
+            try:
+                cpu_list = parse_cpu_list(cpus)
+            except (TypeError, ValueError):
+                raise ConfigError("resources.cpus must be a cpulist string like '0-7,16' or a list of ints")
+            if not cpu_list or cpu_list[0] < 0:
+                raise ConfigError("resources.cpus must name at least one CPU id >= 0")
+
     # consistency
     if traj_interval > total_steps:
         raise ConfigError("output.traj_interval cannot be greater than md.total_steps")
@@ -185,3 +529,133 @@ def validate_config(cfg: dict) -> dict:
         raise ConfigError("output.log_interval cannot be greater than md.total_steps")
 
     return cfg
+
+
+def validate_stages(cfg: dict) -> None:
+    """
+    Check the shape of a stages list; the resolved per-stage configs are
+    validated separately (validate_config for md stages,
+    validate_minimize_config for minimize stages).
+    """
+    stages = cfg["stages"]
+    if not isinstance(stages, list) or not stages:
+        raise ConfigError("stages must be a non-empty list")
+    _require_str(cfg, "output.workdir")
+
+    names = set()
+    for index, stage in enumerate(stages):
+        if not isinstance(stage, dict):
+            raise ConfigError(f"stages[{index}] must be a dict")
+        name = stage.get("name", None)
+        if not isinstance(name, str) or not name.strip() or "/" in name:
+            raise ConfigError(f"stages[{index}].name must be a non-empty string without '/'")
+        if name in names:
+            raise ConfigError(f"stages: duplicate stage name '{name}'")
+        names.add(name)
+
+        stage_type = stage.get("type", "md")
+        if stage_type not in STAGE_TYPES:
+            raise ConfigError(f"stages[{index}].type must be one of: {', '.join(STAGE_TYPES)}")
+        for key in ("stages", "system", "calculator"):
+            if key in stage:
+                raise ConfigError(f"stages[{index}] cannot set '{key}' (shared by all stages, set it in the base config)")
+
+
+def validate_minimize_config(cfg: dict) -> dict:
+    """
+    Validate a resolved minimize stage: system, calculator, output.workdir
+    and the minimize block.
+    """
+    _validate_system_and_calculator(cfg)
+    _require_str(cfg, "output.workdir")
+
+    minimize_cfg = cfg.get("minimize", None)
+    if minimize_cfg is None:
+        minimize_cfg = {}
+        cfg["minimize"] = minimize_cfg
+    if not isinstance(minimize_cfg, dict):
+        raise ConfigError("minimize must be a dict")
+
+    if "optimizer" in minimize_cfg:
+        optimizer = _require_str(cfg, "minimize.optimizer").lower()
+        if optimizer not in OPTIMIZERS:
+            raise ConfigError(f"minimize.optimizer must be one of: {', '.join(OPTIMIZERS)}")
+        minimize_cfg["optimizer"] = optimizer
+    if "fmax_eV_A" in minimize_cfg:
+        _require_num_gt(cfg, "minimize.fmax_eV_A", 0.0)
+    if "max_steps" in minimize_cfg:
+        _require_int_gt(cfg, "minimize.max_steps", 0)
+    if "cell_filter" in minimize_cfg:
+        cell_filter = _require_str(cfg, "minimize.cell_filter").lower()
+        if cell_filter not in CELL_FILTERS:
+            raise ConfigError(f"minimize.cell_filter must be one of: {', '.join(CELL_FILTERS)}")
+        minimize_cfg["cell_filter"] = cell_filter
+    if "pressure_bar" in minimize_cfg:
+        _require_num(cfg, "minimize.pressure_bar")
+    if "hydrostatic" in minimize_cfg:
+        _require_bool(cfg, "minimize.hydrostatic")
+    if "traj_interval" in minimize_cfg:
+        _require_int_gt(cfg, "minimize.traj_interval", 0)
+
+    return cfg
+
+
+def resolve_stages(cfg: dict) -> list[dict]:
+    """
+    Expanded and validated per-stage configs of a config with stages.
+    """
+    validate_stages(cfg)
+    stage_cfgs = []
+    for stage_cfg in expand_stages(cfg):
+        if stage_cfg["stage"]["type"] == "minimize":
+            stage_cfg = validate_minimize_config(stage_cfg)
+        else:
+            stage_cfg = validate_config(stage_cfg)
+            if stage_cfg["md"].get("replicas", 1) > 1:
+                raise ConfigError(f"stage '{stage_cfg['stage']['name']}': md.replicas is not supported in stages")
+        stage_cfgs.append(stage_cfg)
+    return stage_cfgs
+
+
+def max_timestep_fs(cfg: dict, atoms) -> float | None:
+    """
+    Largest allowed integration step for atoms: safety.max_timestep_fs if
+    set, otherwise a hydrogen limit that system.mass_repartitioning raises.
+    None if nothing limits the step (no hydrogen, no explicit cap).
+    """
+    safety_cfg = cfg.get("safety", None) or {}
+    if safety_cfg.get("max_timestep_fs", None) is not None:
+        return float(safety_cfg["max_timestep_fs"])
+
+    if not (atoms.numbers == 1).any():
+        return None
+
+    hmr_cfg = cfg["system"].get("mass_repartitioning", None) or {}
+    if hmr_cfg.get("enabled", False):
+        return HMR_MAX_TIMESTEP_FS
+    return HYDROGEN_MAX_TIMESTEP_FS
+
+
+def check_timestep(cfg: dict, atoms) -> None:
+    """
+    Reject md.timestep_fs above max_timestep_fs(cfg, atoms). For RESPA the
+    limit applies to the inner step (timestep_fs / respa.inner_steps), which
+    integrates the fast bond vibrations.
+    """
+    limit = max_timestep_fs(cfg, atoms)
+    if limit is None:
+        return
+
+    timestep_fs = float(cfg["md"]["timestep_fs"])
+    step_fs = timestep_fs
+    name = "md.timestep_fs"
+    if cfg["md"]["method"] in ("respa", "respa_langevin"):
+        step_fs = timestep_fs / cfg["respa"]["inner_steps"]
+        name = "RESPA inner step (md.timestep_fs / respa.inner_steps)"
+
+    if step_fs > limit:
+        hint = ""
+        hmr_cfg = cfg["system"].get("mass_repartitioning", None) or {}
+        if not hmr_cfg.get("enabled", False) and (cfg.get("safety", None) or {}).get("max_timestep_fs", None) is None:
+            hint = f"; enable system.mass_repartitioning to allow up to {HMR_MAX_TIMESTEP_FS:g} fs"
+        raise ConfigError(f"{name} = {step_fs:g} fs exceeds the {limit:g} fs limit for this system{hint}")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import numpy as np
+from ase import units
+
+from mof_ase_md.config.validator import ConfigError, max_timestep_fs
+from mof_ase_md.md.dynamics import set_timestep
+
+
+class AdaptiveTimestep:
+    """
+    Dynamics observer that adjusts dt between min_timestep_fs and
+    max_timestep_fs so that no atom moves more than max_displacement_A in one
+    step.
+
+    The displacement over a step is bounded by |v| dt + |F|/(2m) dt^2, so the
+    largest safe dt follows from the current velocities and forces (both
+    already computed by the integrator). dt shrinks at once when needed and
+    grows by at most growth_factor per adjustment; set_timestep keeps the
+    thermostat/barostat coefficients and the simulated time consistent.
+    """
+
+    def __init__(
+        self,
+        dyn,
+        atoms,
+        min_timestep_fs: float,
+        max_timestep_fs: float,
+        max_displacement_A: float = 0.05,
+        growth_factor: float = 1.1,
+        scale: float = 1.0,
+    ):
+        self.dyn = dyn
+        self.atoms = atoms
+        self.min_dt = min_timestep_fs * units.fs
+        self.max_dt = max_timestep_fs * units.fs
+        self.max_displacement = max_displacement_A
+        self.growth_factor = growth_factor
+        # RESPA: dt is the outer step, the displacement is limited per inner step
+        self.scale = scale
+
+        self.n_changes = 0
+        self.min_seen = dyn.dt
+        self.max_seen = dyn.dt
+        self._last_time = dyn.get_time()
+        self._last_steps = dyn.nsteps
+
+    def safe_timestep(self) -> float:
+        """
+        Largest dt (ASE units) for which |v| dt + |a| dt^2 / 2 stays below
+        max_displacement_A for every atom.
+        """
+        masses = self.atoms.get_masses()[:, None]
+        speed = np.linalg.norm(self.atoms.get_momenta() / masses, axis=1)
+        accel = np.linalg.norm(self.atoms.get_forces() / masses, axis=1)
+
+        d = self.max_displacement
+        # root of a/2 dt^2 + v dt - d = 0 in the cancellation-free form
+        dt = 2.0 * d / (speed + np.sqrt(speed**2 + 2.0 * accel * d))
+        return float(dt.min()) * self.scale
+
+    def __call__(self):
+        dt = self.dyn.dt
+        target = min(self.safe_timestep(), self.max_dt, dt * self.growth_factor)
+        target = max(target, self.min_dt)
+
+        if abs(target / dt - 1.0) < 0.01:
+            return
+
+        set_timestep(self.dyn, target)
+        self.n_changes += 1
+        self.min_seen = min(self.min_seen, target)
+        self.max_seen = max(self.max_seen, target)
+
+    def summary(self) -> dict:
+        steps = self.dyn.nsteps - self._last_steps
+        elapsed = self.dyn.get_time() - self._last_time
+        return {
+            "adaptive_timestep_changes": self.n_changes,
+            "adaptive_min_timestep_fs": self.min_seen / units.fs,
+            "adaptive_max_timestep_fs": self.max_seen / units.fs,
+            "adaptive_mean_timestep_fs": elapsed / steps / units.fs if steps else None,
+            "simulated_time_ps": elapsed / (1000 * units.fs),
+        }
+
+
+def attach_adaptive_timestep(dyn, atoms, cfg: dict):
+    """
+    Attach an AdaptiveTimestep built from cfg["adaptive_timestep"], or return
+    None if it is not enabled. The upper bound never exceeds the timestep
+    limit of the system (max_timestep_fs: hydrogen / mass repartitioning /
+    safety.max_timestep_fs); a lower bound above it is a ConfigError.
+    """
+    adaptive_cfg = cfg.get("adaptive_timestep", None) or {}
+    if not adaptive_cfg.get("enabled", False):
+        return None
+
+    timestep_fs = cfg["md"]["timestep_fs"]
+    upper_fs = adaptive_cfg.get("max_timestep_fs", 2.0 * timestep_fs)
+    lower_fs = adaptive_cfg.get("min_timestep_fs", 0.25 * timestep_fs)
+
+    scale = 1.0
+    if cfg["md"]["method"] in ("respa", "respa_langevin"):
+        scale = float(cfg["respa"]["inner_steps"])
+
+    limit = max_timestep_fs(cfg, atoms)
+    if limit is not None and lower_fs > limit * scale:
+        raise ConfigError(
+            f"adaptive_timestep.min_timestep_fs {lower_fs:g} fs is above the {limit * scale:g} fs "
+            "timestep limit for this system"
+        )
+    if limit is not None and upper_fs > limit * scale:
+        print(f"Adaptive timestep: upper bound {upper_fs:g} fs capped at the {limit * scale:g} fs limit for this system")
+        upper_fs = limit * scale
+
+    controller = AdaptiveTimestep(
+        dyn,
+        atoms,
+        min_timestep_fs=lower_fs,
+        max_timestep_fs=upper_fs,
+        max_displacement_A=adaptive_cfg.get("max_displacement_A", 0.05),
+        growth_factor=adaptive_cfg.get("growth_factor", 1.1),
+        scale=scale,
+    )
+    dyn.attach(controller, interval=adaptive_cfg.get("interval", 10))
+    return controller
@@ -0,0 +1,616 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+from ase.data import chemical_symbols
+
+
+DEFAULT_INTERVAL = 10
+DEFAULT_OUTPUT_DIR = "analysis"
+
+
+def max_minimum_image_radius(cell: np.ndarray, pbc) -> float:
+    """
+    Largest r for which the minimum image is unique: half the smallest
+    perpendicular width of the cell (inf without periodicity).
+    """
+    if not np.any(pbc):
+        return np.inf
+
+    volume = abs(np.linalg.det(cell))
+    widths = []
+    for axis in range(3):
+        if pbc[axis]:
+            a, b = cell[(axis + 1) % 3], cell[(axis + 2) % 3]
+            widths.append(volume / np.linalg.norm(np.cross(a, b)))
+    return 0.5 * min(widths)
+
+
+def minimum_image_pairs(positions: np.ndarray, cell: np.ndarray, pbc, r_max: float, block: int = 512):
+    """
+    Yield (i, j, d) arrays for all pairs i < j closer than r_max, with
+    minimum-image distances, in row blocks of `block` atoms so memory stays
+    O(block * N). r_max must not exceed max_minimum_image_radius().
+    """
+    pbc = np.asarray(pbc, dtype=bool)
+    n = len(positions)
+
+    if np.any(pbc):
+        coords = positions @ np.linalg.inv(cell)
+    else:
+        coords = positions
+
+    for start in range(0, n - 1, block):
+        stop = min(start + block, n - 1)
+        rows = np.arange(start, stop)
+
+        delta = coords[None, :, :] - coords[rows, None, :]
+        if np.any(pbc):
+            delta[..., pbc] -= np.round(delta[..., pbc])
+            delta = delta @ cell
+        distances = np.sqrt(np.einsum("ijk,ijk->ij", delta, delta))
+
+        upper = np.arange(n)[None, :] > rows[:, None]
+        mask = upper & (distances < r_max)
+        i, j = np.nonzero(mask)
+        yield rows[i], j, distances[i, j]
+
+
+def unwrap_step(unwrapped: np.ndarray, last_frac: np.ndarray, positions: np.ndarray, cell: np.ndarray, pbc):
+    """
+    Advance unwrapped coordinates by the minimum-image displacement since the
+    last sample (atoms must move less than half a cell between samples).
+    Returns (unwrapped, frac) for the next call.
+    """
+    pbc = np.asarray(pbc, dtype=bool)
+    if not np.any(pbc):
+        return positions.copy(), positions.copy()
+
+    frac = positions @ np.linalg.inv(cell)
+    step = frac - last_frac
+    step[:, pbc] -= np.round(step[:, pbc])
+    return unwrapped + step @ cell, frac
+
+
+def _element_groups(numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    elements = np.unique(numbers)
+    return elements, np.searchsorted(elements, numbers)
+
+
+class _Accumulator:
+    needs_velocities = False
+
+    def observe(self, atoms) -> None:
+        """
+        Dynamics observer: sample the live Atoms.
+        """
+        velocities = atoms.get_velocities() if self.needs_velocities else None
+        self.sample(atoms.positions, atoms.cell.array, atoms.pbc, velocities)
+
+
+class RDFAccumulator(_Accumulator):
+    """
+    Partial radial distribution functions g_ab(r) for every element pair.
+
+    Each sample histograms minimum-image pair distances (i < j) per pair type
+    and adds that type's pair count / V to the normalisation, so NPT volume
+    changes are averaged correctly.
+    """
+
+    def __init__(self, numbers, r_max: float = 8.0, n_bins: int = 200):
+        self.numbers = np.asarray(numbers)
+        self.r_max = float(r_max)
+        self.n_bins = int(n_bins)
+
+        self.elements, self.types = _element_groups(self.numbers)
+        n_types = len(self.elements)
+        counts = np.bincount(self.types, minlength=n_types)
+
+        self.pair_names = []
+        self.pair_index = np.zeros((n_types, n_types), dtype=int)
+        pair_counts = []
+        for a in range(n_types):
+            for b in range(a, n_types):
+                self.pair_index[a, b] = self.pair_index[b, a] = len(self.pair_names)
+                self.pair_names.append(f"{chemical_symbols[self.elements[a]]}-{chemical_symbols[self.elements[b]]}")
+                pair_counts.append(counts[a] * (counts[a] - 1) / 2 if a == b else counts[a] * counts[b])
+        self.pair_counts = np.array(pair_counts, dtype=float)
+
+        self.histogram = np.zeros((len(self.pair_names), self.n_bins))
+        self.norm = np.zeros(len(self.pair_names))
+        self.n_samples = 0
+
+    def sample(self, positions, cell, pbc, velocities=None) -> None:
+        limit = max_minimum_image_radius(cell, pbc)
+        if self.r_max > limit:
+            raise ValueError(f"analysis.rdf.r_max {self.r_max} A exceeds half the cell width ({limit:.2f} A)")
+
+        n_pairs = len(self.pair_names)
+        scale = self.n_bins / self.r_max
+        for i, j, d in minimum_image_pairs(positions, cell, pbc, self.r_max):
+            pair = self.pair_index[self.types[i], self.types[j]]
+            bins = np.minimum((d * scale).astype(int), self.n_bins - 1)
+            self.histogram += np.bincount(pair * self.n_bins + bins, minlength=n_pairs * self.n_bins).reshape(n_pairs, self.n_bins)
+
+        volume = abs(np.linalg.det(cell)) if np.any(pbc) else 1.0
+        self.norm += self.pair_counts / volume
+        self.n_samples += 1
+
+    def result(self) -> dict:
+        edges = np.linspace(0.0, self.r_max, self.n_bins + 1)
+        shell = 4.0 / 3.0 * np.pi * (edges[1:] ** 3 - edges[:-1] ** 3)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g = self.histogram / (self.norm[:, None] * shell[None, :])
+        g = np.nan_to_num(g)
+
+        columns = {"r_A": 0.5 * (edges[1:] + edges[:-1])}
+        for name, values in zip(self.pair_names, g):
+            columns[f"g_{name}"] = values
+        return columns
+
+    def merge(self, other: "RDFAccumulator") -> None:
+        self.histogram += other.histogram
+        self.norm += other.norm
+        self.n_samples += other.n_samples
+
+    def state_dict(self) -> dict:
+        return {"histogram": self.histogram.copy(), "norm": self.norm.copy(), "n_samples": self.n_samples}
+
+    def load_state_dict(self, state: dict) -> None:
+        self.histogram = np.array(state["histogram"])
+        self.norm = np.array(state["norm"])
+        self.n_samples = int(state["n_samples"])
+
+
+class _LagCorrelator(_Accumulator, ABC):
+    """
+    Multiple-time-origin correlation over the last max_lag samples.
+
+    Keeps a ring buffer of the last max_lag + 1 per-atom vectors; every sample
+    is correlated with all of them at once and the per-element sums are
+    accumulated per lag. With recording off, samples only fill the buffer
+    (warm-up frames before a chunk of an out-of-core pass).
+    """
+
+    def __init__(self, numbers, max_lag: int, indices=None):
+        numbers = np.asarray(numbers)
+        self.indices = np.arange(len(numbers)) if indices is None else np.asarray(indices)
+        self.elements, self.types = _element_groups(numbers[self.indices])
+        self.counts = np.bincount(self.types, minlength=len(self.elements)).astype(float)
+        self.onehot = np.eye(len(self.elements))[self.types]
+        self.max_lag = int(max_lag)
+
+        self.recording = True
+        self.history = None
+        self.n_pushed = 0
+        self.n_stored = 0
+        self.sums = np.zeros((self.max_lag + 1, len(self.elements)))
+        self.origins = np.zeros(self.max_lag + 1)
+        self.n_samples = 0
+
+    @abstractmethod
+    def _pair_values(self, current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """
+        Per-atom values of (current, previous) for each stored lag:
+        (1, n, 3) and (n_lags, n, 3) vectors -> (n_lags, n).
+        """
+
+    def _correlate(self, vectors: np.ndarray) -> None:
+        size = self.max_lag + 1
+        if self.history is None:
+            self.history = np.zeros((size, len(self.indices), 3))
+
+        self.history[self.n_pushed % size] = vectors
+        self.n_stored = min(self.n_stored + 1, size)
+
+        if self.recording:
+            lags = np.arange(self.n_stored)
+            previous = self.history[(self.n_pushed - lags) % size]
+            values = self._pair_values(vectors[None, :, :], previous)
+
+            self.sums[lags] += values @ self.onehot
+            self.origins[lags] += 1
+            self.n_samples += 1
+
+        self.n_pushed += 1
+
+    def merge(self, other: "_LagCorrelator") -> None:
+        self.sums += other.sums
+        self.origins += other.origins
+        self.n_samples += other.n_samples
+
+    def _means(self) -> np.ndarray:
+        valid = self.origins > 0
+        means = np.zeros_like(self.sums)
+        means[valid] = self.sums[valid] / (self.origins[valid, None] * self.counts[None, :])
+        return means[valid]
+
+    def state_dict(self) -> dict:
+        return {
+            "history": None if self.history is None else self.history.copy(),
+            "n_pushed": self.n_pushed,
+            "n_stored": self.n_stored,
+            "sums": self.sums.copy(),
+            "origins": self.origins.copy(),
+            "n_samples": self.n_samples,
+        }
+
+    def load_state_dict(self, state: dict) -> None:
+        self.history = None if state["history"] is None else np.array(state["history"])
+        self.n_pushed = int(state["n_pushed"])
+        self.n_stored = int(state["n_stored"])
+        self.sums = np.array(state["sums"])
+        self.origins = np.array(state["origins"])
+        self.n_samples = int(state["n_samples"])
+
+
+class MSDAccumulator(_LagCorrelator):
+    """
+    Mean squared displacement per element from unwrapped coordinates, for
+    lags up to max_lag samples (e.g. guest molecules selected by element).
+    """
+
+    def __init__(self, numbers, max_lag: int = 200, indices=None, sample_dt_fs: float = 1.0):
+        super().__init__(numbers, max_lag, indices)
+        self.sample_dt_fs = float(sample_dt_fs)
+        self.unwrapped = None
+        self.last_frac = None
+
+    def _pair_values(self, current, previous):
+        delta = current - previous
+        return np.einsum("lik,lik->li", delta, delta)
+
+    def sample(self, positions, cell, pbc, velocities=None) -> None:
+        positions = positions[self.indices]
+        if self.unwrapped is None:
+            self.unwrapped = positions.copy()
+            self.last_frac = positions @ np.linalg.inv(cell) if np.any(pbc) else positions.copy()
+        else:
+            self.unwrapped, self.last_frac = unwrap_step(self.unwrapped, self.last_frac, positions, cell, pbc)
+        self._correlate(self.unwrapped)
+
+    def result(self) -> dict:
+        means = self._means()
+        columns = {"lag_ps": np.arange(len(means)) * self.sample_dt_fs / 1000.0}
+        for t, element in enumerate(self.elements):
+            columns[f"msd_{chemical_symbols[element]}_A2"] = means[:, t]
+        return columns
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state["unwrapped"] = None if self.unwrapped is None else self.unwrapped.copy()
+        state["last_frac"] = None if self.last_frac is None else self.last_frac.copy()
+        return state
+
+    def load_state_dict(self, state: dict) -> None:
+        super().load_state_dict(state)
+        self.unwrapped = None if state["unwrapped"] is None else np.array(state["unwrapped"])
+        self.last_frac = None if state["last_frac"] is None else np.array(state["last_frac"])
+
+
+class VACFAccumulator(_LagCorrelator):
+    """
+    Velocity autocorrelation <v(0).v(t)> per element, normalised to 1 at t=0.
+    """
+
+    needs_velocities = True
+
+    def __init__(self, numbers, max_lag: int = 200, indices=None, sample_dt_fs: float = 1.0):
+        super().__init__(numbers, max_lag, indices)
+        self.sample_dt_fs = float(sample_dt_fs)
+
+    def _pair_values(self, current, previous):
+        return np.einsum("lik,lik->li", np.broadcast_to(current, previous.shape), previous)
+
+    def sample(self, positions, cell, pbc, velocities=None) -> None:
+        if velocities is None:
+            raise ValueError("VACF needs velocities")
+        self._correlate(velocities[self.indices])
+
+    def result(self) -> dict:
+        means = self._means()
+        columns = {"lag_ps": np.arange(len(means)) * self.sample_dt_fs / 1000.0}
+        for t, element in enumerate(self.elements):
+            c0 = means[0, t] if len(means) else 0.0
+            columns[f"vacf_{chemical_symbols[element]}"] = means[:, t] / c0 if c0 > 0 else means[:, t]
+        return columns
+
+
+class CellAccumulator(_Accumulator):
+    """
+    Histograms and running mean / std of volume and lattice parameters
+    (a, b, c, alpha, beta, gamma). Bin ranges are centred on the first
+    sample, +/- width (relative); values outside land in the edge bins.
+    """
+
+    NAMES = ("volume_A3", "a_A", "b_A", "c_A", "alpha_deg", "beta_deg", "gamma_deg")
+
+    def __init__(self, n_bins: int = 100, width: float = 0.1):
+        self.n_bins = int(n_bins)
+        self.width = float(width)
+        self.low = None
+        self.high = None
+        self.counts = np.zeros((len(self.NAMES), self.n_bins))
+        self.n_samples = 0
+        self.mean = np.zeros(len(self.NAMES))
+        self.m2 = np.zeros(len(self.NAMES))
+
+    @staticmethod
+    def values(cell: np.ndarray) -> np.ndarray:
+        from ase.geometry import cell_to_cellpar
+
+        return np.concatenate([[abs(np.linalg.det(cell))], cell_to_cellpar(cell)])
+
+    def init_range(self, cell: np.ndarray) -> None:
+        values = self.values(cell)
+        self.low = values * (1.0 - self.width)
+        self.high = values * (1.0 + self.width)
+
+    def sample(self, positions, cell, pbc, velocities=None) -> None:
+        values = self.values(cell)
+        if self.low is None:
+            self.init_range(cell)
+
+        bins = ((values - self.low) / (self.high - self.low) * self.n_bins).astype(int)
+        bins = np.clip(bins, 0, self.n_bins - 1)
+        self.counts[np.arange(len(self.NAMES)), bins] += 1
+
+        # Welford running mean / variance
+        self.n_samples += 1
+        delta = values - self.mean
+        self.mean += delta / self.n_samples
+        self.m2 += delta * (values - self.mean)
+
+    def result(self) -> dict:
+        columns = {}
+        if self.low is None:
+            return columns
+        for k, name in enumerate(self.NAMES):
+            edges = np.linspace(self.low[k], self.high[k], self.n_bins + 1)
+            columns[name] = 0.5 * (edges[1:] + edges[:-1])
+            columns[f"p_{name}"] = self.counts[k] / max(self.n_samples, 1)
+        return columns
+
+    def merge(self, other: "CellAccumulator") -> None:
+        """
+        Combine with an accumulator over other frames (same bin ranges).
+        """
+        if other.n_samples == 0:
+            return
+        if self.low is None:
+            self.low, self.high = other.low, other.high
+
+        n = self.n_samples + other.n_samples
+        delta = other.mean - self.mean
+        self.m2 = self.m2 + other.m2 + delta**2 * self.n_samples * other.n_samples / n
+        self.mean = self.mean + delta * other.n_samples / n
+        self.counts += other.counts
+        self.n_samples = n
+
+    def statistics(self) -> dict:
+        std = np.sqrt(self.m2 / self.n_samples) if self.n_samples > 1 else np.zeros_like(self.mean)
+        stats = {}
+        for name, mean, sd in zip(self.NAMES, self.mean, std):
+            stats[f"{name}_mean"] = float(mean)
+            stats[f"{name}_std"] = float(sd)
+        return stats
+
+    def state_dict(self) -> dict:
+        return {
+            "low": None if self.low is None else self.low.copy(),
+            "high": None if self.high is None else self.high.copy(),
+            "counts": self.counts.copy(),
+            "n_samples": self.n_samples,
+            "mean": self.mean.copy(),
+            "m2": self.m2.copy(),
+        }
+
+    def load_state_dict(self, state: dict) -> None:
+        self.low = None if state["low"] is None else np.array(state["low"])
+        self.high = None if state["high"] is None else np.array(state["high"])
+        self.counts = np.array(state["counts"])
+        self.n_samples = int(state["n_samples"])
+        self.mean = np.array(state["mean"])
+        self.m2 = np.array(state["m2"])
+
+
+class DensityAccumulator(_Accumulator):
+    """
+    Time-averaged number density per element on a grid of fractional
+    coordinates (nx, ny, nz), e.g. guest occupation maps of the pores.
+    """
+
+    def __init__(self, numbers, grid=(40, 40, 40), indices=None):
+        numbers = np.asarray(numbers)
+        self.indices = np.arange(len(numbers)) if indices is None else np.asarray(indices)
+        self.elements, self.types = _element_groups(numbers[self.indices])
+        self.grid = tuple(int(n) for n in grid)
+        self.counts = np.zeros((len(self.elements), *self.grid))
+        self.volume_sum = 0.0
+        self.n_samples = 0
+
+    def sample(self, positions, cell, pbc, velocities=None) -> None:
+        frac = positions[self.indices] @ np.linalg.inv(cell)
+        frac -= np.floor(frac)
+        grid = np.array(self.grid)
+        cells = np.minimum((frac * grid).astype(int), grid - 1)
+        flat = np.ravel_multi_index((self.types, cells[:, 0], cells[:, 1], cells[:, 2]), self.counts.shape)
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.volume_sum += abs(np.linalg.det(cell))
+        self.n_samples += 1
+
+    def merge(self, other: "DensityAccumulator") -> None:
+        self.counts += other.counts
+        self.volume_sum += other.volume_sum
+        self.n_samples += other.n_samples
+
+    def result(self) -> dict:
+        """
+        element symbol -> (nx, ny, nz) number density in atoms / A^3.
+        """
+        voxel = self.volume_sum / max(self.n_samples, 1) / np.prod(self.grid)
+        return {
+            chemical_symbols[element]: self.counts[t] / (max(self.n_samples, 1) * voxel)
+            for t, element in enumerate(self.elements)
+        }
+
+    def state_dict(self) -> dict:
+        return {"counts": self.counts.copy(), "volume_sum": self.volume_sum, "n_samples": self.n_samples}
+
+    def load_state_dict(self, state: dict) -> None:
+        self.counts = np.array(state["counts"])
+        self.volume_sum = float(state["volume_sum"])
+        self.n_samples = int(state["n_samples"])
+
+
+def write_columns(path, columns: dict) -> None:
+    """
+    Equal-length 1D columns -> CSV with a header row.
+    """
+    names = list(columns)
+    data = np.column_stack([columns[name] for name in names])
+    np.savetxt(path, data, delimiter=",", header=",".join(names), comments="", fmt="%.8g")
+
+
+def select_indices(numbers, block: dict):
+    """
+    Atom indices for an analysis block: `indices` or `elements` (symbols),
+    all atoms if neither is given.
+    """
+    if block.get("indices") is not None:
+        return np.asarray(block["indices"], dtype=int)
+    if block.get("elements") is not None:
+        wanted = [chemical_symbols.index(symbol) for symbol in block["elements"]]
+        indices = np.nonzero(np.isin(numbers, wanted))[0]
+        if len(indices) == 0:
+            raise ValueError(f"No atoms of elements {block['elements']} for analysis")
+        return indices
+    return None
+
+
+def build_accumulators(numbers, analysis_cfg: dict, timestep_fs: float) -> dict:
+    """
+    name -> (accumulator, interval in steps) for the blocks present in
+    analysis_cfg (rdf, msd, vacf, density, cell).
+    """
+    default_interval = int(analysis_cfg.get("interval", DEFAULT_INTERVAL))
+    accumulators = {}
+
+    rdf = analysis_cfg.get("rdf")
+    if rdf is not None:
+        accumulators["rdf"] = (
+            RDFAccumulator(numbers, r_max=rdf.get("r_max", 8.0), n_bins=rdf.get("bins", 200)),
+            int(rdf.get("interval", default_interval)),
+        )
+
+    for name, cls in (("msd", MSDAccumulator), ("vacf", VACFAccumulator)):
+        block = analysis_cfg.get(name)
+        if block is None:
+            continue
+        interval = int(block.get("interval", default_interval))
+        accumulators[name] = (
+            cls(
+                numbers,
+                max_lag=block.get("max_lag", 200),
+                indices=select_indices(numbers, block),
+                sample_dt_fs=interval * timestep_fs,
+            ),
+            interval,
+        )
+
+    density = analysis_cfg.get("density")
+    if density is not None:
+        accumulators["density"] = (
+            DensityAccumulator(numbers, grid=density.get("grid", (40, 40, 40)), indices=select_indices(numbers, density)),
+            int(density.get("interval", default_interval)),
+        )
+
+    cell = analysis_cfg.get("cell")
+    if cell is not None:
+        accumulators["cell"] = (
+            CellAccumulator(n_bins=cell.get("bins", 100), width=cell.get("width", 0.1)),
+            int(cell.get("interval", default_interval)),
+        )
+
+    return accumulators
+
+
+def write_results(directory, accumulators: dict) -> list[Path]:
+    """
+    One CSV per quantity (rdf.csv, msd.csv, vacf.csv, cell_histograms.csv +
+    cell_statistics.csv) and density_<element>.npy grids.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    written = []
+    for name, accumulator in accumulators.items():
+        if accumulator.n_samples == 0:
+            continue
+
+        if name == "density":
+            for symbol, grid in accumulator.result().items():
+                path = directory / f"density_{symbol}.npy"
+                np.save(path, grid)
+                written.append(path)
+            continue
+
+        filename = "cell_histograms.csv" if name == "cell" else f"{name}.csv"
+        write_columns(directory / filename, accumulator.result())
+        written.append(directory / filename)
+
+        if name == "cell":
+            stats = accumulator.statistics()
+            write_columns(directory / "cell_statistics.csv", {key: [value] for key, value in stats.items()})
+            written.append(directory / "cell_statistics.csv")
+
+    return written
+
+
+class StreamingAnalysis:
+    """
+    On-the-fly structural analysis as dynamics observers.
+
+    Every accumulator samples the live Atoms at its own interval, so
+    statistics converge without writing dense trajectories. state_dict()
+    plugs into the Checkpointer's extras; write() stores the results
+    (see write_results).
+    """
+
+    def __init__(self, atoms, accumulators: dict):
+        self.atoms = atoms
+        self.accumulators = accumulators
+
+    def attach(self, dyn) -> None:
+        for accumulator, interval in self.accumulators.values():
+            dyn.attach(accumulator.observe, interval=interval, atoms=self.atoms)
+
+    def state_dict(self) -> dict:
+        return {name: accumulator.state_dict() for name, (accumulator, _) in self.accumulators.items()}
+
+    def load_state_dict(self, state: dict) -> None:
+        for name, accumulator_state in state.items():
+            if name in self.accumulators:
+                self.accumulators[name][0].load_state_dict(accumulator_state)
+
+    def write(self, directory) -> list[Path]:
+        return write_results(directory, {name: accumulator for name, (accumulator, _) in self.accumulators.items()})
+
+
+def attach_analysis(dyn, atoms, cfg: dict):
+    """
+    Attach a StreamingAnalysis for cfg["analysis"]; None if the block is absent.
+    """
+    analysis_cfg = cfg.get("analysis", None)
+    if not analysis_cfg:
+        return None
+
+    accumulators = build_accumulators(atoms.numbers, analysis_cfg, float(cfg["md"]["timestep_fs"]))
+    if not accumulators:
+        return None
+
+    analysis = StreamingAnalysis(atoms, accumulators)
+    analysis.attach(dyn)
+    return analysis
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+
+from ase.calculators.calculator import all_properties
+from ase.calculators.singlepoint import SinglePointCalculator
+
+
+_STOP = object()
+
+
+class SnapshotClock:
+    """
+    Stand-in for the dynamics object seen by MDLogger: reports the time of the
+    snapshot being logged instead of the live integrator time.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def get_time(self):
+        return self.time
+
+
+def take_snapshot(atoms, stress: bool = False):
+    """
+    Copy of atoms (positions, momenta, cell, ...) with its current energy,
+    forces and stress frozen in a SinglePointCalculator.
+
+    Properties are requested here, in the integrator thread, exactly as the
+    synchronous writers would request them, so they are normally served
+    from the calculator cache.
+    """
+    atoms.get_potential_energy()
+    if stress:
+        atoms.get_stress()
+
+    snapshot = atoms.copy()
+
+    results = {}
+    for name, value in atoms.calc.results.items():
+        if name in all_properties:
+            results[name] = value.copy() if hasattr(value, "copy") else value
+
+    calc = SinglePointCalculator(snapshot, **results)
+    # same calculator metadata as a frame written from the live calculator
+    calc.name = atoms.calc.name
+    if hasattr(atoms.calc, "todict"):
+        calc.parameters.update(atoms.calc.todict())
+
+    # graph builds so far, for the log of a skin-graph calculator
+    if hasattr(atoms.calc, "graph_stats"):
+        calc.graph_builds = atoms.calc.graph_stats()["graph_builds"]
+
+    snapshot.calc = calc
+    return snapshot
+
+
+class AsyncOutputWriter:
+    """
+    Background thread that writes trajectory frames and log lines from
+    snapshots, so serialization and flushes do not stall the integrator.
+
+    Items are written in submission order through the same Trajectory and
+    MDLogger objects the synchronous path uses, so file contents match.
+
+    backpressure:
+      "block" - the integrator waits when the queue is full (default)
+      "drop"  - snapshots are discarded when the queue is full
+    """
+
+    def __init__(
+        self,
+        dyn,
+        atoms,
+        trajectory=None,
+        logger=None,
+        clock=None,
+        queue_size: int = 64,
+        backpressure: str = "block",
+        log_stress: bool = False,
+    ):
+        if backpressure not in ("block", "drop"):
+            raise ValueError(f"Unknown output.async_writes.backpressure: {backpressure}")
+
+        self.dyn = dyn
+        self.atoms = atoms
+        self.trajectory = trajectory
+        self.logger = logger
+        self.clock = clock
+        self.backpressure = backpressure
+        self.log_stress = log_stress
+
+        self.n_dropped = 0
+        self._error = None
+        self._closed = False
+        self._last_step = None
+        self._last_snapshot = None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._worker, name="mof-ase-md-writer", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    # ---- integrator side ----
+
+    def _snapshot(self, stress: bool = False):
+        # trajectory + log on the same step share one snapshot, unless the log
+        # line needs a stress the trajectory frame was taken without
+        step = self.dyn.nsteps
+        reuse = step == self._last_step
+        if reuse and stress:
+            reuse = "stress" in self._last_snapshot[1].calc.results
+
+        if not reuse:
+            self._last_snapshot = (self.dyn.get_time(), take_snapshot(self.atoms, stress))
+            self._last_step = step
+        return self._last_snapshot
+
+    def _put(self, item) -> bool:
+        """
+        Queue an item; False if it was dropped (backpressure "drop").
+        """
+        if self._error is not None:
+            raise RuntimeError("Output writer thread failed") from self._error
+
+        if self.backpressure == "block":
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.n_dropped += 1
+            return False
+        return True
+
+    def submit_trajectory(self) -> bool:
+        time, snapshot = self._snapshot()
+        return self._put(("traj", time, snapshot))
+
+    def submit_log(self) -> bool:
+        time, snapshot = self._snapshot(self.log_stress)
+        return self._put(("log", time, snapshot))
+
+    def drain(self) -> None:
+        """
+        Wait until every queued item has been written.
+        """
+        # a rewound run repeats step numbers; never reuse an older snapshot
+        self._last_step = None
+        self._last_snapshot = None
+        if self._closed:
+            return
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("Output writer thread failed") from self._error
+
+    # ---- writer thread ----
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is not None:
+                    continue
+
+                kind, time, snapshot = item
+                if kind == "traj":
+                    self.trajectory.write(snapshot)
+                else:
+                    self.clock.time = time
+                    self.logger.atoms = snapshot
+                    self.logger()
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def close(self, flush: bool = True) -> None:
+        """
+        Stop the writer thread. With flush=True all queued items are written
+        first; with flush=False queued items are discarded.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if not flush:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                except queue.Empty:
+                    break
+
+        self._queue.put(_STOP)
+        self._thread.join()
+
+        if self.trajectory is not None:
+            self.trajectory.close()
+        if self.logger is not None:
+            self.logger.close()
+
+        atexit.unregister(self.close)
+
+        if self.n_dropped > 0:
+            print(f"Output writer: dropped {self.n_dropped} snapshots (backpressure=drop)")
+
+        if self._error is not None:
+            raise RuntimeError("Output writer thread failed") from self._error
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import os
+import pickle
+import types
+from pathlib import Path
+
+import numpy as np
+from ase import Atoms
+
+
+FORMAT_NAME = "mof_ase_md.checkpoint"
+FORMAT_VERSION = 1
+
+# Attributes of dynamics objects that are wiring, not integrator state.
+_SKIP_ATTRS = {"atoms", "observers", "logfile", "trajectory", "comm", "optimizable"}
+
+_UNSUPPORTED = object()
+
+
+def _capture_value(value):
+    if value is None or isinstance(value, (bool, int, float, str, np.number)):
+        return value
+
+    if isinstance(value, np.ndarray):
+        return value.copy()
+
+    if isinstance(value, (list, tuple)):
+        items = [_capture_value(v) for v in value]
+        if any(item is _UNSUPPORTED for item in items):
+            return _UNSUPPORTED
+        return type(value)(items)
+
+    if isinstance(value, np.random.Generator):
+        return ("rng:generator", value.bit_generator.state)
+
+    if isinstance(value, np.random.RandomState):
+        return ("rng:randomstate", value.get_state())
+
+    if value is np.random:
+        return ("rng:numpy_global", np.random.get_state())
+
+    if isinstance(value, types.ModuleType):
+        return _UNSUPPORTED
+
+    # thermostat / barostat helper objects (NoseHooverChainThermostat, MTK barostats, ...)
+    if type(value).__module__.startswith("ase.md") and hasattr(value, "__dict__"):
+        return ("object", capture_state(value))
+
+    return _UNSUPPORTED
+
+
+def capture_state(obj) -> dict:
+    """
+    Snapshot of the internal state of a dynamics object: numeric attributes,
+    arrays, chain variables of nested ase.md helper objects and RNG states.
+    """
+    state = {}
+    for name, value in vars(obj).items():
+        if name in _SKIP_ATTRS:
+            continue
+        captured = _capture_value(value)
+        if captured is not _UNSUPPORTED:
+            state[name] = captured
+    return state
+
+
+def restore_state(obj, state: dict) -> None:
+    """
+    Inverse of capture_state for the same kind of object.
+    """
+    for name, value in state.items():
+        if isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], str):
+            kind, payload = value
+
+            if kind == "object":
+                restore_state(getattr(obj, name), payload)
+                continue
+            if kind == "rng:generator":
+                getattr(obj, name).bit_generator.state = payload
+                continue
+            if kind == "rng:randomstate":
+                getattr(obj, name).set_state(payload)
+                continue
+            if kind == "rng:numpy_global":
+                np.random.set_state(payload)
+                continue
+
+        if isinstance(value, np.ndarray):
+            value = value.copy()
+        setattr(obj, name, value)
+
+
+def make_checkpoint(dyn, atoms, cfg: dict, extra: dict | None = None) -> dict:
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "step": dyn.nsteps,
+        "numbers": atoms.numbers.copy(),
+        "positions": atoms.get_positions(),
+        "momenta": atoms.get_momenta(),
+        "cell": atoms.cell.array.copy(),
+        "pbc": atoms.pbc.copy(),
+        "masses": atoms.get_masses(),
+        "info": dict(atoms.info),
+        "dynamics_class": type(dyn).__name__,
+        "dynamics_state": capture_state(dyn),
+        "extra": {} if extra is None else extra,
+        "cfg": cfg,
+    }
+
+
+def write_checkpoint(path, payload: dict) -> None:
+    """
+    Atomic write: the checkpoint either exists complete or not at all.
+    """
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    with tmp.open("wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path) -> dict:
+    with Path(path).open("rb") as f:
+        payload = pickle.load(f)
+
+    if not isinstance(payload, dict) or payload.get("format") != FORMAT_NAME:
+        raise ValueError(f"Not a mof_ase_md checkpoint: {path}")
+
+    return payload
+
+
+def list_checkpoints(directory) -> list[Path]:
+    return sorted(Path(directory).glob("checkpoint_*.pkl"))
+
+
+def find_checkpoint(path) -> Path:
+    """
+    Resolve a checkpoint file, a checkpoint directory or a run workdir to the
+    latest checkpoint file.
+    """
+    path = Path(path)
+    if path.is_file():
+        return path
+
+    for directory in (path, path / "checkpoints"):
+        found = list_checkpoints(directory)
+        if found:
+            return found[-1]
+
+    raise FileNotFoundError(f"No checkpoint found in: {path}")
+
+
+def atoms_from_checkpoint(payload: dict) -> Atoms:
+    atoms = Atoms(
+        numbers=payload["numbers"],
+        positions=payload["positions"],
+        cell=payload["cell"],
+        pbc=payload["pbc"],
+        masses=payload["masses"],
+    )
+    atoms.info.update(payload["info"])
+    atoms.set_momenta(payload["momenta"])
+    return atoms
+
+
+def restore_dynamics(dyn, payload: dict) -> None:
+    if type(dyn).__name__ != payload["dynamics_class"]:
+        raise ValueError(
+            f"Checkpoint was written by {payload['dynamics_class']}, "
+            f"cannot restore into {type(dyn).__name__}"
+        )
+    restore_state(dyn, payload["dynamics_state"])
+
+    # the timestep changed during the run (adaptive timestep, rollbacks)
+    if "time_offset" in payload["dynamics_state"]:
+        from mof_ase_md.md.dynamics import install_clock
+
+        install_clock(dyn)
+
+
+class Checkpointer:
+    """
+    Dynamics observer that writes rotating checkpoints.
+
+    `extras` maps a name to an object with state_dict(); those states are
+    stored alongside the dynamics state (e.g. analysis accumulators).
+    """
+
+    def __init__(self, dyn, atoms, cfg: dict, directory, keep: int = 3, extras: dict | None = None):
+        self.dyn = dyn
+        self.atoms = atoms
+        self.cfg = cfg
+        self.directory = Path(directory)
+        self.keep = keep
+        self.extras = {} if extras is None else extras
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self):
+        self.write()
+
+    def write(self) -> Path:
+        extra = {name: obj.state_dict() for name, obj in self.extras.items()}
+        payload = make_checkpoint(self.dyn, self.atoms, self.cfg, extra=extra)
+
+        path = self.directory / f"checkpoint_{self.dyn.nsteps:012d}.pkl"
+        write_checkpoint(path, payload)
+
+        existing = list_checkpoints(self.directory)
+        for old in existing[:-self.keep]:
+            old.unlink()
+
+        return path
+
+
+def attach_checkpointer(dyn, atoms, cfg: dict, extras: dict | None = None):
+    """
+    Attach a Checkpointer if checkpoint.interval is configured.
+    """
+    checkpoint_cfg = cfg.get("checkpoint", {})
+    if checkpoint_cfg is None:
+        checkpoint_cfg = {}
+
+    interval = checkpoint_cfg.get("interval", None)
+    if interval is None:
+        return None
+
+    directory = Path(cfg["output"]["workdir"]) / checkpoint_cfg.get("directory", "checkpoints")
+    keep = checkpoint_cfg.get("keep", 3)
+
+    checkpointer = Checkpointer(dyn, atoms, cfg, directory, keep=keep, extras=extras)
+    dyn.attach(checkpointer, interval=interval)
+    return checkpointer
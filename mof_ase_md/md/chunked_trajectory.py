@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from ase import Atoms
+from ase.calculators.singlepoint import SinglePointCalculator
+
+from mof_ase_md.config.validator import ConfigError
+
+
+FORMAT_NAME = "mof_ase_md.chunked"
+FORMAT_VERSION = 1
+
+# column -> (dtype, per-frame shape given natoms)
+COLUMN_SPECS = {
+    "positions": (np.float32, lambda n: (n, 3)),
+    "velocities": (np.float32, lambda n: (n, 3)),
+    "forces": (np.float32, lambda n: (n, 3)),
+    "cell": (np.float64, lambda n: (3, 3)),
+    "energy": (np.float64, lambda n: ()),
+    "stress": (np.float64, lambda n: (6,)),
+}
+
+DEFAULT_COLUMNS = ["positions", "velocities", "cell", "energy", "stress"]
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+class ChunkedTrajectoryWriter:
+    """
+    Columnar trajectory store: a directory with meta.json plus one file set per
+    chunk of frames.
+
+    Positions/velocities/forces are stored as float32, cell/energy/stress as
+    float64. Each chunk is either one compressed .npz (lossless, zlib) or one
+    .npy per column (memory-mappable). Missing energies/stresses are NaN.
+
+    Drop-in for ase Trajectory in attach_outputs: write(atoms=None), close().
+    """
+
+    def __init__(
+        self,
+        path,
+        mode: str = "w",
+        atoms=None,
+        chunk_frames: int = 100,
+        compression: bool = True,
+        columns: list | None = None,
+    ):
+        self.path = Path(path)
+        self.atoms = atoms
+        self.chunk_frames = int(chunk_frames)
+        self.compression = bool(compression)
+        self.columns = list(DEFAULT_COLUMNS if columns is None else columns)
+
+        for name in self.columns:
+            if name not in COLUMN_SPECS:
+                raise ValueError(f"Unknown chunked trajectory column: {name}")
+
+        self.meta = None
+        meta_path = self.path / "meta.json"
+        if self.path.exists():
+            if not self.path.is_dir():
+                raise ConfigError(f"{self.path} exists and is not a chunked trajectory directory")
+            if not meta_path.exists() and any(self.path.iterdir()):
+                raise ConfigError(f"{self.path} is not empty and has no meta.json; not writing a chunked trajectory there")
+
+        if mode == "a" and meta_path.exists():
+            with meta_path.open("r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+            # an existing store keeps its own layout
+            self.columns = self.meta["columns"]
+            self.compression = self.meta["compression"]
+            self.chunk_frames = self.meta["chunk_frames"]
+        elif mode == "w" and meta_path.exists():
+            self._clear(meta_path)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._buffer = None
+        self._n_buffered = 0
+
+    def _clear(self, meta_path: Path) -> None:
+        """
+        Delete the previous store: meta.json and the chunk files it lists.
+        """
+        with meta_path.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_NAME:
+            raise ConfigError(f"{self.path} does not hold a chunked trajectory; not clearing it")
+
+        for chunk in meta.get("chunks", []):
+            for filename in set(chunk["files"].values()):
+                path = self.path / filename
+                # only plain chunk files directly inside the store
+                if path.parent == self.path and filename.startswith("chunk_"):
+                    path.unlink(missing_ok=True)
+        meta_path.unlink()
+
+    def _init_meta(self, atoms) -> None:
+        self.meta = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "natoms": len(atoms),
+            "numbers": atoms.numbers.tolist(),
+            "masses": atoms.get_masses().tolist(),
+            "pbc": [bool(x) for x in atoms.pbc],
+            "info": {k: v for k, v in atoms.info.items() if k in ("charge", "spin")},
+            "columns": self.columns,
+            "compression": self.compression,
+            "chunk_frames": self.chunk_frames,
+            "n_frames": 0,
+            "chunks": [],
+        }
+
+    def _alloc_buffer(self) -> None:
+        natoms = self.meta["natoms"]
+        self._buffer = {}
+        for name in self.columns:
+            dtype, shape = COLUMN_SPECS[name]
+            self._buffer[name] = np.full((self.chunk_frames, *shape(natoms)), np.nan, dtype=dtype)
+        self._n_buffered = 0
+
+    @staticmethod
+    def _property(atoms, name):
+        if atoms.calc is None:
+            return None
+        try:
+            return atoms.calc.get_property(name, atoms, allow_calculation=False)
+        except Exception:
+            return None
+
+    def write(self, atoms=None) -> None:
+        if atoms is None:
+            atoms = self.atoms
+
+        if self.meta is None:
+            self._init_meta(atoms)
+        elif len(atoms) != self.meta["natoms"]:
+            raise ValueError("Chunked trajectory requires a constant number of atoms")
+
+        if self._buffer is None:
+            self._alloc_buffer()
+
+        i = self._n_buffered
+        for name in self.columns:
+            if name == "positions":
+                value = atoms.get_positions()
+            elif name == "velocities":
+                value = atoms.get_velocities()
+            elif name == "cell":
+                value = atoms.cell.array
+            else:
+                value = self._property(atoms, name)
+                if value is None:
+                    continue
+            self._buffer[name][i] = value
+
+        self._n_buffered += 1
+        if self._n_buffered == self.chunk_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered (possibly partial) chunk and update meta.json.
+        """
+        if self._buffer is None or self._n_buffered == 0:
+            return
+
+        n = self._n_buffered
+        index = len(self.meta["chunks"])
+        stem = f"chunk_{index:06d}"
+        data = {name: self._buffer[name][:n] for name in self.columns}
+
+        if self.compression:
+            filename = f"{stem}.npz"
+            tmp = self.path / f"{stem}.tmp.npz"
+            np.savez_compressed(tmp, **data)
+            os.replace(tmp, self.path / filename)
+            files = {name: filename for name in self.columns}
+        else:
+            files = {}
+            for name, array in data.items():
+                filename = f"{stem}.{name}.npy"
+                tmp = self.path / f"{stem}.{name}.tmp.npy"
+                np.save(tmp, array)
+                os.replace(tmp, self.path / filename)
+                files[name] = filename
+
+        self.meta["chunks"].append({"n_frames": n, "files": files})
+        self.meta["n_frames"] += n
+        _write_json_atomic(self.path / "meta.json", self.meta)
+
+        self._buffer = None
+        self._n_buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+def truncate_chunked_trajectory(path, n_frames: int) -> None:
+    """
+    Cut a (closed) chunked trajectory store back to its first n_frames
+    frames: later chunks are deleted, a chunk across the cut is rewritten.
+    """
+    path = Path(path)
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        return
+
+    with meta_path.open("r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta["n_frames"] <= n_frames:
+        return
+
+    kept = []
+    start = 0
+    for chunk in meta["chunks"]:
+        count = chunk["n_frames"]
+        files = sorted(set(chunk["files"].values()))
+
+        if start + count <= n_frames:
+            kept.append(chunk)
+        elif start < n_frames:
+            keep = n_frames - start
+            for filename in files:
+                if filename.endswith(".npz"):
+                    with np.load(path / filename) as npz:
+                        data = {name: npz[name][:keep] for name in npz.files}
+                    tmp = path / filename.replace(".npz", ".tmp.npz")
+                    np.savez_compressed(tmp, **data)
+                else:
+                    array = np.load(path / filename)[:keep]
+                    tmp = path / filename.replace(".npy", ".tmp.npy")
+                    np.save(tmp, array)
+                os.replace(tmp, path / filename)
+            kept.append({"n_frames": keep, "files": chunk["files"]})
+        else:
+            for filename in files:
+                (path / filename).unlink(missing_ok=True)
+        start += count
+
+    meta["chunks"] = kept
+    meta["n_frames"] = n_frames
+    _write_json_atomic(meta_path, meta)
+
+
+class ChunkedTrajectory:
+    """
+    Lazy reader for a ChunkedTrajectoryWriter store.
+
+    Columns are read per chunk on demand, so slicing frames or columns never
+    loads the whole store. Only stores written with compression: false are
+    memory-mapped (.npy per column); a compressed chunk column is decoded
+    whole, so the decoded columns of the last chunk read are kept.
+
+      traj = ChunkedTrajectory("runs/x/traj.chunks")
+      len(traj); traj[10]; traj[::50]         -> Atoms / list of Atoms
+      traj.column("positions", 1000, 2000)    -> (1000, natoms, 3) float32
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with (self.path / "meta.json").open("r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        if self.meta.get("format") != FORMAT_NAME:
+            raise ValueError(f"Not a chunked trajectory store: {self.path}")
+
+        self.columns = self.meta["columns"]
+        self.numbers = np.asarray(self.meta["numbers"])
+        self.masses = np.asarray(self.meta["masses"])
+        self.pbc = np.asarray(self.meta["pbc"])
+
+        counts = [chunk["n_frames"] for chunk in self.meta["chunks"]]
+        self._starts = np.concatenate([[0], np.cumsum(counts)]).astype(int)
+        self._cache_index = None
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def _chunk_column(self, chunk_index: int, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise KeyError(f"Column not stored in trajectory: {name}")
+
+        filename = self.meta["chunks"][chunk_index]["files"][name]
+        if filename.endswith(".npy"):
+            return np.load(self.path / filename, mmap_mode="r")
+
+        if self._cache_index != chunk_index:
+            self._cache_index = chunk_index
+            self._cache = {}
+        if name not in self._cache:
+            with np.load(self.path / filename) as npz:
+                self._cache[name] = npz[name]
+        return self._cache[name]
+
+    def column(self, name: str, start: int | None = None, stop: int | None = None, step: int | None = None) -> np.ndarray:
+        """
+        Frames start:stop:step of one column, touching only the chunks involved.
+        """
+        indices = np.asarray(range(len(self))[slice(start, stop, step)])
+        if len(indices) == 0:
+            dtype, shape = COLUMN_SPECS[name]
+            return np.empty((0, *shape(len(self.numbers))), dtype=dtype)
+
+        chunk_ids = np.searchsorted(self._starts, indices, side="right") - 1
+        parts = []
+        for chunk_index in np.unique(chunk_ids):
+            local = indices[chunk_ids == chunk_index] - self._starts[chunk_index]
+            parts.append(np.asarray(self._chunk_column(int(chunk_index), name)[local]))
+        return np.concatenate(parts)
+
+    def iter_chunks(self, columns: list | None = None):
+        """
+        Yield (first_frame, {column: array}) chunk by chunk.
+        """
+        if columns is None:
+            columns = self.columns
+        for chunk_index in range(len(self.meta["chunks"])):
+            data = {name: np.asarray(self._chunk_column(chunk_index, name)) for name in columns}
+            yield int(self._starts[chunk_index]), data
+
+    def get_atoms(self, index: int) -> Atoms:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} out of range")
+
+        frame = {name: self.column(name, index, index + 1)[0] for name in self.columns}
+        return self._atoms(frame)
+
+    def _atoms(self, frame: dict) -> Atoms:
+        atoms = Atoms(
+            numbers=self.numbers,
+            positions=frame["positions"].astype(np.float64),
+            cell=frame.get("cell", None),
+            pbc=self.pbc,
+            masses=self.masses,
+        )
+        atoms.info.update(self.meta.get("info", {}))
+
+        if "velocities" in frame:
+            atoms.set_velocities(frame["velocities"].astype(np.float64))
+
+        results = {}
+        if "energy" in frame and np.isfinite(frame["energy"]):
+            results["energy"] = float(frame["energy"])
+        if "stress" in frame and np.all(np.isfinite(frame["stress"])):
+            results["stress"] = frame["stress"].copy()
+        if "forces" in frame and np.all(np.isfinite(frame["forces"])):
+            results["forces"] = frame["forces"].astype(np.float64)
+        if results:
+            atoms.calc = SinglePointCalculator(atoms, **results)
+
+        return atoms
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get_atoms(i) for i in range(len(self))[index]]
+        return self.get_atoms(int(index))
+
+    def __iter__(self):
+        for _, data in self.iter_chunks():
+            for i in range(len(next(iter(data.values())))):
+                yield self._atoms({name: values[i] for name, values in data.items()})
+
+    def close(self) -> None:
+        self._cache_index = None
+        self._cache = {}
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import math
+import types
+
 from mof_ase_md.md.methods import get_method_info, get_builder
 
 
@@ -22,3 +25,61 @@ def make_dynamics(atoms, cfg: dict):
     dynamics = builder(atoms, cfg)
 
     return dynamics
+
+
+def _elapsed_time(dynamics) -> float:
+    return dynamics.time_offset + dynamics.nsteps * dynamics.dt
+
+
+def install_clock(dynamics) -> None:
+    """
+    ASE reports the simulated time as nsteps * dt, which is wrong once dt has
+    changed during a run; report time_offset + nsteps * dt instead (the
+    logger, trajectories and checkpoints all read dynamics.get_time()).
+    Integrators that keep their own elapsed time are left alone.
+    """
+    from ase.md.md import MolecularDynamics
+
+    if type(dynamics).get_time is not MolecularDynamics.get_time:
+        return
+    if not hasattr(dynamics, "time_offset"):
+        dynamics.time_offset = 0.0
+    dynamics.get_time = types.MethodType(_elapsed_time, dynamics)
+
+
+def set_timestep(dynamics, timestep: float) -> None:
+    """
+    Change the timestep (ASE time units) of a running dynamics object and
+    refresh the coefficients the integrators precompute from it.
+
+    Thermostat/barostat time constants are stored in absolute time, so only
+    dt-derived quantities need updating. The simulated time stays continuous
+    (see install_clock).
+    """
+    from ase.md.bussi import Bussi
+    from ase.md.langevinbaoab import LangevinBAOAB
+    from ase.md.melchionna import MelchionnaNPT
+
+    if isinstance(dynamics, MelchionnaNPT):
+        # leapfrog-style integrator: rebuild the "past" arrays for the new dt
+        dynamics.dt = timestep
+        dynamics.initialize()
+        return
+
+    elapsed = dynamics.get_time()
+
+    if hasattr(dynamics, "set_timestep"):
+        # Langevin, Andersen, NVT/NPT Berendsen
+        dynamics.set_timestep(timestep)
+    else:
+        dynamics.dt = timestep
+
+    if isinstance(dynamics, Bussi):
+        dynamics._exp_term = math.exp(-dynamics.dt / dynamics.taut)
+
+    if isinstance(dynamics, LangevinBAOAB):
+        dynamics.set_temperature(dynamics.temperature_K)
+
+    install_clock(dynamics)
+    if "get_time" in vars(dynamics):
+        dynamics.time_offset = elapsed - dynamics.nsteps * dynamics.dt
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import csv
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+from ase import units
+
+
+def geometric_ladder(t_min: float, t_max: float, n: int) -> list[float]:
+    """
+    n temperatures from t_min to t_max with a constant ratio between
+    neighbours, which gives roughly uniform exchange acceptance when the
+    heat capacity does not change much over the range.
+    """
+    if n == 1:
+        return [float(t_min)]
+    ratio = (t_max / t_min) ** (1.0 / (n - 1))
+    return [float(t_min * ratio ** k) for k in range(n)]
+
+
+def acceptance_probability(energy_i: float, energy_j: float, temperature_i: float, temperature_j: float) -> float:
+    """
+    Metropolis probability of swapping the configurations held at
+    temperature_i and temperature_j (potential energies in eV).
+    """
+    beta_i = 1.0 / (units.kB * temperature_i)
+    beta_j = 1.0 / (units.kB * temperature_j)
+    delta = (beta_i - beta_j) * (energy_i - energy_j)
+    return 1.0 if delta >= 0.0 else math.exp(delta)
+
+
+def swap_configurations(atoms_i, atoms_j, dynamics_i, dynamics_j, temperature_i: float, temperature_j: float) -> None:
+    """
+    Exchange positions, cell and momenta between two replicas; momenta are
+    rescaled by sqrt(T_new / T_old) so each arrives thermalized at its new
+    temperature. The cached force-field results travel with the
+    configuration, so no extra force evaluation is needed. Thermostat state
+    stays with the dynamics object (i.e. with the temperature).
+    """
+    positions_i = atoms_i.get_positions()
+    cell_i = atoms_i.cell.array.copy()
+    momenta_i = atoms_i.get_momenta()
+
+    atoms_i.set_cell(atoms_j.cell.array, scale_atoms=False)
+    atoms_i.set_positions(atoms_j.get_positions(), apply_constraint=False)
+    atoms_i.set_momenta(atoms_j.get_momenta() * math.sqrt(temperature_i / temperature_j), apply_constraint=False)
+
+    atoms_j.set_cell(cell_i, scale_atoms=False)
+    atoms_j.set_positions(positions_i, apply_constraint=False)
+    atoms_j.set_momenta(momenta_i * math.sqrt(temperature_j / temperature_i), apply_constraint=False)
+
+    calc_i, calc_j = atoms_i.calc, atoms_j.calc
+    calc_i.atoms, calc_j.atoms = calc_j.atoms, calc_i.atoms
+    calc_i.results, calc_j.results = calc_j.results, calc_i.results
+
+    # the ASE Nose-Hoover chain integrators keep their own copy of positions/momenta
+    for atoms, dynamics in ((atoms_i, dynamics_i), (atoms_j, dynamics_j)):
+        if hasattr(dynamics, "_q") and hasattr(dynamics, "_p"):
+            dynamics._q = atoms.get_positions()
+            dynamics._p = atoms.get_momenta()
+
+    # RESPA keeps the fast/slow forces of the current configuration
+    for name in ("_fast", "_slow"):
+        if hasattr(dynamics_i, name):
+            value = getattr(dynamics_i, name)
+            setattr(dynamics_i, name, getattr(dynamics_j, name))
+            setattr(dynamics_j, name, value)
+
+
+class ReplicaExchange:
+    """
+    Neighbour swaps on a temperature ladder (replica i runs at
+    temperatures_K[i], increasing). Attempts alternate between the even
+    (0-1, 2-3, ...) and odd (1-2, 3-4, ...) pairs.
+
+    Writes to workdir:
+      exchange.csv  one row per attempted swap (energies, probability, accepted)
+      walkers.csv   after every attempt round, the walker held by each replica
+                    (walker w started at temperatures_K[w]); use it to follow one
+                    configuration through the per-temperature trajectories
+    """
+
+    def __init__(self, temperatures_K: list[float], workdir, seed: int | None = None):
+        self.temperatures_K = [float(t) for t in temperatures_K]
+        self.workdir = Path(workdir)
+        self.rng = np.random.default_rng(seed)
+
+        n_pairs = len(self.temperatures_K) - 1
+        self.attempts = [0] * n_pairs
+        self.accepted = [0] * n_pairs
+        self.n_rounds = 0
+
+        # walkers[i] = index of the configuration currently at temperatures_K[i]
+        self.walkers = list(range(len(self.temperatures_K)))
+
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self._exchange_file = open(self.workdir / "exchange.csv", "w", newline="")
+        self._walkers_file = open(self.workdir / "walkers.csv", "w", newline="")
+        self._exchange_csv = csv.writer(self._exchange_file)
+        self._walkers_csv = csv.writer(self._walkers_file)
+
+        self._exchange_csv.writerow(
+            ["step", "replica_i", "replica_j", "T_i_K", "T_j_K", "E_i_eV", "E_j_eV", "probability", "accepted"]
+        )
+        self._walkers_csv.writerow(["step"] + [f"T_{t:g}K" for t in self.temperatures_K])
+        self._walkers_csv.writerow([0] + self.walkers)
+
+    def attempt(self, step: int, atoms_list: list, dynamics_list: list, watchdogs: list) -> int:
+        """
+        Attempt one round of neighbour swaps. Returns the number accepted.
+        """
+        temperatures = self.temperatures_K
+        energies = [atoms.get_potential_energy() for atoms in atoms_list]
+
+        n_accepted = 0
+        for i in range(self.n_rounds % 2, len(temperatures) - 1, 2):
+            j = i + 1
+            probability = acceptance_probability(energies[i], energies[j], temperatures[i], temperatures[j])
+            accepted = bool(self.rng.random() < probability)
+
+            self.attempts[i] += 1
+            if accepted:
+                self.accepted[i] += 1
+                n_accepted += 1
+
+                swap_configurations(
+                    atoms_list[i], atoms_list[j], dynamics_list[i], dynamics_list[j], temperatures[i], temperatures[j]
+                )
+                self.walkers[i], self.walkers[j] = self.walkers[j], self.walkers[i]
+
+                # snapshots from before the swap belong to another configuration
+                for watchdog in (watchdogs[i], watchdogs[j]):
+                    if watchdog is not None:
+                        watchdog.clear_snapshots()
+
+            self._exchange_csv.writerow(
+                [step, i, j, temperatures[i], temperatures[j], f"{energies[i]:.6f}", f"{energies[j]:.6f}",
+                 f"{probability:.4f}", int(accepted)]
+            )
+
+        self._walkers_csv.writerow([step] + self.walkers)
+        self.n_rounds += 1
+        return n_accepted
+
+    def acceptance_rates(self) -> list[float | None]:
+        return [a / n if n else None for a, n in zip(self.accepted, self.attempts)]
+
+    def summary(self) -> dict:
+        return {
+            "temperatures_K": self.temperatures_K,
+            "rounds": self.n_rounds,
+            "pairs": [
+                {
+                    "replicas": [i, i + 1],
+                    "temperatures_K": [self.temperatures_K[i], self.temperatures_K[i + 1]],
+                    "attempts": self.attempts[i],
+                    "accepted": self.accepted[i],
+                    "acceptance": rate,
+                }
+                for i, rate in enumerate(self.acceptance_rates())
+            ],
+            "final_walkers": self.walkers,
+        }
+
+    def close(self) -> None:
+        self._exchange_file.close()
+        self._walkers_file.close()
+
+        with open(self.workdir / "exchange_summary.json", "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=1)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+# Column layout of the structured MD log (md/structured_log.py). Kept free of
+# numpy/ASE imports so the config validator can check logging.* cheaply.
+
+LOG_FORMATS = ("text", "binary", "csv")
+
+# column -> (dtype, per-row width); width None = one value per species.
+# Width-1 columns are stored as scalars, all others as 1-D rows
+COLUMN_SPECS = {
+    "step": ("<i8", 1),
+    "time_ps": ("<f8", 1),
+    "timestep_fs": ("<f8", 1),
+    "epot_eV": ("<f8", 1),
+    "ekin_eV": ("<f8", 1),
+    "etot_eV": ("<f8", 1),
+    "conserved_eV": ("<f8", 1),
+    "temperature_K": ("<f8", 1),
+    "temperature_species_K": ("<f8", None),
+    "volume_A3": ("<f8", 1),
+    "pressure_bar": ("<f8", 1),
+    "stress_GPa": ("<f8", 6),
+    "cell_params": ("<f8", 6),
+    "cell_A": ("<f8", 9),
+    "max_force_eV_A": ("<f8", 1),
+    "graph_builds": ("<i8", 1),
+}
+
+DEFAULT_COLUMNS = [
+    "step",
+    "time_ps",
+    "epot_eV",
+    "ekin_eV",
+    "etot_eV",
+    "conserved_eV",
+    "temperature_K",
+    "volume_A3",
+    "pressure_bar",
+    "stress_GPa",
+    "cell_params",
+]
+
+# CSV names of the components of the multi-value columns
+COMPONENT_NAMES = {
+    "stress_GPa": ("xx", "yy", "zz", "yz", "xz", "xy"),
+    "cell_params": ("a", "b", "c", "alpha", "beta", "gamma"),
+    "cell_A": ("ax", "ay", "az", "bx", "by", "bz", "cx", "cy", "cz"),
+}
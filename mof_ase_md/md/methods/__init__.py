@@ -10,6 +10,11 @@ METHOD_REGISTRY = {
         "module": "mof_ase_md.md.methods.nve_velocity_verlet",
         "callable": "build",
     },
+    "respa": {
+        "ensemble": "nve",
+        "module": "mof_ase_md.md.methods.nve_respa",
+        "callable": "build",
+    },
 
     # NVT
     "langevin": {
@@ -37,6 +42,11 @@ METHOD_REGISTRY = {
         "module": "mof_ase_md.md.methods.nvt_berendsen",
         "callable": "build",
     },
+    "respa_langevin": {
+        "ensemble": "nvt",
+        "module": "mof_ase_md.md.methods.nvt_respa_langevin",
+        "callable": "build",
+    },
 
     # NPT
     "npt_berendsen": {
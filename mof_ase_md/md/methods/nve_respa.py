@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from ase import units
+
+from mof_ase_md.calculator.factory import build_calculator
+from mof_ase_md.md.respa import RESPA
+
+
+def build(atoms, cfg: dict):
+    """
+    NVE: r-RESPA multiple time stepping. The main calculator (ORB) is
+    evaluated once per md.timestep_fs; a cheap inner calculator drives
+    respa.inner_steps sub-steps in between.
+
+    Required:
+      md.timestep_fs                 outer step (one main-calculator call)
+      respa.inner_steps
+      respa.inner_calculator.name    bonds | emt | lj
+
+    Optional:
+      respa.fit_inner (bool) default True: fit bond force constants to the
+        main calculator before the first step (bonds only)
+    """
+    md = cfg["md"]
+    respa = cfg["respa"]
+
+    timestep = float(md["timestep_fs"]) * units.fs
+    inner_calculator = build_calculator({"calculator": respa["inner_calculator"]})
+
+    return RESPA(
+        atoms=atoms,
+        timestep=timestep,
+        inner_calculator=inner_calculator,
+        inner_steps=int(respa["inner_steps"]),
+        fit_inner=bool(respa.get("fit_inner", True)),
+    )
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+from ase import units
+
+from mof_ase_md.calculator.factory import build_calculator
+from mof_ase_md.md.respa import RESPA
+
+
+def build(atoms, cfg: dict):
+    """
+    NVT: r-RESPA multiple time stepping with a Langevin (BAOAB) thermostat
+    applied on every inner step.
+
+    Required:
+      md.timestep_fs                 outer step (one main-calculator call)
+      state.temperature_K
+      respa.inner_steps
+      respa.inner_calculator.name    bonds | emt | lj
+      thermostat.langevin.friction_per_fs (or default 0.01)
+
+    Optional:
+      respa.fit_inner (bool) default True: fit bond force constants to the
+        main calculator before the first step (bonds only)
+      safety.fix_com (bool) default True
+      velocities.seed                also seeds the thermostat noise
+    """
+    md = cfg["md"]
+    state = cfg["state"]
+    respa = cfg["respa"]
+
+    timestep = float(md["timestep_fs"]) * units.fs
+    temperature_K = float(state["temperature_K"])
+
+    thermo = cfg.get("thermostat", {}).get("langevin", {})
+    friction = float(thermo.get("friction_per_fs", 0.01)) / units.fs
+
+    fixcm = bool(cfg.get("safety", {}).get("fix_com", True))
+    seed = cfg.get("velocities", {}).get("seed", None)
+
+    inner_calculator = build_calculator({"calculator": respa["inner_calculator"]})
+
+    return RESPA(
+        atoms=atoms,
+        timestep=timestep,
+        inner_calculator=inner_calculator,
+        inner_steps=int(respa["inner_steps"]),
+        fit_inner=bool(respa.get("fit_inner", True)),
+        temperature_K=temperature_K,
+        friction=friction,
+        fixcm=fixcm,
+        rng=np.random.default_rng(seed),
+    )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+from ase import units
+from ase.io import write
+
+
+def make_optimizer(atoms, minimize_cfg: dict, logfile=None):
+    """
+    Optimizer for minimize_cfg, with an optional cell filter so the cell
+    relaxes together with the positions. Returns (optimizer, filtered object).
+    """
+    from ase.filters import ExpCellFilter, FrechetCellFilter, UnitCellFilter
+    from ase.optimize import BFGS, FIRE, LBFGS
+
+    optimizers = {"fire": FIRE, "bfgs": BFGS, "lbfgs": LBFGS}
+    filters = {"frechet": FrechetCellFilter, "exp": ExpCellFilter, "unit": UnitCellFilter}
+
+    target = atoms
+    cell_filter = minimize_cfg.get("cell_filter", "none")
+    if cell_filter != "none":
+        target = filters[cell_filter](
+            atoms,
+            scalar_pressure=minimize_cfg.get("pressure_bar", 0.0) * units.bar,
+            hydrostatic_strain=minimize_cfg.get("hydrostatic", False),
+        )
+
+    optimizer_class = optimizers[minimize_cfg.get("optimizer", "fire")]
+    return optimizer_class(target, logfile=logfile), target
+
+
+def run_minimize(atoms, cfg: dict) -> dict:
+    """
+    Minimize atoms in place (positions, and the cell with a cell filter)
+    until the largest force is below minimize.fmax_eV_A or max_steps is
+    reached. Writes minimize.log, minimize.traj and the final structure to
+    output.workdir; momenta are zeroed so a following md stage starts from
+    freshly drawn velocities. Returns a summary.
+    """
+    t0 = time.perf_counter()
+
+    minimize_cfg = cfg.get("minimize") or {}
+    output_cfg = cfg["output"]
+    workdir = Path(output_cfg["workdir"])
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    fmax = minimize_cfg.get("fmax_eV_A", 0.05)
+    max_steps = minimize_cfg.get("max_steps", 1000)
+
+    energy0 = atoms.get_potential_energy()
+    volume0 = atoms.get_volume() if atoms.cell.rank == 3 else None
+
+    optimizer, target = make_optimizer(atoms, minimize_cfg, logfile=str(workdir / "minimize.log"))
+
+    trajectory = None
+    traj_interval = minimize_cfg.get("traj_interval", None)
+    if traj_interval is not None:
+        from ase.io.trajectory import Trajectory
+
+        trajectory = Trajectory(str(workdir / "minimize.traj"), "w", atoms)
+        optimizer.attach(trajectory.write, interval=traj_interval)
+
+    try:
+        converged = bool(optimizer.run(fmax=fmax, steps=max_steps))
+    finally:
+        if trajectory is not None:
+            trajectory.close()
+        optimizer.close()
+
+    atoms.set_momenta(np.zeros((len(atoms), 3)))
+
+    final_path = workdir / output_cfg.get("final_structure", "final.xyz")
+    write(str(final_path), atoms)
+
+    forces = target.get_forces()
+    summary = {
+        "workdir": str(workdir),
+        "final_structure": str(final_path),
+        "converged": converged,
+        "steps": optimizer.nsteps,
+        "fmax_eV_A": float(np.sqrt((forces ** 2).sum(axis=1).max())),
+        "energy_eV": float(atoms.get_potential_energy()),
+        "energy_change_eV": float(atoms.get_potential_energy() - energy0),
+        "wall_time_s": time.perf_counter() - t0,
+    }
+    if volume0 is not None:
+        summary["final_volume_A3"] = atoms.get_volume()
+        summary["volume_change_A3"] = atoms.get_volume() - volume0
+
+    status = "converged" if converged else f"NOT converged (fmax {summary['fmax_eV_A']:.3g} eV/A)"
+    print(
+        f"Minimize: {status} after {summary['steps']} steps, "
+        f"dE = {summary['energy_change_eV']:.4f} eV"
+        + (f", dV = {summary['volume_change_A3']:.2f} A^3" if volume0 is not None else "")
+    )
+    return summary
@@ -1,14 +1,261 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 
+import numpy as np
+from ase import units
+from ase.calculators.calculator import PropertyNotImplementedError
+from ase.io import ulm
 from ase.io.trajectory import Trajectory
 from ase.md import MDLogger
 
+from mof_ase_md.md.async_writer import AsyncOutputWriter, SnapshotClock
+from mof_ase_md.md.chunked_trajectory import ChunkedTrajectoryWriter, truncate_chunked_trajectory
+from mof_ase_md.md.structured_log import StructuredLogWriter, count_log_rows, graph_builds, truncate_log
+
+
+class GraphMDLogger(MDLogger):
+    """
+    MDLogger with a trailing Builds column: the neighbour-graph builds so far
+    of a skin-graph calculator (calculator.skin_A), next to the energies.
+    """
+
+    def __init__(self, *args, header: bool = True, **kwargs):
+        super().__init__(*args, header=False, **kwargs)
+        self.hdr += " %8s" % ("Builds",)
+        self.fmt = self.fmt[:-1] + " %8d\n"
+        if header:
+            self.logfile.write(self.hdr + "\n")
+
+    def __call__(self):
+        epot = self._potential_energy()
+        ekin = self.atoms.get_kinetic_energy()
+        temp = self.atoms.get_temperature()
+        natoms = self.atoms.get_global_number_of_atoms()
+        if self.peratom:
+            epot /= natoms
+            ekin /= natoms
+
+        dat = ()
+        if self.dyn is not None:
+            dat = (self.dyn.get_time() / (1000 * units.fs),)
+        dat += (epot + ekin, epot, ekin, temp)
+        if self.stress:
+            dat += tuple(self._stress() / units.GPa)
+        dat += (graph_builds(self.atoms),)
+
+        self.logfile.write(self.fmt % dat)
+        self.logfile.flush()
+
+
+def _count_frames(path: Path, chunked: bool) -> int:
+    if chunked:
+        meta_path = path / "meta.json"
+        if not meta_path.exists():
+            return 0
+        with meta_path.open("r", encoding="utf-8") as f:
+            return int(json.load(f)["n_frames"])
+
+    if not path.is_file() or path.stat().st_size == 0:
+        return 0
+    with path.open("rb") as fd:
+        return int(ulm.read_header(fd)[2])
+
+
+def truncate_ase_trajectory(path, n_frames: int) -> None:
+    """
+    Cut a (closed) ASE .traj file back to its first n_frames frames.
+
+    A ULM file is a header (nitems at byte 32, offsets-table position at
+    byte 40), then the items and offset tables in write order. Frame i ends
+    with its data dictionary at offsets[i], so the file is cut after the
+    dictionary of frame n_frames - 1; an offsets table lying past the cut is
+    rewritten at the new end with the capacity ASE's append mode expects.
+    """
+    path = Path(path)
+    if not path.is_file() or path.stat().st_size == 0:
+        return
+
+    with path.open("r+b") as fd:
+        nitems, pos0, offsets = ulm.read_header(fd)[2:]
+        if n_frames >= nitems:
+            return
+        if n_frames == 0:
+            fd.truncate(0)
+            return
+
+        last = int(offsets[n_frames - 1])
+        fd.seek(last)
+        end = last + 8 + int(ulm.readints(fd, 1)[0])
+        fd.truncate(end)
+
+        if pos0 > end:
+            capacity = 1
+            while n_frames > capacity:
+                capacity *= ulm.N1
+            table = np.zeros(capacity, np.int64)
+            table[:n_frames] = offsets[:n_frames]
+
+            fd.seek(end)
+            pos0 = ulm.align(fd)
+            fd.write(table.astype("<i8").tobytes())
+            ulm.writeint(fd, pos0, 40)
+
+        ulm.writeint(fd, n_frames, 32)
+
+
+class OutputWriters:
+    """
+    The output writers attached by attach_outputs.
+
+    Frames and log rows are counted as they are written (buffered and queued
+    ones included), so a position in the output is {"trajectory_frames": n,
+    "log_rows": m}. rewind(position) cuts trajectory and log back to such a
+    position. Checkpoints store one (state_dict, taken after a flush) so
+    resume drops output written after the checkpoint; the safety watchdog
+    rewinds to its snapshot on a rollback.
+    """
+
+    def __init__(
+        self,
+        traj_path,
+        log_path,
+        open_trajectory,
+        open_logger,
+        traj_mode: str = "w",
+        log_mode: str = "w",
+        chunked: bool = False,
+        async_writer=None,
+        flush_on_error=True,
+    ):
+        self.traj_path = traj_path
+        self.log_path = log_path
+        self.chunked = chunked
+        self._open_trajectory = open_trajectory
+        self._open_logger = open_logger
+        self.async_writer = async_writer
+        self.flush_on_error = flush_on_error
+        self._closed = False
+
+        self.n_frames = _count_frames(traj_path, chunked) if traj_mode == "a" else 0
+        self.n_rows = count_log_rows(log_path) if log_mode == "a" else 0
+
+        self.trajectory = open_trajectory(traj_mode)
+        self.logger = open_logger(log_mode)
+        if async_writer is not None:
+            async_writer.trajectory = self.trajectory
+            if not isinstance(self.logger, StructuredLogWriter):
+                async_writer.logger = self.logger
+
+    # ---- observers ----
+
+    def write_frame(self) -> None:
+        if self.async_writer is not None:
+            if self.async_writer.submit_trajectory():
+                self.n_frames += 1
+            return
+        self.trajectory.write()
+        self.n_frames += 1
+
+    def write_log(self) -> None:
+        if self.async_writer is not None and self.async_writer.logger is not None:
+            if self.async_writer.submit_log():
+                self.n_rows += 1
+            return
+        self.logger()
+        self.n_rows += 1
+
+    # ---- positions ----
+
+    def tell(self) -> dict:
+        return {"trajectory_frames": self.n_frames, "log_rows": self.n_rows}
+
+    def flush(self) -> None:
+        """
+        Put everything written so far on disk.
+        """
+        if self._closed:
+            return
+        if self.async_writer is not None:
+            self.async_writer.drain()
+        if self.chunked:
+            self.trajectory.flush()
+        if isinstance(self.logger, StructuredLogWriter):
+            self.logger.flush()
+        else:
+            self.logger.logfile.flush()
+
+    def state_dict(self) -> dict:
+        self.flush()
+        return self.tell()
+
+    def load_state_dict(self, state: dict) -> None:
+        self.rewind(state)
+
+    def rewind(self, position: dict) -> None:
+        """
+        Drop the frames and log rows written after position.
+        """
+        if self.async_writer is not None:
+            self.async_writer.drain()
+
+        frames = position["trajectory_frames"]
+        if frames < self.n_frames:
+            self.trajectory.close()
+            if self.chunked:
+                truncate_chunked_trajectory(self.traj_path, frames)
+            else:
+                truncate_ase_trajectory(self.traj_path, frames)
+            self.trajectory = self._open_trajectory("a")
+            if self.async_writer is not None:
+                self.async_writer.trajectory = self.trajectory
+            self.n_frames = frames
+
+        rows = position["log_rows"]
+        if rows < self.n_rows:
+            self.logger.close()
+            truncate_log(self.log_path, rows)
+            self.logger = self._open_logger("a", header=False)
+            if self.async_writer is not None and self.async_writer.logger is not None:
+                self.async_writer.logger = self.logger
+            self.n_rows = rows
+
+    def close(self, error: bool = False) -> None:
+        """
+        Flush and close all writers. After a crash (error=True) queued
+        asynchronous writes are only flushed if output.async_writes.flush_on_error.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if self.async_writer is not None:
+            flush = True
+            if error:
+                flush = self.flush_on_error
+            self.async_writer.close(flush=flush)
+            # structured logs are written in the integrator thread
+            if self.async_writer.logger is None:
+                self.logger.close()
+            return
+
+        self.trajectory.close()
+        self.logger.close()
+
 
 def attach_outputs(dyn, atoms, cfg: dict):
     """
     Attach trajectory + logger output writers to an ASE dynamics object.
+
+    With output.async_writes.enabled, frames and log lines are written from
+    snapshots by a background thread instead of inside the dynamics loop.
+    With output.trajectory_format = "chunked", frames go to a compact columnar
+    store (see md/chunked_trajectory.py) instead of an ASE .traj file.
+    With logging.format = "binary" or "csv", log rows go to a buffered
+    structured log (see md/structured_log.py) instead of the ASE MDLogger
+    text file; its rows are recorded in the integrator thread even with
+    async writes, since a row costs no file I/O.
     """
     output_cfg = cfg["output"]
 
@@ -30,36 +277,157 @@ def attach_outputs(dyn, atoms, cfg: dict):
     if append_traj is False:
         traj_mode = "w"
 
-    trajectory = Trajectory(
-        str(traj_path),
-        mode=traj_mode,
-        atoms=atoms
-    )
+    traj_format = output_cfg.get("trajectory_format", "ase")
+    chunked_cfg = output_cfg.get("chunked", {})
+    if chunked_cfg is None:
+        chunked_cfg = {}
 
-    dyn.attach(
-        trajectory.write,
-        interval=traj_interval
-    )
+    def open_trajectory(mode):
+        if traj_format == "chunked":
+            return ChunkedTrajectoryWriter(
+                traj_path,
+                mode=mode,
+                atoms=atoms,
+                chunk_frames=chunked_cfg.get("chunk_frames", 100),
+                compression=chunked_cfg.get("compression", True),
+                columns=chunked_cfg.get("columns", None),
+            )
+        return Trajectory(
+            str(traj_path),
+            mode=mode,
+            atoms=atoms
+        )
 
     logging_cfg = cfg.get("logging", {})
 
+    header = logging_cfg.get("header", True)
     stress = logging_cfg.get("stress", True)
     per_atom = logging_cfg.get("per_atom", False)
 
     mode = logging_cfg.get("mode", "w")
 
-    logger = MDLogger(
-        dyn=dyn,
-        atoms=atoms,
-        logfile=str(log_path),
-        stress=stress,
-        peratom=per_atom,
-        mode=mode
+    log_format = logging_cfg.get("format", "text")
+
+    async_cfg = output_cfg.get("async_writes", {})
+    if async_cfg is None:
+        async_cfg = {}
+
+    writer = None
+    clock = None
+    if async_cfg.get("enabled", False) is True:
+        clock = SnapshotClock()
+        writer = AsyncOutputWriter(
+            dyn,
+            atoms,
+            clock=clock,
+            queue_size=async_cfg.get("queue_size", 64),
+            backpressure=async_cfg.get("backpressure", "block"),
+            log_stress=stress,
+        )
+
+    def open_logger(log_mode, header=header):
+        if log_format != "text":
+            return StructuredLogWriter(
+                dyn,
+                atoms,
+                log_path,
+                fmt=log_format,
+                columns=logging_cfg.get("columns", None),
+                mode=log_mode,
+                chunk_rows=logging_cfg.get("chunk_rows", 100),
+                flush_interval_s=logging_cfg.get("flush_interval_s", 60.0),
+            )
+        logger_class = MDLogger
+        if hasattr(atoms.calc, "graph_stats"):
+            logger_class = GraphMDLogger
+        return logger_class(
+            dyn=dyn if clock is None else clock,
+            atoms=atoms,
+            logfile=str(log_path),
+            header=header,
+            stress=stress,
+            peratom=per_atom,
+            mode=log_mode
+        )
+
+    outputs = OutputWriters(
+        traj_path,
+        log_path,
+        open_trajectory,
+        open_logger,
+        traj_mode=traj_mode,
+        log_mode=mode,
+        chunked=traj_format == "chunked",
+        async_writer=writer,
+        flush_on_error=async_cfg.get("flush_on_error", True),
     )
 
     dyn.attach(
-        logger,
+        outputs.write_frame,
+        interval=traj_interval
+    )
+
+    dyn.attach(
+        outputs.write_log,
         interval=log_interval
     )
 
-    return traj_path, log_path
+    return outputs
+
+
+class ThermoAverages:
+    """
+    Running means of temperature and pressure, sampled as a dynamics observer.
+    """
+
+    def __init__(self, atoms):
+        self.atoms = atoms
+        self.n_samples = 0
+        self.n_pressure = 0
+        self.sum_temperature = 0.0
+        self.sum_pressure = 0.0
+        self._has_stress = atoms.cell.rank == 3
+
+    def __call__(self):
+        self.n_samples += 1
+        self.sum_temperature += self.atoms.get_temperature()
+
+        if not self._has_stress:
+            return
+
+        try:
+            stress = self.atoms.get_stress(include_ideal_gas=True)
+        except PropertyNotImplementedError:
+            self._has_stress = False
+            return
+
+        self.n_pressure += 1
+        self.sum_pressure += -stress[:3].mean() / units.bar
+
+    def state_dict(self) -> dict:
+        return {
+            "n_samples": self.n_samples,
+            "n_pressure": self.n_pressure,
+            "sum_temperature": self.sum_temperature,
+            "sum_pressure": self.sum_pressure,
+        }
+
+    def load_state_dict(self, state: dict) -> None:
+        self.n_samples = state["n_samples"]
+        self.n_pressure = state["n_pressure"]
+        self.sum_temperature = state["sum_temperature"]
+        self.sum_pressure = state["sum_pressure"]
+
+    def summary(self) -> dict:
+        mean_temperature = None
+        mean_pressure = None
+
+        if self.n_samples > 0:
+            mean_temperature = self.sum_temperature / self.n_samples
+        if self.n_pressure > 0:
+            mean_pressure = self.sum_pressure / self.n_pressure
+
+        return {
+            "mean_temperature_K": mean_temperature,
+            "mean_pressure_bar": mean_pressure,
+        }
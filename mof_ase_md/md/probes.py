@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from ase import units
+from ase.md.velocitydistribution import MaxwellBoltzmannDistribution, Stationary
+from ase.md.verlet import VelocityVerlet
+
+
+def nve_probe(
+    atoms,
+    calculator,
+    steps: int = 200,
+    timestep_fs: float = 0.5,
+    temperature_K: float = 300.0,
+    seed: int = 0,
+) -> dict:
+    """
+    Short NVE (velocity Verlet) run on a copy of atoms.
+
+    Velocities are drawn from a seeded Maxwell-Boltzmann distribution, so
+    probes of different calculators start from the same state. Reports the
+    total-energy drift (slope of a linear fit, meV/atom/ps), the residual
+    fluctuation around it (meV/atom) and the throughput.
+    """
+    probe = atoms.copy()
+    probe.calc = calculator
+
+    MaxwellBoltzmannDistribution(probe, temperature_K=temperature_K, rng=np.random.default_rng(seed))
+    Stationary(probe)
+
+    dyn = VelocityVerlet(probe, timestep=timestep_fs * units.fs)
+
+    times_ps = []
+    energies = []
+
+    def record():
+        times_ps.append(dyn.nsteps * timestep_fs / 1000.0)
+        energies.append(probe.get_potential_energy() + probe.get_kinetic_energy())
+
+    dyn.attach(record, interval=1)
+
+    t0 = time.perf_counter()
+    dyn.run(steps)
+    seconds = time.perf_counter() - t0
+
+    natoms = len(probe)
+    times_ps = np.array(times_ps)
+    energies_meV = 1000.0 * np.array(energies) / natoms
+
+    slope, intercept = np.polyfit(times_ps, energies_meV, 1)
+    residual = energies_meV - (slope * times_ps + intercept)
+
+    return {
+        "natoms": natoms,
+        "steps": steps,
+        "timestep_fs": timestep_fs,
+        "drift_meV_atom_ps": float(slope),
+        "noise_meV_atom": float(residual.std()),
+        "max_dev_meV_atom": float(np.abs(energies_meV - energies_meV[0]).max()),
+        "steps_per_s": steps / seconds if seconds > 0 else float("nan"),
+    }
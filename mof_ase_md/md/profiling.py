@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def _observer_name(function) -> str:
+    owner = getattr(function, "__self__", None)
+    if owner is not None:
+        return f"{type(owner).__name__}.{function.__name__}"
+    if hasattr(function, "__name__"):
+        return function.__name__
+    return type(function).__name__
+
+
+class StepProfiler:
+    """
+    Wall-clock instrumentation of one dynamics run.
+
+    instrument() wraps, on the instances only:
+      - atoms.calc.calculate         -> "calculator"
+      - atoms.calc.model.predict     -> "model_forward" (ORB; graph construction
+                                        is the calculator time not spent here)
+      - dyn.step                     -> "step"; "integrator" is step minus the
+                                        calculator time inside that step
+      - every attached observer      -> "observer:<name>"
+
+    Nothing is patched unless a profiler is attached, so disabled runs pay
+    no overhead. uninstrument() puts the original attributes back; the
+    calculator and its model outlive the run (model cache, worker caches,
+    stages), so it must be called when the run is over.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.wall_time = None
+        self.n_steps = 0
+        self._calc_in_step = 0.0
+        self._patched = []
+        self._observers = None
+
+    def _patch(self, obj, name: str, wrapper) -> None:
+        # remember whether the instance had its own attribute or used the class's
+        own = name in vars(obj)
+        self._patched.append((obj, name, own, vars(obj).get(name)))
+        setattr(obj, name, wrapper)
+
+    def _record(self, name: str, seconds: float) -> None:
+        self.samples.setdefault(name, []).append(seconds)
+
+    def _timed(self, name: str, function):
+        clock = time.perf_counter
+        record = self._record
+
+        def wrapper(*args, **kwargs):
+            t0 = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, clock() - t0)
+
+        return wrapper
+
+    def instrument(self, dyn, atoms) -> None:
+        calc = atoms.calc
+        clock = time.perf_counter
+
+        if calc is not None:
+            calculate = calc.calculate
+
+            def timed_calculate(*args, **kwargs):
+                t0 = clock()
+                try:
+                    return calculate(*args, **kwargs)
+                finally:
+                    seconds = clock() - t0
+                    self._calc_in_step += seconds
+                    self._record("calculator", seconds)
+
+            self._patch(calc, "calculate", timed_calculate)
+
+            model = getattr(calc, "model", None)
+            if model is not None and hasattr(model, "predict"):
+                self._patch(model, "predict", self._timed("model_forward", model.predict))
+
+        step = dyn.step
+
+        def timed_step(*args, **kwargs):
+            self._calc_in_step = 0.0
+            t0 = clock()
+            try:
+                return step(*args, **kwargs)
+            finally:
+                seconds = clock() - t0
+                self._record("step", seconds)
+                self._record("integrator", seconds - self._calc_in_step)
+
+        self._patch(dyn, "step", timed_step)
+
+        self._observers = (dyn, list(dyn.observers))
+        names = set()
+        observers = []
+        for function, interval, args, kwargs in dyn.observers:
+            name = "observer:" + _observer_name(function)
+            while name in names:
+                name += "'"
+            names.add(name)
+            observers.append((self._timed(name, function), interval, args, kwargs))
+        dyn.observers[:] = observers
+
+    def uninstrument(self) -> None:
+        """
+        Undo instrument(): restore calculate/predict/step and the observers.
+        """
+        for obj, name, own, value in reversed(self._patched):
+            if own:
+                setattr(obj, name, value)
+            else:
+                delattr(obj, name)
+        self._patched = []
+
+        if self._observers is not None:
+            dyn, original = self._observers
+            # observers attached after instrument() (e.g. progress) are kept
+            dyn.observers[: len(original)] = original
+            self._observers = None
+
+    def report(self, timestep_fs: float | None = None) -> dict:
+        """
+        Per-section call count, total/mean/percentiles (ms) and share of the
+        wall time, plus throughput.
+        """
+        sections = {}
+        for name, values in self.samples.items():
+            values = np.asarray(values) * 1e3
+            entry = {
+                "calls": int(len(values)),
+                "total_s": float(values.sum() / 1e3),
+                "mean_ms": float(values.mean()),
+            }
+            for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                entry[f"p{q}_ms"] = float(value)
+            if self.wall_time:
+                entry["share"] = entry["total_s"] / self.wall_time
+            sections[name] = entry
+
+        calc = sections.get("calculator")
+        forward = sections.get("model_forward")
+        if calc is not None and forward is not None:
+            sections["graph_and_overhead"] = {
+                "calls": calc["calls"],
+                "total_s": calc["total_s"] - forward["total_s"],
+                "mean_ms": calc["mean_ms"] - forward["mean_ms"],
+            }
+            if self.wall_time:
+                sections["graph_and_overhead"]["share"] = sections["graph_and_overhead"]["total_s"] / self.wall_time
+
+        report = {"steps": self.n_steps, "wall_time_s": self.wall_time, "sections": sections}
+
+        if self.wall_time and self.n_steps:
+            steps_per_s = self.n_steps / self.wall_time
+            report["steps_per_s"] = steps_per_s
+            if timestep_fs is not None:
+                report["ns_per_day"] = steps_per_s * timestep_fs * 86400 / 1e6
+
+        return report
+
+    def write_report(self, path, timestep_fs: float | None = None) -> dict:
+        """
+        Write the report as JSON, or as one CSV row per section for *.csv.
+        """
+        path = Path(path)
+        report = self.report(timestep_fs)
+
+        if path.suffix == ".csv":
+            columns = ["section", "calls", "total_s", "mean_ms"]
+            columns += [f"p{q}_ms" for q in PERCENTILES] + ["share"]
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=columns, restval="")
+                writer.writeheader()
+                for name, entry in report["sections"].items():
+                    writer.writerow({"section": name, **entry})
+        else:
+            with path.open("w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+        return report
+
+
+def print_report(report: dict) -> None:
+    print(f"{'section':<40} {'calls':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'share':>7}")
+    for name, entry in sorted(report["sections"].items(), key=lambda item: -item[1]["total_s"]):
+        line = f"{name:<40} {entry['calls']:>7d} {entry['total_s']:>9.3f} {entry['mean_ms']:>9.3f}"
+        if "p50_ms" in entry:
+            line += f" {entry['p50_ms']:>9.3f} {entry['p99_ms']:>9.3f}"
+        else:
+            line += f" {'':>9} {'':>9}"
+        if "share" in entry:
+            line += f" {100 * entry['share']:>6.1f}%"
+        print(line)
+
+    if "steps_per_s" in report:
+        print(f"Steps/s: {report['steps_per_s']:.2f}")
+    if "ns_per_day" in report:
+        print(f"ns/day: {report['ns_per_day']:.4f}")
+
+
+def attach_profiler(dyn, atoms, cfg: dict):
+    """
+    Instrument dyn/atoms if profiling.enabled; call after all observers are
+    attached. Returns the StepProfiler or None.
+    """
+    profiling_cfg = cfg.get("profiling", {})
+    if profiling_cfg is None:
+        profiling_cfg = {}
+
+    if profiling_cfg.get("enabled", False) is not True:
+        return None
+
+    profiler = StepProfiler()
+    profiler.instrument(dyn, atoms)
+    return profiler
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from pathlib import Path
+
+import yaml
+from ase.io import write
+
+from mof_ase_md.config.validator import check_timestep
+from mof_ase_md.system.atoms import load_atoms
+from mof_ase_md.calculator.batch import ReplicaBatch, ReplicaCalculator
+from mof_ase_md.md.exchange import ReplicaExchange, geometric_ladder
+from mof_ase_md.md.velocities import initialize_velocities
+from mof_ase_md.md.dynamics import make_dynamics
+from mof_ase_md.md.outputs import attach_outputs
+from mof_ase_md.md.safety import attach_watchdog
+from mof_ase_md.resources import apply_resources
+
+
+def replica_configs(cfg: dict) -> list[dict]:
+    """
+    Expand a config with md.replicas = N into N per-replica configs.
+
+    Each replica writes into <output.workdir>/replica_XXX. Optional per-replica
+    overrides come from the top-level `replicas` block:
+      replicas.temperatures_K       (list, one per replica)
+      replicas.temperature_range_K  ([T_min, T_max], geometric ladder)
+      replicas.seeds                (list, one per replica)
+    Without explicit seeds, replica i uses velocities.seed + i (if a seed is set).
+    """
+    n_replicas = cfg["md"].get("replicas", 1)
+
+    replicas_cfg = cfg.get("replicas", {})
+    if replicas_cfg is None:
+        replicas_cfg = {}
+
+    temperatures_K = replicas_cfg.get("temperatures_K", None)
+    temperature_range = replicas_cfg.get("temperature_range_K", None)
+    if temperature_range is not None:
+        temperatures_K = geometric_ladder(temperature_range[0], temperature_range[1], n_replicas)
+
+    seeds = replicas_cfg.get("seeds", None)
+    base_seed = cfg.get("velocities", {}).get("seed", None)
+
+    workdir = Path(cfg["output"]["workdir"])
+
+    configs = []
+    for index in range(n_replicas):
+        replica_cfg = copy.deepcopy(cfg)
+        replica_cfg["output"]["workdir"] = str(workdir / f"replica_{index:03d}")
+
+        if temperatures_K is not None:
+            replica_cfg.setdefault("state", {})["temperature_K"] = temperatures_K[index]
+
+        seed = None
+        if seeds is not None:
+            seed = seeds[index]
+        elif base_seed is not None:
+            seed = base_seed + index
+
+        if seed is not None:
+            replica_cfg.setdefault("velocities", {})["seed"] = seed
+
+        configs.append(replica_cfg)
+
+    return configs
+
+
+def _batch_evaluator(cfg: dict, calculator):
+    """
+    Function answering a list of force requests: one batched forward pass for
+    ORB, the requests in turn for the other calculators.
+    """
+    if cfg["calculator"]["name"] == "orb":
+        from mof_ase_md.calculator.orb import predict_batch
+
+        def evaluate(atoms_list):
+            return predict_batch(calculator, atoms_list)
+
+        return evaluate
+
+    def evaluate(atoms_list):
+        results = []
+        for atoms in atoms_list:
+            properties = ["energy", "forces"]
+            if "stress" in calculator.implemented_properties and atoms.cell.rank == 3:
+                properties.append("stress")
+            calculator.calculate(atoms, properties)
+            results.append(dict(calculator.results))
+        return results
+
+    return evaluate
+
+
+def _run_lockstep(batch: ReplicaBatch, dynamics_list: list, steps: int) -> list:
+    """
+    Advance every dynamics object by `steps` in its own thread; returns the
+    exceptions raised.
+    """
+    errors = []
+
+    def drive(dynamics):
+        try:
+            dynamics.run(steps)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            batch.leave()
+
+    batch.start(len(dynamics_list))
+
+    threads = []
+    for dynamics in dynamics_list:
+        thread = threading.Thread(target=drive, args=(dynamics,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    return errors
+
+
+def run_replicas(cfg: dict) -> list[Path]:
+    """
+    Run md.replicas independent copies of the system in lockstep.
+
+    Every replica gets its own dynamics object and outputs, but all force
+    requests of one step are answered by a single batched ORB forward pass.
+
+    With replicas.exchange_interval set (NVT, a temperature ladder) this is
+    replica exchange: every exchange_interval steps the replicas stop and
+    neighbouring temperatures attempt Metropolis swaps of their
+    configurations. Each replica_XXX folder then holds the trajectory of one
+    temperature; exchange.csv, walkers.csv and exchange_summary.json in
+    output.workdir record the attempts, acceptance and walker order.
+    """
+    from mof_ase_md.calculator.factory import build_calculator
+
+    total_steps = cfg["md"]["total_steps"]
+
+    replicas_cfg = cfg.get("replicas", {})
+    if replicas_cfg is None:
+        replicas_cfg = {}
+    exchange_interval = replicas_cfg.get("exchange_interval", None)
+
+    atoms0 = load_atoms(cfg)
+    check_timestep(cfg, atoms0)
+    apply_resources(cfg)
+    calculator = build_calculator(cfg)
+
+    batch = ReplicaBatch(_batch_evaluator(cfg, calculator))
+
+    replicas = []
+    for index, replica_cfg in enumerate(replica_configs(cfg)):
+        atoms = atoms0.copy()
+        atoms.calc = ReplicaCalculator(batch, index, calculator.implemented_properties)
+
+        initialize_velocities(atoms, replica_cfg)
+        dynamics = make_dynamics(atoms, replica_cfg)
+        watchdog = attach_watchdog(dynamics, atoms, replica_cfg)
+        outputs = attach_outputs(dynamics, atoms, replica_cfg)
+        if watchdog is not None:
+            watchdog.track(outputs)
+
+        replicas.append((replica_cfg, atoms, dynamics, watchdog, outputs))
+
+    atoms_list = [r[1] for r in replicas]
+    dynamics_list = [r[2] for r in replicas]
+    watchdogs = [r[3] for r in replicas]
+
+    exchange = None
+    if exchange_interval is not None:
+        seed = replicas_cfg.get("exchange_seed", None)
+        if seed is None:
+            seed = cfg.get("velocities", {}).get("seed", None)
+        temperatures_K = [r[0]["state"]["temperature_K"] for r in replicas]
+        exchange = ReplicaExchange(temperatures_K, cfg["output"]["workdir"], seed=seed)
+        print("Replica exchange ladder (K):", ", ".join(f"{t:.1f}" for t in temperatures_K))
+
+    segment = exchange_interval or total_steps
+
+    t0 = time.perf_counter()
+    errors = []
+    done = 0
+    while done < total_steps and not errors:
+        steps = min(segment, total_steps - done)
+        errors = _run_lockstep(batch, dynamics_list, steps)
+        done += steps
+
+        if not errors:
+            behind = [i for i, dynamics in enumerate(dynamics_list) if dynamics.nsteps != done]
+            if behind:
+                errors = [RuntimeError(
+                    f"Replicas {', '.join(map(str, behind))} are not at step {done} after a lockstep segment"
+                )]
+
+        if exchange is not None and done < total_steps and not errors:
+            exchange.attempt(done, atoms_list, dynamics_list, watchdogs)
+    wall_time = time.perf_counter() - t0
+
+    for *_, outputs in replicas:
+        outputs.close(error=bool(errors))
+    if exchange is not None:
+        exchange.close()
+
+    if errors:
+        raise errors[0]
+
+    workdirs = []
+    for replica_cfg, atoms, *_ in replicas:
+        output_cfg = replica_cfg["output"]
+        workdir = Path(output_cfg["workdir"])
+
+        final_name = output_cfg.get("final_structure", "final.xyz")
+        write(str(workdir / final_name), atoms)
+
+        write_copy = output_cfg.get("write_config_copy", True)
+        if write_copy is True:
+            dst = workdir / "config_used.yaml"
+            with open(dst, "w", encoding="utf-8") as f:
+                yaml.safe_dump(replica_cfg, f, sort_keys=False)
+
+        workdirs.append(workdir)
+
+    aggregate = len(replicas) * total_steps / wall_time if wall_time > 0 else 0.0
+
+    print("REPLICAS COMPLETE")
+    print("Replicas:", len(replicas))
+    print("Batched evaluations:", batch.n_evaluations)
+    print(f"Aggregate steps/s: {aggregate:.2f}")
+    if exchange is not None:
+        rates = exchange.acceptance_rates()
+        print("Exchange rounds:", exchange.n_rounds)
+        for i, rate in enumerate(rates):
+            t_i, t_j = exchange.temperatures_K[i], exchange.temperatures_K[i + 1]
+            shown = "n/a" if rate is None else f"{rate:.3f}"
+            print(f"  acceptance {t_i:.1f} K <-> {t_j:.1f} K: {shown}")
+    print("Workdir:", cfg["output"]["workdir"])
+
+    return workdirs
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from ase import units
+from ase.md.md import MolecularDynamics
+
+
+class RESPA(MolecularDynamics):
+    """
+    Reversible RESPA multiple-time-step integrator (Tuckerman, Berne, Martyna 1992).
+
+    The force is split into a fast part from a cheap inner calculator and a
+    slow correction (main calculator - inner calculator). One step of length
+    `timestep` applies half a slow kick, `inner_steps` velocity-Verlet steps
+    driven by the fast force alone, then the main calculator once and the
+    second half slow kick. The main calculator (atoms.calc, e.g. ORB) is
+    therefore evaluated once per step instead of once per inner step.
+
+    With temperature_K and friction, every inner step is a BAOAB Langevin
+    step (NVT); otherwise the scheme is NVE.
+
+    With fit_inner, an inner model that supports it (HarmonicBondCalculator)
+    has its force constants fitted to the main calculator before the first
+    step. The fitted parameters are kept on the integrator, so they are
+    checkpointed and restored with it.
+    """
+
+    def __init__(
+        self,
+        atoms,
+        timestep: float,
+        inner_calculator,
+        inner_steps: int = 4,
+        temperature_K: float | None = None,
+        friction: float | None = None,
+        fixcm: bool = True,
+        rng=None,
+        fit_inner: bool = True,
+        **kwargs,
+    ):
+        super().__init__(atoms, timestep, **kwargs)
+
+        self.inner_calculator = inner_calculator
+        self.inner_steps = int(inner_steps)
+        self.temperature_K = temperature_K
+        self.friction = friction
+        self.fixcm = fixcm
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.fit_inner = fit_inner
+
+        self.n_outer_force_calls = 0
+        self.n_inner_force_calls = 0
+
+        self._fast = None
+        self._slow = None
+        self._inner_state = None
+        self._update_coefficients()
+
+    @property
+    def thermostat(self) -> bool:
+        return self.temperature_K is not None and self.friction is not None
+
+    def _update_coefficients(self) -> None:
+        self.inner_dt = self.dt / self.inner_steps
+        if self.thermostat:
+            self._c1 = math.exp(-self.friction * self.inner_dt)
+            self._c2 = math.sqrt(1.0 - self._c1**2)
+
+    def set_timestep(self, timestep: float) -> None:
+        self.dt = timestep
+        self._update_coefficients()
+
+    def _prepare_inner(self) -> None:
+        inner = self.inner_calculator
+        if not hasattr(inner, "get_state") or inner.bonds is not None:
+            return
+
+        if self._inner_state is not None:
+            inner.set_state(self._inner_state)
+            return
+
+        if self.fit_inner:
+            fitted = inner.fit_force_constants(self.atoms, self.atoms.calc)
+            print("RESPA inner model, fitted k (eV/A^2):", ", ".join(f"{k} {v:.1f}" for k, v in fitted.items()))
+        else:
+            inner.detect_bonds(self.atoms)
+
+        self._inner_state = inner.get_state()
+
+    def _fast_forces(self) -> np.ndarray:
+        forces = self.inner_calculator.get_forces(self.atoms)
+        for constraint in self.atoms.constraints:
+            constraint.adjust_forces(self.atoms, forces)
+        self.n_inner_force_calls += 1
+        return forces
+
+    def _slow_forces(self) -> np.ndarray:
+        self.n_outer_force_calls += 1
+        return self.atoms.get_forces(md=True) - self._fast
+
+    def _langevin(self, momenta: np.ndarray) -> np.ndarray:
+        kT = units.kB * self.temperature_K
+        noise = self.rng.standard_normal(size=momenta.shape)
+        momenta = self._c1 * momenta + self._c2 * np.sqrt(self.masses * kT) * noise
+
+        if self.fixcm:
+            momenta -= momenta.sum(axis=0) / len(momenta)
+
+        return momenta
+
+    def step(self):
+        atoms = self.atoms
+        masses = self.masses
+
+        self._prepare_inner()
+
+        if self._fast is None:
+            self._fast = self._fast_forces()
+            self._slow = self._slow_forces()
+
+        dt = self.inner_dt
+        momenta = atoms.get_momenta()
+        momenta += 0.5 * self.dt * self._slow
+
+        for _ in range(self.inner_steps):
+            momenta += 0.5 * dt * self._fast
+
+            if self.thermostat:
+                atoms.set_positions(atoms.positions + 0.5 * dt * momenta / masses)
+                momenta = self._langevin(momenta)
+                atoms.set_positions(atoms.positions + 0.5 * dt * momenta / masses)
+            else:
+                atoms.set_positions(atoms.positions + dt * momenta / masses)
+
+            # constraints may have moved the positions; keep momenta consistent
+            atoms.set_momenta(momenta, apply_constraint=False)
+            self._fast = self._fast_forces()
+            momenta = atoms.get_momenta()
+            momenta += 0.5 * dt * self._fast
+
+        atoms.set_momenta(momenta, apply_constraint=False)
+        self._slow = self._slow_forces()
+
+        momenta = atoms.get_momenta()
+        momenta += 0.5 * self.dt * self._slow
+        atoms.set_momenta(momenta, apply_constraint=False)
+
+    def respa_stats(self) -> dict:
+        """
+        Main-calculator calls per ps made vs. what plain MD at the inner
+        timestep would need for the same simulated time.
+        """
+        simulated_ps = self.nsteps * self.dt / (1000.0 * units.fs)
+        inner_fs = self.inner_dt / units.fs
+
+        stats = {
+            "respa_inner_steps": self.inner_steps,
+            "respa_inner_timestep_fs": inner_fs,
+            "respa_main_calls": self.n_outer_force_calls,
+            "respa_inner_calls": self.n_inner_force_calls,
+        }
+        if simulated_ps > 0:
+            actual = self.n_outer_force_calls / simulated_ps
+            reference = 1000.0 / inner_fs
+            stats["respa_main_calls_per_ps"] = actual
+            stats["respa_main_calls_saved_per_ps"] = reference - actual
+        return stats
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+from ase import units
+
+from mof_ase_md.md.checkpoint import capture_state, restore_state
+from mof_ase_md.md.dynamics import set_timestep
+
+
+class SafetyError(RuntimeError):
+    pass
+
+
+class Watchdog:
+    """
+    Low-overhead dynamics observer that enforces the `safety` block.
+
+    Checks (each only if configured): non-finite energy/forces, temperature
+    above max_temperature_K, largest atomic force above max_force_eV_A and
+    cell volume outside [min_volume_ratio, max_volume_ratio] x initial volume.
+
+    On a trip it either raises SafetyError (action "abort") or restores the
+    most recent healthy in-memory snapshot, scales the timestep by
+    timestep_factor and continues (action "rollback").
+
+    Snapshots are taken before the observers attached after the watchdog
+    record their step. A rollback rewinds the objects registered with
+    track() (output writers, running averages, analysis) to the snapshot,
+    so the restored step and the steps after it are recorded exactly once.
+    """
+
+    def __init__(
+        self,
+        dyn,
+        atoms,
+        check_nan_energy: bool = True,
+        max_temperature_K: float | None = None,
+        max_force_eV_A: float | None = None,
+        min_volume_ratio: float | None = None,
+        max_volume_ratio: float | None = None,
+        action: str = "abort",
+        snapshot_interval: int = 100,
+        ring_size: int = 3,
+        timestep_factor: float = 0.5,
+        max_rollbacks: int = 3,
+    ):
+        self.dyn = dyn
+        self.atoms = atoms
+        self.check_nan_energy = check_nan_energy
+        self.max_temperature_K = max_temperature_K
+        self.max_force_eV_A = max_force_eV_A
+        self.min_volume_ratio = min_volume_ratio
+        self.max_volume_ratio = max_volume_ratio
+        self.action = action
+        self.snapshot_interval = snapshot_interval
+        self.timestep_factor = timestep_factor
+        self.max_rollbacks = max_rollbacks
+
+        self.volume0 = None
+        if atoms.cell.rank == 3:
+            self.volume0 = atoms.get_volume()
+
+        self.n_rollbacks = 0
+        self.events = []
+        self.outputs = None
+        self.extras = {}
+        self._ring = deque(maxlen=ring_size)
+
+    def track(self, outputs=None, extras: dict | None = None) -> None:
+        """
+        Rewind these with each rollback: outputs (OutputWriters, via
+        tell/rewind) and extras, objects with state_dict/load_state_dict.
+        """
+        self.outputs = outputs
+        self.extras = {name: obj for name, obj in (extras or {}).items() if obj is not None}
+
+    def check(self) -> str | None:
+        """
+        Return a description of the first violated limit, or None.
+        """
+        atoms = self.atoms
+
+        if self.check_nan_energy:
+            energy = atoms.get_potential_energy()
+            if not np.isfinite(energy):
+                return f"non-finite potential energy ({energy})"
+
+        if self.check_nan_energy or self.max_force_eV_A is not None:
+            forces = atoms.get_forces()
+            if not np.all(np.isfinite(forces)):
+                return "non-finite forces"
+
+            if self.max_force_eV_A is not None:
+                fmax = np.sqrt((forces**2).sum(axis=1).max())
+                if fmax > self.max_force_eV_A:
+                    return f"max force {fmax:.2f} eV/A > {self.max_force_eV_A}"
+
+        if self.max_temperature_K is not None:
+            temperature = atoms.get_temperature()
+            if not temperature <= self.max_temperature_K:
+                return f"temperature {temperature:.1f} K > {self.max_temperature_K} K"
+
+        if self.volume0 is not None and (self.min_volume_ratio is not None or self.max_volume_ratio is not None):
+            ratio = atoms.get_volume() / self.volume0
+            if self.min_volume_ratio is not None and not ratio >= self.min_volume_ratio:
+                return f"volume ratio {ratio:.3f} < {self.min_volume_ratio}"
+            if self.max_volume_ratio is not None and not ratio <= self.max_volume_ratio:
+                return f"volume ratio {ratio:.3f} > {self.max_volume_ratio}"
+
+        return None
+
+    def snapshot(self) -> None:
+        atoms = self.atoms
+        dynamics_state = capture_state(self.dyn)
+        # max_steps is the target of the current run() call; a snapshot taken
+        # during an earlier call (replica exchange segments) must not end the
+        # current one early after a rollback
+        dynamics_state.pop("max_steps", None)
+        self._ring.append({
+            "positions": atoms.get_positions(),
+            "momenta": atoms.get_momenta(),
+            "cell": atoms.cell.array.copy(),
+            "dynamics_state": dynamics_state,
+            "outputs": None if self.outputs is None else self.outputs.tell(),
+            "extras": {name: obj.state_dict() for name, obj in self.extras.items()},
+        })
+
+    def clear_snapshots(self) -> None:
+        """
+        Forget the snapshots, e.g. after the configuration was replaced.
+        """
+        self._ring.clear()
+
+    def rollback(self, reason: str) -> None:
+        snap = self._ring.pop()
+
+        self.atoms.set_cell(snap["cell"], scale_atoms=False)
+        self.atoms.set_positions(snap["positions"])
+        self.atoms.set_momenta(snap["momenta"])
+        # scale the current timestep, not the one saved with the snapshot,
+        # so repeated rollbacks keep shrinking it
+        new_dt = self.dyn.dt * self.timestep_factor
+        restore_state(self.dyn, snap["dynamics_state"])
+        set_timestep(self.dyn, new_dt)
+
+        # drop what was recorded after the snapshot; the observers after the
+        # watchdog then record the restored step again
+        if snap["outputs"] is not None:
+            self.outputs.rewind(snap["outputs"])
+        for name, state in snap["extras"].items():
+            self.extras[name].load_state_dict(state)
+
+        self.n_rollbacks += 1
+        print(
+            f"SAFETY: {reason}; rolled back to step {self.dyn.nsteps}, "
+            f"timestep now {new_dt / units.fs:.4g} fs"
+        )
+
+    def __call__(self):
+        reason = self.check()
+
+        if reason is None:
+            if self.dyn.nsteps % self.snapshot_interval == 0:
+                self.snapshot()
+            return
+
+        self.events.append((self.dyn.nsteps, reason))
+
+        if self.action == "rollback" and self._ring and self.n_rollbacks < self.max_rollbacks:
+            self.rollback(reason)
+            return
+
+        raise SafetyError(f"step {self.dyn.nsteps}: {reason}")
+
+
+def attach_watchdog(dyn, atoms, cfg: dict, interval: int | None = None):
+    """
+    Attach a Watchdog built from cfg["safety"], or return None if the block
+    enables no checks. Attach it before the output writers so that a tripped
+    step is never written.
+    """
+    safety_cfg = cfg.get("safety", {})
+    if safety_cfg is None:
+        safety_cfg = {}
+
+    check_nan_energy = safety_cfg.get("check_nan_energy", False)
+    max_temperature_K = safety_cfg.get("max_temperature_K", None)
+    max_force = safety_cfg.get("max_force_eV_A", None)
+    min_volume_ratio = safety_cfg.get("min_volume_ratio", None)
+    max_volume_ratio = safety_cfg.get("max_volume_ratio", None)
+
+    enabled = (
+        check_nan_energy
+        or max_temperature_K is not None
+        or max_force is not None
+        or min_volume_ratio is not None
+        or max_volume_ratio is not None
+    )
+    if not enabled:
+        return None
+
+    watchdog = Watchdog(
+        dyn,
+        atoms,
+        check_nan_energy=check_nan_energy,
+        max_temperature_K=max_temperature_K,
+        max_force_eV_A=max_force,
+        min_volume_ratio=min_volume_ratio,
+        max_volume_ratio=max_volume_ratio,
+        action=safety_cfg.get("action", "abort"),
+        snapshot_interval=safety_cfg.get("snapshot_interval", 100),
+        ring_size=safety_cfg.get("ring_size", 3),
+        timestep_factor=safety_cfg.get("timestep_factor", 0.5),
+        max_rollbacks=safety_cfg.get("max_rollbacks", 3),
+    )
+
+    if interval is None:
+        interval = safety_cfg.get("check_interval", 1)
+
+    dyn.attach(watchdog, interval=interval)
+    return watchdog
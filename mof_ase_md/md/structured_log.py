@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from ase import units
+from ase.calculators.calculator import PropertyNotImplementedError
+
+from mof_ase_md.md.log_columns import COLUMN_SPECS, COMPONENT_NAMES, DEFAULT_COLUMNS
+
+
+# first bytes of a binary log; followed by the header length (uint64) and a
+# JSON header, then fixed-size little-endian records
+BINARY_MAGIC = b"MOFLOG1\n"
+
+
+def conserved_energy(dyn, atoms, etot: float | None = None) -> float:
+    """
+    The integrator's conserved quantity (eV): total energy for NVE, the
+    extended-system energy for Nose-Hoover chain / MTK and Melchionna NPT,
+    total energy minus the thermostat's transferred energy for Bussi. NaN
+    for integrators without one (Langevin, Berendsen, Andersen).
+    """
+    if hasattr(dyn, "get_conserved_energy"):
+        return float(dyn.get_conserved_energy())
+
+    if etot is None:
+        etot = atoms.get_potential_energy() + atoms.get_kinetic_energy()
+    if hasattr(dyn, "transferred_energy"):
+        return etot - float(dyn.transferred_energy)
+    if hasattr(dyn, "get_gibbs_free_energy"):
+        # Melchionna initialises itself (and its history) on first use
+        if getattr(dyn, "initialized", False):
+            return float(dyn.get_gibbs_free_energy())
+        return float("nan")
+
+    from ase.md.verlet import VelocityVerlet
+    from mof_ase_md.md.respa import RESPA
+
+    if isinstance(dyn, VelocityVerlet) or (isinstance(dyn, RESPA) and not dyn.thermostat):
+        return etot
+    return float("nan")
+
+
+def graph_builds(atoms) -> int:
+    """
+    Neighbour-graph builds so far of a skin-graph calculator (calculator.skin_A
+    > 0), also from an output snapshot of one; -1 for other calculators.
+    """
+    calc = atoms.calc
+    if hasattr(calc, "graph_stats"):
+        return int(calc.graph_stats()["graph_builds"])
+    return int(getattr(calc, "graph_builds", -1))
+
+
+class StructuredLogWriter:
+    """
+    Dynamics observer writing one typed row per call to a binary or CSV log.
+
+    Rows are collected in a NumPy buffer and appended to the file in chunks
+    of chunk_rows, or earlier when flush_interval_s has passed since the last
+    write, so a log line costs no file I/O in the integrator loop. A crash
+    can lose at most the buffered rows; a partially written last row is cut
+    off when the file is appended to and ignored by read_md_log.
+
+    Binary: BINARY_MAGIC, uint64 header length, JSON header (columns, dtypes,
+    shapes, species), then fixed-size records. CSV: a header row with one
+    column per component (stress_GPa_xx, temperature_species_K_Cu, ...).
+    """
+
+    def __init__(
+        self,
+        dyn,
+        atoms,
+        path,
+        fmt: str = "binary",
+        columns: list | None = None,
+        mode: str = "w",
+        chunk_rows: int = 100,
+        flush_interval_s: float = 60.0,
+    ):
+        if fmt not in ("binary", "csv"):
+            raise ValueError(f"Unknown structured log format: {fmt}")
+
+        self.dyn = dyn
+        self.atoms = atoms
+        self.path = Path(path)
+        self.fmt = fmt
+        self.columns = list(DEFAULT_COLUMNS if columns is None else columns)
+        self.chunk_rows = int(chunk_rows)
+        self.flush_interval_s = float(flush_interval_s)
+
+        for name in self.columns:
+            if name not in COLUMN_SPECS:
+                raise ValueError(f"Unknown log column: {name}")
+
+        symbols = atoms.get_chemical_symbols()
+        self.species = sorted(set(symbols))
+        self._species_index = [np.flatnonzero(np.array(symbols) == s) for s in self.species]
+
+        self.header = {
+            "columns": [
+                {"name": name, "dtype": COLUMN_SPECS[name][0], "shape": self._shape(name)}
+                for name in self.columns
+            ],
+            "species": self.species,
+            "natoms": len(atoms),
+        }
+        self.dtype = _record_dtype(self.header["columns"])
+
+        self._buffer = np.zeros(self.chunk_rows, dtype=self.dtype)
+        self._n_buffered = 0
+        self._last_flush = time.monotonic()
+        self._has_stress = atoms.cell.rank == 3
+
+        self._file = self._open(mode)
+
+    def _shape(self, name: str) -> list:
+        width = COLUMN_SPECS[name][1]
+        if width is None:
+            return [len(self.species)]
+        return [] if width == 1 else [width]
+
+    def _csv_names(self) -> list[str]:
+        names = []
+        for name in self.columns:
+            if name == "temperature_species_K":
+                names.extend(f"{name}_{s}" for s in self.species)
+            elif name in COMPONENT_NAMES:
+                names.extend(f"{name}_{c}" for c in COMPONENT_NAMES[name])
+            else:
+                names.append(name)
+        return names
+
+    def _open(self, mode: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if mode == "a" and self.path.exists() and self.path.stat().st_size > 0:
+            self._truncate_partial_row()
+            return self.path.open("ab")
+
+        f = self.path.open("wb")
+        if self.fmt == "binary":
+            header = json.dumps(self.header).encode("utf-8")
+            # records start 8-byte aligned
+            header += b" " * (-(len(BINARY_MAGIC) + 8 + len(header)) % 8)
+            f.write(BINARY_MAGIC + np.uint64(len(header)).tobytes() + header)
+        else:
+            f.write((",".join(self._csv_names()) + "\n").encode("utf-8"))
+        f.flush()
+        return f
+
+    def _truncate_partial_row(self) -> None:
+        """
+        Check that the existing log has this writer's layout and cut off a
+        partially written last row.
+        """
+        if self.fmt == "binary":
+            header, offset = _read_binary_header(self.path)
+            if header["columns"] != self.header["columns"]:
+                raise ValueError(f"Cannot append to {self.path}: it was written with other log columns")
+            size = self.path.stat().st_size
+            whole = offset + (size - offset) // self.dtype.itemsize * self.dtype.itemsize
+        else:
+            with self.path.open("rb") as f:
+                first = f.readline().decode("utf-8").rstrip("\r\n")
+                if first != ",".join(self._csv_names()):
+                    raise ValueError(f"Cannot append to {self.path}: it was written with other log columns")
+                data = f.read()
+            whole = len(first) + 1 + data.rfind(b"\n") + 1
+            size = self.path.stat().st_size
+
+        if whole != size:
+            os.truncate(self.path, whole)
+
+    # ---- values ----
+
+    def _stress(self):
+        if not self._has_stress:
+            return None
+        try:
+            return self.atoms.get_stress(include_ideal_gas=True)
+        except PropertyNotImplementedError:
+            self._has_stress = False
+            return None
+
+    def _row(self, row) -> None:
+        atoms = self.atoms
+        epot = atoms.get_potential_energy()
+        ekin = atoms.get_kinetic_energy()
+        stress = self._stress() if {"stress_GPa", "pressure_bar"} & set(self.columns) else None
+
+        for name in self.columns:
+            if name == "step":
+                row[name] = self.dyn.nsteps
+            elif name == "time_ps":
+                row[name] = self.dyn.get_time() / (1000.0 * units.fs)
+            elif name == "timestep_fs":
+                row[name] = self.dyn.dt / units.fs
+            elif name == "epot_eV":
+                row[name] = epot
+            elif name == "ekin_eV":
+                row[name] = ekin
+            elif name == "etot_eV":
+                row[name] = epot + ekin
+            elif name == "conserved_eV":
+                row[name] = conserved_energy(self.dyn, atoms, etot=epot + ekin)
+            elif name == "temperature_K":
+                row[name] = atoms.get_temperature()
+            elif name == "temperature_species_K":
+                row[name] = self._species_temperatures()
+            elif name == "volume_A3":
+                row[name] = atoms.get_volume() if atoms.cell.rank == 3 else np.nan
+            elif name == "pressure_bar":
+                row[name] = -stress[:3].mean() / units.bar if stress is not None else np.nan
+            elif name == "stress_GPa":
+                row[name] = stress / units.GPa if stress is not None else np.nan
+            elif name == "cell_params":
+                row[name] = atoms.cell.cellpar()
+            elif name == "cell_A":
+                row[name] = atoms.cell.array.ravel()
+            elif name == "max_force_eV_A":
+                row[name] = np.linalg.norm(atoms.get_forces(), axis=1).max()
+            elif name == "graph_builds":
+                row[name] = graph_builds(atoms)
+
+    def _species_temperatures(self) -> np.ndarray:
+        # equipartition per species: T = 2 Ekin / (3 N kB)
+        momenta = self.atoms.get_momenta()
+        masses = self.atoms.get_masses()
+        ekin = 0.5 * (momenta**2).sum(axis=1) / masses
+        return np.array([2.0 * ekin[index].sum() / (3.0 * len(index) * units.kB) for index in self._species_index])
+
+    # ---- observer ----
+
+    def __call__(self) -> None:
+        self._row(self._buffer[self._n_buffered])
+        self._n_buffered += 1
+
+        if self._n_buffered == self.chunk_rows or time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Append the buffered rows to the file.
+        """
+        if self._n_buffered > 0:
+            rows = self._buffer[: self._n_buffered]
+            if self.fmt == "binary":
+                self._file.write(rows.tobytes())
+            else:
+                self._file.write(_format_csv(rows, self.columns).encode("utf-8"))
+            self._file.flush()
+            self._n_buffered = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+def _record_dtype(columns: list[dict]) -> np.dtype:
+    return np.dtype([(c["name"], c["dtype"], tuple(c["shape"])) for c in columns])
+
+
+def _format_csv(rows: np.ndarray, columns: list[str]) -> str:
+    parts = []
+    for name in columns:
+        values = rows[name]
+        if values.ndim == 1:
+            values = values[:, None]
+        fmt = "%d" if values.dtype.kind == "i" else "%.10g"
+        parts.append(np.char.mod(fmt, values))
+    table = np.concatenate(parts, axis=1)
+    return "".join(",".join(line) + "\n" for line in table)
+
+
+def _read_binary_header(path: Path) -> tuple[dict, int]:
+    with path.open("rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"Not a binary MD log: {path}")
+        length = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, len(BINARY_MAGIC) + 8 + length
+
+
+def _read_csv(path: Path) -> dict:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        names = next(csv.reader(f))
+
+    table = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    if table.shape[0] and table.shape[1] != len(names):
+        raise ValueError(f"Malformed CSV log: {path}")
+
+    data = {}
+    for i, name in enumerate(names):
+        data[name] = table[:, i] if table.shape[0] else np.empty(0)
+    for name in ("step", "graph_builds"):
+        if name in data:
+            data[name] = data[name].astype(np.int64)
+
+    # regroup the components of the multi-value columns
+    for base, components in COMPONENT_NAMES.items():
+        keys = [f"{base}_{c}" for c in components]
+        if all(key in data for key in keys):
+            data[base] = np.stack([data.pop(key) for key in keys], axis=1)
+    species = [name[len("temperature_species_K_"):] for name in names if name.startswith("temperature_species_K_")]
+    if species:
+        data["temperature_species_K"] = np.stack([data.pop(f"temperature_species_K_{s}") for s in species], axis=1)
+        data["species"] = species
+    return data
+
+
+def _read_text(path: Path) -> dict:
+    """
+    ASE MDLogger text log: Time[ps] Etot Epot Ekin T[K] (+ 6 stress [GPa])
+    (+ Builds, graph builds of a skin-graph calculator).
+    """
+    with path.open("r", encoding="utf-8") as f:
+        first = f.readline()
+    per_atom = "/N" in first
+
+    # header lines (repeated when a run was resumed with header: true) start with Time
+    table = np.loadtxt(path, ndmin=2, comments="Time")
+    suffix = "_eV_atom" if per_atom else "_eV"
+    names = ["time_ps", f"etot{suffix}", f"epot{suffix}", f"ekin{suffix}", "temperature_K"]
+
+    data = {name: table[:, i] for i, name in enumerate(names)}
+    if table.shape[1] >= 11:
+        data["stress_GPa"] = table[:, 5:11]
+    if "Builds" in first or table.shape[1] in (6, 12):
+        data["graph_builds"] = table[:, -1].astype(np.int64)
+    return data
+
+
+def _row_ends(path: Path) -> tuple[int, np.ndarray]:
+    """
+    Byte offset of the first row and just past each complete row of a
+    binary, CSV or ASE text log.
+    """
+    with path.open("rb") as f:
+        start = f.read(len(BINARY_MAGIC))
+
+    if start == BINARY_MAGIC:
+        header, offset = _read_binary_header(path)
+        itemsize = _record_dtype(header["columns"]).itemsize
+        count = (path.stat().st_size - offset) // itemsize
+        return offset, offset + itemsize * np.arange(1, count + 1, dtype=np.int64)
+
+    first = None
+    ends = []
+    position = 0
+    with path.open("rb") as f:
+        for i, line in enumerate(f):
+            if not line.endswith(b"\n"):
+                break
+            is_header = (i == 0 and b"," in line) or line.lstrip().startswith(b"Time") or not line.strip()
+            if not is_header:
+                if first is None:
+                    first = position
+                ends.append(position + len(line))
+            position += len(line)
+    if first is None:
+        first = position
+    return first, np.asarray(ends, dtype=np.int64)
+
+
+def count_log_rows(path) -> int:
+    """
+    Number of complete rows in an MD log (0 if it does not exist).
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return 0
+    return len(_row_ends(path)[1])
+
+
+def truncate_log(path, n_rows: int) -> None:
+    """
+    Cut a (closed) MD log back to its first n_rows rows, keeping its header.
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return
+
+    first, ends = _row_ends(path)
+    if n_rows >= len(ends):
+        return
+    os.truncate(path, int(ends[n_rows - 1]) if n_rows > 0 else first)
+
+
+def read_md_log(path) -> dict:
+    """
+    Load an MD log into NumPy arrays: {column: array with one row per log
+    line}, multi-value columns as 2-D arrays. Binary logs are read with a
+    single np.fromfile; CSV and ASE text logs with np.loadtxt. The format is
+    detected from the file contents.
+    """
+    path = Path(path)
+    with path.open("rb") as f:
+        start = f.read(len(BINARY_MAGIC))
+        f.seek(0)
+        first = f.readline()
+
+    if start == BINARY_MAGIC:
+        header, offset = _read_binary_header(path)
+        dtype = _record_dtype(header["columns"])
+        count = (path.stat().st_size - offset) // dtype.itemsize
+        records = np.fromfile(path, dtype=dtype, count=count, offset=offset)
+        data = {name: np.ascontiguousarray(records[name]) for name in dtype.names}
+        if "temperature_species_K" in data:
+            data["species"] = header["species"]
+        return data
+
+    # MDLogger lines are whitespace separated
+    if b"," in first:
+        return _read_csv(path)
+    return _read_text(path)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import numpy as np
 from ase.md.velocitydistribution import (
     MaxwellBoltzmannDistribution,
     Stationary,
@@ -23,6 +24,9 @@ def initialize_velocities(atoms, cfg: dict):
         temperature_K = state_cfg["temperature_K"]
 
     seed = vel_cfg.get("seed", None)
+    rng = None
+    if seed is not None:
+        rng = np.random.default_rng(seed)
 
     if method == "none":
         pass
@@ -34,6 +38,7 @@ def initialize_velocities(atoms, cfg: dict):
         MaxwellBoltzmannDistribution(
             atoms,
             temperature_K=temperature_K,
+            rng=rng,
         )
 
     else:
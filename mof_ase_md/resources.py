@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import time
+from pathlib import Path
+
+
+# thread pools read these at start-up: they cover child processes and any
+# library that is imported after apply_resources
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# last settings applied in this process; torch only accepts the inter-op
+# thread count once
+_APPLIED: dict = {}
+
+
+def parse_cpu_list(value) -> list[int]:
+    """
+    "0-3,8,10-11" (Linux cpulist syntax) or a list of ints -> sorted CPU ids.
+    """
+    if isinstance(value, (list, tuple)):
+        return sorted({int(cpu) for cpu in value})
+
+    cpus = set()
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: list[int]) -> str:
+    """
+    Inverse of parse_cpu_list: [0, 1, 2, 3, 8] -> "0-3,8".
+    """
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes() -> dict[int, list[int]]:
+    """
+    NUMA node -> CPU ids, from sysfs. Empty if the topology is not readable.
+    """
+    root = Path("/sys/devices/system/node")
+    nodes = {}
+    for path in sorted(root.glob("node[0-9]*")):
+        cpulist = path / "cpulist"
+        if cpulist.exists():
+            cpus = parse_cpu_list(cpulist.read_text().strip())
+            if cpus:
+                nodes[int(path.name[4:])] = cpus
+    return nodes
+
+
+def physical_cpus(cpus: list[int]) -> list[int]:
+    """
+    Drop SMT siblings: keep the first logical CPU of every physical core.
+    """
+    keep = []
+    seen = set()
+    for cpu in cpus:
+        siblings = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list")
+        core = tuple(parse_cpu_list(siblings.read_text().strip())) if siblings.exists() else (cpu,)
+        if core not in seen:
+            seen.add(core)
+            keep.append(cpu)
+    return keep
+
+
+def resolve_resources(resources: dict) -> dict:
+    """
+    Resolved settings for a resources block: cpus restricted to numa_node,
+    threads defaulting to the number of pinned CPUs.
+    """
+    cpus = None
+    if resources.get("cpus") is not None:
+        cpus = parse_cpu_list(resources["cpus"])
+
+    numa_node = resources.get("numa_node")
+    if numa_node is not None:
+        nodes = numa_nodes()
+        if numa_node not in nodes:
+            raise ValueError(f"resources.numa_node {numa_node} not found (nodes: {sorted(nodes)})")
+        node_cpus = nodes[numa_node]
+        cpus = node_cpus if cpus is None else [cpu for cpu in cpus if cpu in node_cpus]
+        if not cpus:
+            raise ValueError(f"resources.cpus has no CPU on NUMA node {numa_node}")
+
+    threads = resources.get("threads")
+    if threads is None and cpus is not None:
+        threads = len(cpus)
+
+    return {
+        "threads": threads,
+        "interop_threads": resources.get("interop_threads"),
+        "cpus": cpus,
+        "numa_node": numa_node,
+    }
+
+
+def apply_resources(cfg: dict) -> dict:
+    """
+    Apply cfg["resources"] to this process; call before the calculator is built.
+
+      threads          torch intra-op threads, plus OpenMP/BLAS via env vars
+                       (and threadpoolctl if installed)
+      interop_threads  torch inter-op threads
+      cpus             core affinity, "0-15" or a list
+      numa_node        restrict to the CPUs of this node; memory then follows
+                       by first touch (no explicit memory binding)
+
+    Without a resources block nothing is changed. Returns the applied
+    settings.
+    """
+    resources = cfg.get("resources") or {}
+    if not resources:
+        return {}
+
+    settings = resolve_resources(resources)
+    if settings == _APPLIED:
+        return settings
+
+    cpus = settings["cpus"]
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    threads = settings["threads"]
+    if threads is not None:
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(threads)
+
+        if importlib.util.find_spec("threadpoolctl") is not None:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+
+    if importlib.util.find_spec("torch") is not None:
+        import torch
+
+        if threads is not None:
+            torch.set_num_threads(threads)
+
+        interop = settings["interop_threads"]
+        if interop is not None and torch.get_num_interop_threads() != interop:
+            try:
+                torch.set_num_interop_threads(interop)
+            except RuntimeError as e:
+                # already fixed for this process (e.g. a sweep worker's second job)
+                print(f"Resources: inter-op threads stay at {torch.get_num_interop_threads()} ({e})")
+
+    _APPLIED.clear()
+    _APPLIED.update(settings)
+
+    parts = []
+    if threads is not None:
+        parts.append(f"threads={threads}")
+    if settings["interop_threads"] is not None:
+        parts.append(f"interop={settings['interop_threads']}")
+    if cpus is not None:
+        parts.append(f"cpus={format_cpu_list(cpus)}")
+    if settings["numa_node"] is not None:
+        parts.append(f"numa_node={settings['numa_node']}")
+    print("Resources:", " ".join(parts))
+
+    return settings
+
+
+def partition(n_runs: int, cpus: list[int] | None = None, smt: bool = False) -> list[dict]:
+    """
+    Split a node's CPUs into n_runs disjoint, contiguous slots.
+
+    Runs are spread over NUMA nodes in proportion to their core counts and a
+    slot never straddles two nodes, unless there are fewer runs than nodes
+    (then slots cover whole nodes and carry no numa_node). Without smt only
+    one logical CPU per physical core is used. Each slot is a resources
+    block: {"cpus", "threads", "numa_node"}.
+    """
+    if n_runs < 1:
+        raise ValueError("partition needs at least one run")
+
+    if cpus is None:
+        cpus = available_cpus()
+    if not smt:
+        cpus = physical_cpus(cpus)
+
+    nodes = {}
+    for node, node_cpus in numa_nodes().items():
+        selected = [cpu for cpu in node_cpus if cpu in cpus]
+        if selected:
+            nodes[node] = selected
+    if not nodes:
+        nodes = {None: list(cpus)}
+
+    if n_runs < len(nodes):
+        # whole nodes per run, largest first onto the run with fewest CPUs
+        assigned = [[] for _ in range(n_runs)]
+        for node_cpus in sorted(nodes.values(), key=len, reverse=True):
+            min(assigned, key=len).extend(node_cpus)
+        return [
+            {"cpus": format_cpu_list(run_cpus), "threads": len(run_cpus), "numa_node": None}
+            for run_cpus in sorted(assigned)
+        ]
+
+    if len(nodes) == 1:
+        groups = [(None, next(iter(nodes.values())))]
+        runs_per_group = [n_runs]
+    else:
+        groups = list(nodes.items())
+        total = sum(len(node_cpus) for _, node_cpus in groups)
+        runs_per_group = [max(1, n_runs * len(node_cpus) // total) for _, node_cpus in groups]
+        # every node gets a run; take surplus runs back from the most crowded nodes
+        while sum(runs_per_group) > n_runs:
+            index = min(
+                (i for i in range(len(groups)) if runs_per_group[i] > 1),
+                key=lambda i: len(groups[i][1]) / runs_per_group[i],
+            )
+            runs_per_group[index] -= 1
+        # hand out the runs lost to rounding to the nodes with most cores per run
+        while sum(runs_per_group) < n_runs:
+            index = max(range(len(groups)), key=lambda i: len(groups[i][1]) / runs_per_group[i])
+            runs_per_group[index] += 1
+
+    slots = []
+    for (node, group_cpus), runs in zip(groups, runs_per_group):
+        if runs > len(group_cpus):
+            raise ValueError(f"Cannot split {len(group_cpus)} CPUs into {runs} runs")
+        base, extra = divmod(len(group_cpus), runs)
+        start = 0
+        for index in range(runs):
+            size = base + (1 if index < extra else 0)
+            slot_cpus = group_cpus[start:start + size]
+            start += size
+            slots.append({"cpus": format_cpu_list(slot_cpus), "threads": len(slot_cpus), "numa_node": node})
+
+    return slots
+
+
+def _calibration_case(case: dict) -> dict:
+    from mof_ase_md.bench import bench_case
+
+    apply_resources({"resources": case["resources"]})
+    return bench_case(case)
+
+
+def calibrate(
+    natoms: int,
+    thread_counts: list[int] | None = None,
+    calculator: dict | None = None,
+    steps: int = 20,
+    warmup: int = 3,
+    cpus: list[int] | None = None,
+    smt: bool = False,
+) -> list[dict]:
+    """
+    Find the threads-per-run that maximises node throughput for a system of
+    about natoms atoms (synthetic framework supercell, velocity Verlet).
+
+    For every thread count t the node is partitioned into cores // t slots
+    and one pinned run per slot is executed concurrently, so memory
+    bandwidth and cache contention are part of the measurement. Returns one
+    row per t with per-run and aggregate steps/s, best first.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    from mof_ase_md.bench import BENCH_CALCULATORS, mof_like_cell
+
+    if calculator is None:
+        calculator = BENCH_CALCULATORS["emt"]
+    if str(calculator.get("name", "")).lower() != "orb":
+        print(
+            f"Calibration uses the stand-in calculator '{calculator.get('name')}', which does not run on torch "
+            "threads; the result says little about threads-per-run for the ORB model"
+        )
+
+    if cpus is None:
+        cpus = available_cpus()
+    if not smt:
+        cpus = physical_cpus(cpus)
+    n_cpus = len(cpus)
+
+    if thread_counts is None:
+        thread_counts = [t for t in (1, 2, 4, 8, 16, 32, 64) if t <= n_cpus]
+
+    repeat = max(1, round((natoms / len(mof_like_cell())) ** (1.0 / 3.0)))
+
+    rows = []
+    for threads in thread_counts:
+        n_runs = max(1, n_cpus // threads)
+        slots = partition(n_runs, cpus=cpus, smt=True)
+        cases = [
+            {
+                "method": "velocity_verlet",
+                "calculator": calculator,
+                "repeat": repeat,
+                "steps": steps,
+                "warmup": warmup,
+                "resources": {"cpus": slot["cpus"], "threads": threads, "interop_threads": 1},
+            }
+            for slot in slots
+        ]
+
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_runs, mp_context=get_context("spawn")) as pool:
+            results = list(pool.map(_calibration_case, cases))
+        wall = time.perf_counter() - t0
+
+        ok = [row for row in results if row.get("status") == "ok"]
+        row = {
+            "threads": threads,
+            "runs": n_runs,
+            "natoms": results[0]["natoms"],
+            "failed": n_runs - len(ok),
+        }
+        if ok:
+            per_run = [1e3 / row_ok["ms_per_step"] for row_ok in ok]
+            row["steps_per_s_per_run"] = sum(per_run) / len(per_run)
+            row["steps_per_s_node"] = sum(per_run)
+        row["wall_s"] = wall
+        rows.append(row)
+
+        if ok:
+            print(
+                f"threads {threads:>3} x {n_runs:>3} runs  {row['steps_per_s_per_run']:9.2f} steps/s per run  "
+                f"{row['steps_per_s_node']:10.2f} steps/s node"
+            )
+        else:
+            print(f"threads {threads:>3} x {n_runs:>3} runs  FAILED")
+
+    rows.sort(key=lambda row: row.get("steps_per_s_node", 0.0), reverse=True)
+    if rows and "steps_per_s_node" in rows[0]:
+        best = rows[0]
+        print(f"Best for {best['natoms']} atoms: {best['threads']} threads per run, {best['runs']} concurrent runs")
+
+    return rows
@@ -1,28 +1,276 @@
 from __future__ import annotations
 
+import copy
+import time
 from pathlib import Path
 import yaml
 
+import numpy as np
+
 from ase.io import write
 
 from mof_ase_md.config.defaults import apply_defaults
 from mof_ase_md.config.loader import load_config
-from mof_ase_md.config.validator import validate_config
+from mof_ase_md.config.validator import ConfigError, check_timestep, resolve_stages, validate_config
 from mof_ase_md.system.atoms import load_atoms
-from mof_ase_md.calculator.orb import build_orb_calculator
+from mof_ase_md.calculator.factory import PRECISIONS, build_calculator
 from mof_ase_md.md.velocities import initialize_velocities
 from mof_ase_md.md.dynamics import make_dynamics
-from mof_ase_md.md.outputs import attach_outputs
+from mof_ase_md.md.outputs import attach_outputs, ThermoAverages
+from mof_ase_md.md.analysis import DEFAULT_OUTPUT_DIR, attach_analysis
+from mof_ase_md.md.replicas import run_replicas
+from mof_ase_md.md.safety import attach_watchdog
+from mof_ase_md.md.adaptive import attach_adaptive_timestep
+from mof_ase_md.md.profiling import attach_profiler, print_report
+from mof_ase_md.md.minimize import run_minimize
+from mof_ase_md.md.probes import nve_probe
+from mof_ase_md.resources import apply_resources
+from mof_ase_md.utils import startup
+from mof_ase_md.md.checkpoint import (
+    attach_checkpointer,
+    atoms_from_checkpoint,
+    find_checkpoint,
+    read_checkpoint,
+    restore_dynamics,
+)
+
+
+def _override_resources(cfg: dict, resources: dict | None) -> None:
+    """
+    Merge CLI resource flags (None = not given) over the config's block.
+    """
+    if not resources:
+        return
+    merged = dict(cfg.get("resources") or {})
+    merged.update({key: value for key, value in resources.items() if value is not None})
+    cfg["resources"] = merged
 
 
-def run(config_path: str) -> None:
+def run(config_path: str, resources: dict | None = None) -> None:
     """
     Main orchestration function for a single-ensemble ASE MD run.
     """
     # ---- load + validate config ----
     cfg = load_config(config_path)
+
+    # ---- multi-stage protocol (minimize / md stages in one process) ----
+    if cfg.get("stages") is not None:
+        _override_resources(cfg, resources)
+        run_stages(cfg)
+        return
+
     cfg = apply_defaults(cfg)
+    _override_resources(cfg, resources)
+    cfg = validate_config(cfg)
+
+    # ---- lockstep replicas (batched force evaluation) ----
+    if cfg["md"].get("replicas", 1) > 1:
+        run_replicas(cfg)
+        return
+
+    run_config(cfg)
+
+
+def run_stages(cfg: dict, calculator=None, progress=None) -> list[dict]:
+    """
+    Run cfg["stages"] in sequence in one process.
+
+    Every stage is the base config with the stage's blocks merged over it
+    (see expand_stages) and writes to its own <workdir>/<NN>_<name> folder.
+    The structure is loaded and the calculator built once; the live Atoms
+    (positions, cell, velocities) pass from stage to stage. md stages only
+    draw new velocities when the atoms carry none (first stage, or after a
+    minimize stage). All stages are validated before the first one starts.
+    An existing calculator is reused; progress(step, total_steps, stage=name)
+    is called every output.log_interval steps of md stages.
+    """
+    stage_cfgs = resolve_stages(cfg)
+
+    first = stage_cfgs[0]
+    with startup.phase("load atoms"):
+        atoms = load_atoms(first)
+    apply_resources(first)
+    if calculator is None:
+        with startup.phase("build calculator"):
+            calculator = build_calculator(first)
+    atoms.calc = calculator
+
+    summaries = []
+    for stage_cfg in stage_cfgs:
+        stage = stage_cfg["stage"]
+        print(f"==== Stage {stage['index'] + 1}/{len(stage_cfgs)}: {stage['name']} ({stage['type']}) ====")
+
+        if stage["type"] == "minimize":
+            summary = run_minimize(atoms, stage_cfg)
+            with open(Path(stage_cfg["output"]["workdir"]) / "config_used.yaml", "w", encoding="utf-8") as f:
+                yaml.safe_dump(stage_cfg, f, sort_keys=False)
+        else:
+            stage_progress = None
+            if progress is not None:
+                stage_progress = lambda step, total, name=stage["name"]: progress(step, total, stage=name)
+            summary = run_config(stage_cfg, calculator=calculator, atoms=atoms, progress=stage_progress)
+
+        summaries.append({"stage": stage["name"], "type": stage["type"], **summary})
+
+    print("PIPELINE COMPLETE")
+    for row in summaries:
+        print(f"  {row['stage']:<20} {row['type']:<9} {row['wall_time_s']:9.1f} s  {row['workdir']}")
+
+    return summaries
+
+
+def resume(path: str, extra_steps: int | None = None, resources: dict | None = None) -> dict:
+    """
+    Continue a run from its latest checkpoint (or a given checkpoint file).
+
+    The config stored in the checkpoint is reused; trajectory and log are
+    cut back to the checkpoint and appended to. With extra_steps, md.total_steps is extended to
+    checkpoint step + extra_steps.
+    """
+    checkpoint_path = find_checkpoint(path)
+    payload = read_checkpoint(checkpoint_path)
+
+    cfg = payload["cfg"]
+    if extra_steps is not None:
+        cfg["md"]["total_steps"] = payload["step"] + extra_steps
+
+    _override_resources(cfg, resources)
+
+    cfg["output"]["append_trajectory"] = True
+    logging_cfg = cfg.setdefault("logging", {})
+    logging_cfg["mode"] = "a"
+    logging_cfg["header"] = False
+
+    print("Resuming from:", checkpoint_path)
+    print("Step:", payload["step"], "of", cfg["md"]["total_steps"])
+
+    return run_config(cfg, checkpoint=payload)
+
+
+def profile(
+    config_path: str,
+    steps: int,
+    workdir: str | None = None,
+    report: str | None = None,
+    resources: dict | None = None,
+) -> dict:
+    """
+    Run `steps` MD steps of a config with profiling enabled and print the
+    per-section timing breakdown. Outputs go to <output.workdir>/profile
+    unless another workdir is given.
+    """
+    cfg = load_config(config_path)
+    cfg = apply_defaults(cfg)
+
+    cfg["md"]["total_steps"] = steps
+    output_cfg = cfg["output"]
+    output_cfg["workdir"] = workdir or str(Path(output_cfg["workdir"]) / "profile")
+    output_cfg["append_trajectory"] = False
+    for key in ("traj_interval", "log_interval"):
+        if key in output_cfg:
+            output_cfg[key] = min(output_cfg[key], steps)
+
+    profiling_cfg = cfg.get("profiling") or {}
+    profiling_cfg["enabled"] = True
+    if report is not None:
+        profiling_cfg["report"] = report
+    cfg["profiling"] = profiling_cfg
+
+    cfg.pop("checkpoint", None)
+    _override_resources(cfg, resources)
+
     cfg = validate_config(cfg)
+    if cfg["md"].get("replicas", 1) > 1:
+        raise ConfigError("md.replicas > 1 is not supported by profile; use run")
+    return run_config(cfg)
+
+
+def precision_check(
+    config_path: str,
+    steps: int = 200,
+    modes: list[str] | None = None,
+    timestep_fs: float | None = None,
+    max_drift: float | None = None,
+) -> list[dict]:
+    """
+    Run the same short NVE probe on the config's structure with every
+    calculator.precision mode and print energy drift, force error vs.
+    float64 and throughput side by side.
+
+    With max_drift (meV/atom/ps), modes whose |drift| exceeds it are marked
+    as failed. Returns one row per mode.
+    """
+    cfg = load_config(config_path)
+    cfg = apply_defaults(cfg)
+    cfg = validate_config(cfg)
+
+    if cfg["calculator"]["name"] != "orb":
+        raise ConfigError("precision-check needs calculator.name 'orb'")
+
+    if modes is None:
+        modes = list(PRECISIONS)
+    for mode in modes:
+        if mode not in PRECISIONS:
+            raise ConfigError(f"Unknown precision mode: {mode}. Available: {list(PRECISIONS)}")
+
+    atoms = load_atoms(cfg)
+    if timestep_fs is None:
+        timestep_fs = float(cfg["md"]["timestep_fs"])
+    temperature_K = float(cfg.get("state", {}).get("temperature_K", 300.0))
+    seed = cfg.get("velocities", {}).get("seed", None)
+    if seed is None:
+        seed = 0
+
+    # float64 forces at the start structure are the reference for the others
+    ordered = sorted(modes, key=lambda mode: mode != "float64")
+
+    rows = []
+    reference_forces = None
+    for mode in ordered:
+        mode_cfg = copy.deepcopy(cfg)
+        mode_cfg["calculator"]["precision"] = mode
+        calculator = build_calculator(mode_cfg)
+
+        forces = calculator.get_forces(atoms.copy())
+        if mode == "float64":
+            reference_forces = np.array(forces, dtype=np.float64)
+
+        row = {"precision": mode}
+        row.update(nve_probe(atoms, calculator, steps=steps, timestep_fs=timestep_fs, temperature_K=temperature_K, seed=seed))
+        if reference_forces is not None:
+            row["max_force_error_eV_A"] = float(np.abs(forces - reference_forces).max())
+        if max_drift is not None:
+            row["ok"] = abs(row["drift_meV_atom_ps"]) <= max_drift
+        rows.append(row)
+
+    print(f"NVE probe: {rows[0]['natoms']} atoms, {steps} steps of {timestep_fs} fs at {temperature_K} K")
+    print(f"{'precision':<10} {'drift meV/atom/ps':>18} {'noise meV/atom':>15} {'max dF eV/A':>12} {'steps/s':>9}")
+    for row in rows:
+        force_error = row.get("max_force_error_eV_A")
+        force_error = "-" if force_error is None else f"{force_error:.2e}"
+        status = ""
+        if "ok" in row:
+            status = "  ok" if row["ok"] else "  FAIL"
+        print(
+            f"{row['precision']:<10} {row['drift_meV_atom_ps']:>18.4f} {row['noise_meV_atom']:>15.4f} "
+            f"{force_error:>12} {row['steps_per_s']:>9.2f}{status}"
+        )
+
+    return rows
+
+
+def run_config(cfg: dict, calculator=None, checkpoint: dict | None = None, atoms=None, progress=None) -> dict:
+    """
+    Run MD for an already resolved + validated config.
+
+    An existing calculator can be passed in to skip building one (e.g. a
+    worker process that runs many jobs). With a checkpoint payload, atoms and
+    integrator state are restored from it and only the remaining steps run.
+    Live atoms (previous stage of a pipeline) are used as they are and keep
+    their velocities, if they have any. progress(step, total_steps) is
+    called every output.log_interval steps. Returns a summary of the run.
+    """
+    t0 = time.perf_counter()
 
     # ---- prepare output directory ----
     output_cfg = cfg["output"]
@@ -30,26 +278,104 @@ def run(config_path: str) -> None:
     workdir.mkdir(parents=True, exist_ok=True)
 
     # ---- load atoms ----
-    atoms = load_atoms(cfg)
+    carry_velocities = False
+    if checkpoint is not None:
+        atoms = atoms_from_checkpoint(checkpoint)
+    elif atoms is not None:
+        carry_velocities = bool(atoms.get_momenta().any())
+    else:
+        with startup.phase("load atoms"):
+            atoms = load_atoms(cfg)
+    check_timestep(cfg, atoms)
+
+    # ---- threads / affinity (before torch builds its thread pools) ----
+    apply_resources(cfg)
 
     # ---- attach calculator ----
-    calculator = build_orb_calculator(cfg)
+    if calculator is None:
+        with startup.phase("build calculator"):
+            calculator = build_calculator(cfg)
     atoms.calc = calculator
 
+    t_setup = time.perf_counter()
+
     # ---- velocities ----
-    initialize_velocities(atoms, cfg)
+    if checkpoint is None and not carry_velocities:
+        initialize_velocities(atoms, cfg)
 
     # ---- dynamics ----
     dynamics = make_dynamics(atoms, cfg)
+    if checkpoint is not None:
+        restore_dynamics(dynamics, checkpoint)
+
+    # ---- adaptive timestep ----
+    adaptive = attach_adaptive_timestep(dynamics, atoms, cfg)
+
+    # ---- safety watchdog (before outputs, so tripped steps are not written) ----
+    watchdog = attach_watchdog(dynamics, atoms, cfg)
 
     # ---- outputs ----
-    attach_outputs(dynamics, atoms, cfg)
+    outputs = attach_outputs(dynamics, atoms, cfg)
+    if checkpoint is not None and "outputs" in checkpoint.get("extra", {}):
+        # drop frames and log rows written after the checkpoint
+        outputs.load_state_dict(checkpoint["extra"]["outputs"])
+
+    averages = ThermoAverages(atoms)
+    dynamics.attach(averages, interval=output_cfg["log_interval"])
+
+    # ---- on-the-fly analysis (accumulators travel with checkpoints) ----
+    analysis = attach_analysis(dynamics, atoms, cfg)
+    extras = {"outputs": outputs}
+    if analysis is not None:
+        extras["analysis"] = analysis
+        if checkpoint is not None and "analysis" in checkpoint.get("extra", {}):
+            analysis.load_state_dict(checkpoint["extra"]["analysis"])
+
+    checkpointer = attach_checkpointer(dynamics, atoms, cfg, extras=extras)
+
+    if watchdog is not None:
+        watchdog.track(outputs, {"averages": averages, "analysis": analysis})
+
+    # ---- profiling (wraps everything attached above) ----
+    profiler = attach_profiler(dynamics, atoms, cfg)
+    startup.record("set up dynamics + observers", time.perf_counter() - t_setup)
 
     # ---- run ----
     md_cfg = cfg["md"]
     total_steps = md_cfg["total_steps"]
+    remaining_steps = max(total_steps - dynamics.nsteps, 0)
+
+    if progress is not None:
+        dynamics.attach(lambda: progress(dynamics.nsteps, total_steps), interval=output_cfg["log_interval"])
+
+    t_run = time.perf_counter()
+    try:
+        dynamics.run(remaining_steps)
+    except BaseException:
+        outputs.close(error=True)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.uninstrument()
+    outputs.close()
+    t_run = time.perf_counter() - t_run
+
+    timing_path = None
+    if profiler is not None:
+        profiler.wall_time = t_run
+        profiler.n_steps = remaining_steps
+        timing_path = workdir / cfg["profiling"].get("report", "timing.json")
+        report = profiler.write_report(timing_path, timestep_fs=md_cfg["timestep_fs"])
+        print_report(report)
+
+    if checkpointer is not None:
+        checkpointer.write()
 
-    dynamics.run(total_steps)
+    analysis_dir = None
+    if analysis is not None:
+        analysis_dir = workdir / cfg["analysis"].get("output", DEFAULT_OUTPUT_DIR)
+        analysis.write(analysis_dir)
+        print("Analysis:", analysis_dir)
 
     # ---- write final structure ----
     final_name = output_cfg.get("final_structure", "final.xyz")
@@ -64,7 +390,53 @@ def run(config_path: str) -> None:
         with open(dst, "w", encoding="utf-8") as f:
             yaml.safe_dump(cfg, f, sort_keys=False)
 
+    final_volume = None
+    if atoms.cell.rank == 3:
+        final_volume = atoms.get_volume()
+
+    summary = {
+        "workdir": str(workdir),
+        "final_structure": str(final_path),
+        "steps": remaining_steps,
+        "final_volume_A3": final_volume,
+        **averages.summary(),
+        "wall_time_s": time.perf_counter() - t0,
+    }
+    if timing_path is not None:
+        summary["timing_report"] = str(timing_path)
+    if analysis_dir is not None:
+        summary["analysis_dir"] = str(analysis_dir)
+
+    if hasattr(calculator, "graph_stats"):
+        stats = calculator.graph_stats()
+        summary.update(stats)
+        print(
+            f"Graph builds: {stats['graph_builds']}, reuses: {stats['graph_reuses']} "
+            f"(skin {stats['skin_A']} A)"
+        )
+
+    if adaptive is not None:
+        stats = adaptive.summary()
+        summary.update(stats)
+        print(
+            f"Adaptive timestep: {stats['simulated_time_ps']:.4g} ps simulated, mean "
+            f"{stats['adaptive_mean_timestep_fs']:.3g} fs (range {stats['adaptive_min_timestep_fs']:.3g}-"
+            f"{stats['adaptive_max_timestep_fs']:.3g} fs), {stats['adaptive_timestep_changes']} changes"
+        )
+
+    if hasattr(dynamics, "respa_stats"):
+        stats = dynamics.respa_stats()
+        summary.update(stats)
+        if "respa_main_calls_saved_per_ps" in stats:
+            print(
+                f"RESPA: {stats['respa_main_calls_per_ps']:.0f} force-field calls/ps "
+                f"({stats['respa_main_calls_saved_per_ps']:.0f}/ps saved vs. "
+                f"{stats['respa_inner_timestep_fs']:g} fs steps), "
+                f"{stats['respa_inner_calls']} inner calls"
+            )
 
     print("RUN COMPLETE")
     print("Workdir:", workdir)
     print("Final structure:", final_path)
+
+    return summary
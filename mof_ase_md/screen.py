@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import copy
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from mof_ase_md.config.defaults import apply_defaults
+from mof_ase_md.config.loader import load_config
+from mof_ase_md.config.validator import ConfigError, resolve_stages, validate_config
+
+
+# files picked up from the structures directory when no pattern is given
+STRUCTURE_SUFFIXES = (".cif", ".xyz", ".extxyz", ".data", ".lmp", ".lammps", ".vasp", ".poscar", ".traj", ".pdb")
+
+SCREEN_COLUMNS = [
+    "structure",
+    "formula",
+    "n_atoms",
+    "density0_g_cm3",
+    "density_g_cm3",
+    "volume0_A3",
+    "volume_A3",
+    "volume_change",
+    "mean_temperature_K",
+    "mean_pressure_bar",
+    "stable",
+    "wall_time_s",
+    "status",
+    "workdir",
+]
+
+# written into a structure's workdir when its protocol finished; a rerun
+# skips the structure while the protocol and the input are unchanged
+RESULT_FILE = "screen_result.json"
+
+# g/cm^3 per amu/A^3
+AMU_A3_TO_G_CM3 = 1.66053907
+
+
+def find_structures(directory: str | Path, pattern: str | None = None) -> list[Path]:
+    """
+    Structure files in directory: those matching pattern (glob, ** is
+    recursive), or every file with a known structure suffix.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise ConfigError(f"Not a directory: {directory}")
+
+    if pattern is not None:
+        paths = directory.glob(pattern)
+    else:
+        paths = (path for path in directory.iterdir() if path.suffix.lower() in STRUCTURE_SUFFIXES)
+
+    return sorted(path for path in paths if path.is_file() and not path.name.startswith("."))
+
+
+def _job_names(paths: list[Path]) -> list[str]:
+    """
+    One workdir name per structure: the file stem, or the file name when
+    several structures share a stem.
+    """
+    stems = [path.stem for path in paths]
+    return [
+        path.name.replace(".", "_") if stems.count(path.stem) > 1 else path.stem
+        for path in paths
+    ]
+
+
+def _protocol_key(cfg: dict, structure_key: str) -> str:
+    payload = json.dumps({"cfg": cfg, "structure": structure_key}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def expand_structures(base_cfg: dict, paths: list[Path], fmt: str | None = None) -> list[dict]:
+    """
+    One resolved, validated job per structure: base_cfg with
+    system.input_file set and output.workdir <output.workdir>/<name>.
+    Configs with stages are resolved stage by stage.
+    """
+    base_workdir = Path(base_cfg["output"]["workdir"])
+
+    jobs = []
+    for path, name in zip(paths, _job_names(paths)):
+        cfg = copy.deepcopy(base_cfg)
+        cfg.setdefault("system", {})["input_file"] = str(path)
+        if fmt is not None:
+            cfg["system"]["format"] = fmt
+        cfg["output"]["workdir"] = str(base_workdir / name)
+
+        if cfg.get("stages") is not None:
+            resolve_stages(cfg)
+        else:
+            cfg = validate_config(apply_defaults(cfg))
+            if cfg["md"].get("replicas", 1) > 1:
+                raise ConfigError("md.replicas > 1 is not supported by screen")
+
+        jobs.append({"structure": name, "path": str(path), "cfg": cfg})
+
+    return jobs
+
+
+def _count_atoms(jobs: list[dict], workers: int) -> None:
+    """
+    Set n_atoms on every job. The structures are parsed (in parallel) into the
+    structure library, so the workers later load them without parsing; with
+    the library disabled the file size stands in for the atom count.
+    """
+    from mof_ase_md.system.library import build_library, library_settings
+
+    system_cfg = jobs[0]["cfg"]["system"]
+    enabled, library_dir = library_settings(system_cfg.get("cache", None))
+    if not enabled:
+        for job in jobs:
+            job["n_atoms"] = None
+            job["size"] = os.path.getsize(job["path"])
+        return
+
+    rows = build_library([job["path"] for job in jobs], fmt=system_cfg.get("format", None), library_dir=str(library_dir), workers=workers)
+    by_path = {row["path"]: row for row in rows}
+    for job in jobs:
+        row = by_path[job["path"]]
+        if row["status"] == "error":
+            raise ConfigError(f"Cannot read {job['path']}: {row['error']}")
+        job["n_atoms"] = row["n_atoms"]
+        job["size"] = row["n_atoms"]
+        job["structure_key"] = row["key"]
+
+
+def _finished_row(job: dict) -> dict | None:
+    path = Path(job["cfg"]["output"]["workdir"]) / RESULT_FILE
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if result.get("protocol_key") != job["protocol_key"]:
+        return None
+    return result["row"]
+
+
+def _write_result(job: dict, row: dict) -> None:
+    workdir = Path(job["cfg"]["output"]["workdir"])
+    workdir.mkdir(parents=True, exist_ok=True)
+    with open(workdir / RESULT_FILE, "w", encoding="utf-8") as f:
+        json.dump({"protocol_key": job["protocol_key"], "row": row}, f, indent=1, default=str)
+
+
+def _run_structure(job: dict, max_volume_change: float) -> dict:
+    from mof_ase_md.md.safety import SafetyError
+    from mof_ase_md.resources import apply_resources
+    from mof_ase_md.run import run_config, run_stages
+    from mof_ase_md.sweep import _worker_calculator
+    from mof_ase_md.system.atoms import load_atoms
+
+    t0 = time.perf_counter()
+    cfg = job["cfg"]
+    row = {"structure": job["structure"], "workdir": cfg["output"]["workdir"]}
+
+    try:
+        atoms = load_atoms(cfg)
+        mass = atoms.get_masses().sum()
+        row["formula"] = atoms.get_chemical_formula()
+        row["n_atoms"] = len(atoms)
+        if atoms.cell.rank == 3:
+            row["volume0_A3"] = atoms.get_volume()
+            row["density0_g_cm3"] = mass / row["volume0_A3"] * AMU_A3_TO_G_CM3
+
+        apply_resources(cfg)
+        calculator = _worker_calculator(cfg)
+        if cfg.get("stages") is not None:
+            summaries = run_stages(cfg, calculator=calculator)
+            md_summaries = [s for s in summaries if s["type"] == "md"] or summaries
+            summary = {**md_summaries[-1], "final_volume_A3": summaries[-1].get("final_volume_A3")}
+        else:
+            summary = run_config(cfg, calculator=calculator)
+    except SafetyError as e:
+        row["stable"] = False
+        row["status"] = f"unstable: {e}"
+        row["wall_time_s"] = time.perf_counter() - t0
+        _write_result(job, row)
+        return row
+    except Exception as e:
+        traceback.print_exc()
+        row["status"] = f"failed: {e}"
+        row["wall_time_s"] = time.perf_counter() - t0
+        return row
+
+    volume = summary.get("final_volume_A3")
+    row["volume_A3"] = volume
+    row["mean_temperature_K"] = summary.get("mean_temperature_K")
+    row["mean_pressure_bar"] = summary.get("mean_pressure_bar")
+    row["stable"] = True
+    if volume is not None and row.get("volume0_A3"):
+        row["density_g_cm3"] = mass / volume * AMU_A3_TO_G_CM3
+        row["volume_change"] = volume / row["volume0_A3"] - 1.0
+        row["stable"] = abs(row["volume_change"]) <= max_volume_change
+    row["wall_time_s"] = time.perf_counter() - t0
+    row["status"] = "ok"
+
+    _write_result(job, row)
+    return row
+
+
+def write_screen_summary(rows: list[dict], path: str | Path) -> None:
+    with Path(path).open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SCREEN_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def run_screen(
+    structures_dir: str,
+    config_path: str,
+    pattern: str | None = None,
+    fmt: str | None = None,
+    workers: int = 1,
+    summary_file: str | None = None,
+    max_volume_change: float = 0.1,
+    force: bool = False,
+    pin: bool = False,
+) -> list[dict]:
+    """
+    Run one protocol config (plain or with stages) over every structure in a
+    directory and collect one results row per structure.
+
+    Jobs are dispatched largest first (by atom count) to a process pool, so
+    the biggest frameworks start early and the small ones fill the gaps at
+    the end; each worker reuses its calculator across structures. Every
+    structure gets <output.workdir>/<name>; structures whose protocol already
+    finished with the same config and input are skipped (force reruns them).
+    A structure is stable when the run raised no safety error and the volume
+    changed by at most max_volume_change (fraction).
+    """
+    base_cfg = load_config(config_path)
+    paths = find_structures(structures_dir, pattern)
+    if not paths:
+        raise ConfigError(f"No structure files in {structures_dir}" + (f" matching {pattern}" if pattern else ""))
+
+    jobs = expand_structures(base_cfg, paths, fmt=fmt)
+    _count_atoms(jobs, workers)
+
+    rows = []
+    pending = []
+    for job in jobs:
+        job["protocol_key"] = _protocol_key(job["cfg"], job.get("structure_key") or job["path"])
+        finished = None if force else _finished_row(job)
+        if finished is not None:
+            rows.append(finished)
+        else:
+            pending.append(job)
+
+    # longest processing time first (every structure runs the same protocol,
+    # so the work scales with the atom count): a greedy bin packing of the
+    # jobs onto whichever worker frees up next
+    pending.sort(key=lambda job: job["size"], reverse=True)
+
+    base_workdir = Path(base_cfg["output"]["workdir"])
+    base_workdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Screen: {len(jobs)} structures, {len(rows)} already done, {len(pending)} to run on {workers} worker(s)")
+
+    if workers <= 1 or len(pending) <= 1:
+        for job in pending:
+            row = _run_structure(job, max_volume_change)
+            print(f"Screen: {row['structure']} {row['status']} ({row['wall_time_s']:.1f} s)")
+            rows.append(row)
+    else:
+        from mof_ase_md.sweep import _pin_worker
+
+        ctx = multiprocessing.get_context("spawn")
+        initializer = None
+        initargs = ()
+        if pin:
+            from mof_ase_md.resources import partition
+
+            slots = ctx.Queue()
+            for slot in partition(workers):
+                slots.put(slot)
+            initializer = _pin_worker
+            initargs = (slots,)
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initializer, initargs=initargs) as pool:
+            futures = [pool.submit(_run_structure, job, max_volume_change) for job in pending]
+            for future in as_completed(futures):
+                row = future.result()
+                print(f"Screen: {row['structure']} {row['status']} ({row['wall_time_s']:.1f} s)")
+                rows.append(row)
+
+    order = {job["structure"]: index for index, job in enumerate(jobs)}
+    rows.sort(key=lambda row: order[row["structure"]])
+
+    summary_path = Path(summary_file) if summary_file is not None else base_workdir / "screen_summary.csv"
+    write_screen_summary(rows, summary_path)
+
+    n_failed = sum(1 for row in rows if not str(row["status"]).startswith(("ok", "unstable")))
+    n_unstable = sum(1 for row in rows if row.get("stable") is False)
+
+    print("SCREEN COMPLETE")
+    print("Structures:", len(rows), "unstable:", n_unstable, "failed:", n_failed)
+    print("Summary:", summary_path)
+
+    return rows
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from mof_ase_md.config.defaults import apply_defaults
+from mof_ase_md.config.loader import load_config
+from mof_ase_md.config.validator import ConfigError, resolve_stages, validate_config
+
+
+# Worker-process side: event queue back to the daemon, set by _init_worker.
+_EVENTS = None
+
+# seconds between progress events of one job
+PROGRESS_MIN_INTERVAL_S = 1.0
+
+
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return str(Path(runtime_dir) / f"mof_ase_md-{os.getuid()}.sock")
+
+
+def prepare_job(config_path: str, cwd: str | None = None) -> dict:
+    """
+    Load, default and validate a config for the daemon (raises ConfigError).
+    Relative paths are taken relative to cwd, the submitting shell's directory.
+    """
+    cwd = cwd or os.getcwd()
+    path = Path(config_path)
+    if not path.is_absolute():
+        path = Path(cwd) / path
+
+    cfg = load_config(path)
+    if cfg.get("stages") is not None:
+        resolve_stages(cfg)
+        return {"config": str(path), "cwd": cwd, "cfg": cfg, "workdir": str(Path(cwd) / cfg["output"]["workdir"])}
+
+    cfg = validate_config(apply_defaults(cfg))
+    if cfg["md"].get("replicas", 1) > 1:
+        raise ConfigError("md.replicas > 1 is not supported by serve; use run")
+    return {"config": str(path), "cwd": cwd, "cfg": cfg, "workdir": str(Path(cwd) / cfg["output"]["workdir"])}
+
+
+def _init_worker(events, preload: list[dict]) -> None:
+    """
+    Worker-process initializer: keep the event queue and build the
+    calculators of the preload configs, so the first job finds them warm.
+    """
+    global _EVENTS
+    from mof_ase_md.sweep import _worker_calculator
+
+    _EVENTS = events
+    for cfg in preload:
+        t0 = time.perf_counter()
+        _worker_calculator(cfg)
+        events.put({"event": "preloaded", "pid": os.getpid(), "calculator": cfg["calculator"]["name"], "seconds": time.perf_counter() - t0})
+
+
+def _serve_job(job: dict) -> None:
+    """
+    Run one job in a worker process. Events: started, progress, done/failed.
+    The job's own output (prints of run_config) goes to <workdir>/serve.out.
+    """
+    from mof_ase_md.resources import apply_resources
+    from mof_ase_md.run import run_config, run_stages
+    from mof_ase_md.sweep import _worker_calculator
+
+    job_id = job["job"]
+    t0 = time.perf_counter()
+    last = [0.0]
+
+    def progress(step, total_steps, stage=None):
+        now = time.perf_counter()
+        if now - last[0] < PROGRESS_MIN_INTERVAL_S and step < total_steps:
+            return
+        last[0] = now
+        event = {"job": job_id, "event": "progress", "step": step, "total_steps": total_steps, "elapsed_s": now - t0}
+        if stage is not None:
+            event["stage"] = stage
+        _EVENTS.put(event)
+
+    _EVENTS.put({"job": job_id, "event": "started", "pid": os.getpid()})
+
+    try:
+        os.chdir(job["cwd"])
+        cfg = job["cfg"]
+        workdir = Path(job["workdir"])
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        with open(workdir / "serve.out", "a", encoding="utf-8") as out, contextlib.redirect_stdout(out):
+            if cfg.get("stages") is not None:
+                stage_cfgs = resolve_stages(cfg)
+                apply_resources(stage_cfgs[0])
+                rows = run_stages(cfg, calculator=_worker_calculator(stage_cfgs[0]), progress=progress)
+                summary = {"stages": [{key: row[key] for key in ("stage", "type", "workdir", "wall_time_s")} for row in rows]}
+            else:
+                apply_resources(cfg)
+                summary = run_config(cfg, calculator=_worker_calculator(cfg), progress=progress)
+    except Exception as e:
+        if not isinstance(e, ConfigError):
+            traceback.print_exc()
+        _EVENTS.put({"job": job_id, "event": "failed", "message": f"{type(e).__name__}: {e}", "elapsed_s": time.perf_counter() - t0})
+        return
+
+    _EVENTS.put({"job": job_id, "event": "done", "summary": summary, "elapsed_s": time.perf_counter() - t0})
+
+
+class JobDaemon:
+    """
+    Runs submitted configs on `workers` long-lived worker processes.
+
+    Each worker keeps the calculators it has built (sweep._worker_calculator
+    plus the in-process model cache), so only its first job with a given
+    calculator block pays for the model load. Events from the workers are
+    fanned out to the clients waiting on the job and logged on stdout.
+    """
+
+    def __init__(self, workers: int = 1, preload: list[dict] | None = None):
+        self.workers = workers
+        self.preload = preload or []
+        self.ctx = multiprocessing.get_context("spawn")
+        self.events = self.ctx.Queue()
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.next_id = 1
+        self.started = time.time()
+        self.pool = self._new_pool()
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self.ctx,
+            initializer=_init_worker,
+            initargs=(self.events, self.preload),
+        )
+
+    def _publish(self, event: dict) -> None:
+        job = self.jobs.get(event.get("job"))
+        if job is None:
+            print("[serve]", json.dumps(event, default=str), flush=True)
+            return
+
+        with self.lock:
+            if event["event"] in ("started", "done", "failed"):
+                job["status"] = {"started": "running"}.get(event["event"], event["event"])
+            listeners = list(job["listeners"])
+
+        if event["event"] != "progress":
+            detail = event.get("message") or event.get("pid") or ""
+            print(f"[serve] job {event['job']} {event['event']} {detail}".rstrip(), flush=True)
+        for listener in listeners:
+            listener.put(event)
+
+    def _dispatch(self) -> None:
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            self._publish(event)
+
+    def _finished(self, job_id: int, pool, future) -> None:
+        # job errors are reported by the worker; this only catches dead workers
+        if future.cancelled():
+            self._publish({"job": job_id, "event": "failed", "message": "cancelled (daemon shutting down)"})
+            return
+
+        exc = future.exception()
+        if exc is None:
+            return
+        self._publish({"job": job_id, "event": "failed", "message": f"worker died: {exc}"})
+        if isinstance(exc, BrokenProcessPool):
+            # a crashed worker breaks the whole pool: start a fresh one
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = self._new_pool()
+
+    def submit(self, prepared: dict, listener=None) -> int:
+        with self.lock:
+            for job_id, job in self.jobs.items():
+                if job["workdir"] == prepared["workdir"] and job["status"] in ("queued", "running"):
+                    raise ConfigError(f"output.workdir {prepared['workdir']} is in use by job {job_id}")
+            job_id = self.next_id
+            self.next_id += 1
+            self.jobs[job_id] = {
+                "config": prepared["config"],
+                "workdir": prepared["workdir"],
+                "status": "queued",
+                "listeners": [listener] if listener is not None else [],
+            }
+            pool = self.pool
+
+        future = pool.submit(_serve_job, {"job": job_id, **prepared})
+        future.add_done_callback(lambda f, job_id=job_id, pool=pool: self._finished(job_id, pool, f))
+        print(f"[serve] job {job_id} queued {prepared['config']}", flush=True)
+        return job_id
+
+    def status(self) -> dict:
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            jobs = [
+                {"job": job_id, "status": job["status"], "config": job["config"]}
+                for job_id, job in self.jobs.items()
+                if job["status"] in ("queued", "running")
+            ]
+        return {"pid": os.getpid(), "workers": self.workers, "uptime_s": time.time() - self.started, "counts": counts, "active": jobs}
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.events.put(None)
+        self.dispatcher.join()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    One request per connection, JSON lines both ways:
+
+      {"action": "submit", "configs": [...], "cwd": "...", "wait": true}
+      {"action": "status"}
+      {"action": "shutdown"}
+    """
+
+    def send(self, message: dict) -> None:
+        self.wfile.write((json.dumps(message, default=str) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        daemon = self.server.daemon_jobs
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            self.send({"event": "error", "message": "malformed request"})
+            return
+        action = request.get("action")
+
+        if action == "status":
+            self.send({"event": "status", **daemon.status()})
+            return
+
+        if action == "shutdown":
+            self.send({"event": "shutdown", "pid": os.getpid()})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        if action != "submit":
+            self.send({"event": "error", "message": f"unknown action: {action}"})
+            return
+
+        listener = queue.Queue() if request.get("wait", True) else None
+        pending = set()
+        for config in request.get("configs", []):
+            try:
+                prepared = prepare_job(config, cwd=request.get("cwd"))
+                job_id = daemon.submit(prepared, listener)
+            except (ConfigError, OSError, ValueError) as e:
+                self.send({"event": "rejected", "config": config, "message": str(e)})
+                continue
+            pending.add(job_id)
+            self.send({"event": "queued", "job": job_id, "config": prepared["config"], "workdir": prepared["workdir"]})
+
+        if listener is None:
+            return
+
+        try:
+            while pending:
+                event = listener.get()
+                self.send(event)
+                if event["event"] in ("done", "failed"):
+                    pending.discard(event["job"])
+        except (BrokenPipeError, ConnectionResetError):
+            # client went away: its jobs keep running
+            pass
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str | None = None, workers: int = 1, preload: list[str] | None = None) -> None:
+    """
+    Run the job daemon on a Unix socket until a shutdown request (or Ctrl-C).
+
+    preload: configs whose calculators every worker builds at start-up.
+    """
+    socket_path = socket_path or default_socket_path()
+    path = Path(socket_path)
+    if path.exists():
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+        except OSError:
+            path.unlink()   # stale socket of a dead daemon
+        else:
+            raise ConfigError(f"A daemon is already listening on {socket_path}")
+
+    preload_cfgs = []
+    for config in preload or []:
+        cfg = prepare_job(config)["cfg"]
+        if cfg.get("stages") is not None:
+            cfg = resolve_stages(cfg)[0]
+        preload_cfgs.append(cfg)
+
+    daemon = JobDaemon(workers=workers, preload=preload_cfgs)
+    server = _Server(socket_path, _Handler)
+    server.daemon_jobs = daemon
+    os.chmod(socket_path, 0o600)
+
+    print(f"Serving on {socket_path} with {workers} worker(s) (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        print("Shutting down: waiting for running jobs", flush=True)
+        daemon.close()
+        print("Daemon stopped", flush=True)
+
+
+def request(message: dict, socket_path: str | None = None):
+    """
+    Send one request to the daemon and yield its reply events.
+    """
+    socket_path = socket_path or default_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise ConfigError(f"No daemon on {socket_path} ({e}); start one with: python -m mof_ase_md.cli serve")
+
+    with sock, sock.makefile("rwb") as stream:
+        stream.write((json.dumps(message) + "\n").encode("utf-8"))
+        stream.flush()
+        for line in stream:
+            yield json.loads(line)
+
+
+def submit(configs: list[str], socket_path: str | None = None, wait: bool = True) -> int:
+    """
+    Submit configs to a running daemon; with wait, stream progress until all
+    jobs finish. Returns the number of rejected or failed jobs.
+    """
+    message = {"action": "submit", "configs": list(configs), "cwd": os.getcwd(), "wait": wait}
+    failures = 0
+
+    for event in request(message, socket_path):
+        kind = event["event"]
+        if kind == "queued":
+            print(f"job {event['job']}: queued {event['config']} -> {event['workdir']}")
+        elif kind == "rejected":
+            failures += 1
+            print(f"REJECTED {event['config']}: {event['message']}", file=sys.stderr)
+        elif kind == "started":
+            print(f"job {event['job']}: started (worker pid {event['pid']})")
+        elif kind == "progress":
+            stage = f" [{event['stage']}]" if "stage" in event else ""
+            rate = event["step"] / event["elapsed_s"] if event["elapsed_s"] > 0 else 0.0
+            print(f"job {event['job']}{stage}: step {event['step']}/{event['total_steps']} ({rate:.1f} steps/s)")
+        elif kind == "done":
+            print(f"job {event['job']}: done in {event['elapsed_s']:.1f} s")
+        elif kind == "failed":
+            failures += 1
+            print(f"job {event['job']}: FAILED {event['message']}", file=sys.stderr)
+        else:
+            print(json.dumps(event))
+
+    return failures
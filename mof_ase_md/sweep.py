@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import copy
+import csv
+import itertools
+import json
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from mof_ase_md.config.defaults import apply_defaults
+from mof_ase_md.config.loader import load_config
+from mof_ase_md.config.validator import validate_config, ConfigError
+from mof_ase_md.md.methods import get_method_info
+
+
+SUMMARY_COLUMNS = [
+    "final_volume_A3",
+    "mean_temperature_K",
+    "mean_pressure_bar",
+    "wall_time_s",
+    "status",
+]
+
+# Per-worker-process calculators, keyed by the calculator block they were built from.
+_WORKER_CALCULATORS: dict[str, object] = {}
+
+
+def parse_grid_values(text: str) -> list:
+    """
+    Parse "a,b,c" into a list of YAML scalars (numbers stay numbers).
+    """
+    return [yaml.safe_load(item) for item in text.split(",") if item.strip()]
+
+
+def parse_grid_args(items: list[str]) -> dict:
+    """
+    Parse repeated "dotted.key=v1,v2,..." CLI arguments into a grid dict.
+    """
+    grid = {}
+    for item in items:
+        if "=" not in item:
+            raise ConfigError(f"Grid entry must look like key=v1,v2: {item}")
+        key, values = item.split("=", 1)
+        grid[key.strip()] = parse_grid_values(values)
+    return grid
+
+
+def load_grid_file(path: str | Path) -> dict:
+    with Path(path).open("r", encoding="utf-8") as f:
+        grid = yaml.safe_load(f)
+
+    if not isinstance(grid, dict):
+        raise ConfigError("Grid file must map dotted config keys to lists of values")
+
+    return grid
+
+
+def _set_dotted(cfg: dict, path: str, value) -> None:
+    cur = cfg
+    keys = path.split(".")
+    for key in keys[:-1]:
+        if not isinstance(cur.get(key), dict):
+            cur[key] = {}
+        cur = cur[key]
+    cur[keys[-1]] = value
+
+
+def expand_grid(base_cfg: dict, grid: dict) -> list[dict]:
+    """
+    Expand base_cfg over the cartesian product of grid values.
+
+    Every job is resolved through apply_defaults/validate_config and gets its
+    own workdir <output.workdir>/job_XXX. If md.method is swept without
+    md.ensemble, the ensemble follows the method.
+    """
+    for key, values in grid.items():
+        if not isinstance(values, list) or len(values) == 0:
+            raise ConfigError(f"Grid values for {key} must be a non-empty list")
+
+    keys = list(grid.keys())
+    base_workdir = Path(base_cfg["output"]["workdir"])
+
+    jobs = []
+    for index, combo in enumerate(itertools.product(*(grid[k] for k in keys))):
+        cfg = copy.deepcopy(base_cfg)
+
+        for key, value in zip(keys, combo):
+            _set_dotted(cfg, key, value)
+
+        if "md.method" in grid and "md.ensemble" not in grid:
+            method = str(cfg["md"]["method"]).lower()
+            try:
+                cfg["md"]["ensemble"] = get_method_info(method)["ensemble"]
+            except ValueError:
+                raise ConfigError(f"Unknown md.method in grid: {method}")
+
+        cfg["output"]["workdir"] = str(base_workdir / f"job_{index:03d}")
+
+        cfg = apply_defaults(cfg)
+        cfg = validate_config(cfg)
+        if cfg["md"].get("replicas", 1) > 1:
+            raise ConfigError("md.replicas > 1 is not supported by sweep; use run")
+
+        jobs.append({
+            "job": index,
+            "params": dict(zip(keys, combo)),
+            "cfg": cfg,
+        })
+
+    return jobs
+
+
+def _worker_calculator(cfg: dict):
+    """
+    Calculator for this worker process, reused across jobs with the same calculator block.
+
+    The torch default dtype / matmul precision of calculator.precision are
+    process-wide and only set when an ORB calculator is built, so they are
+    set again whenever a cached one is handed out (another job in this
+    worker may have used a different precision since).
+    """
+    from mof_ase_md.calculator.factory import build_calculator
+
+    calculator_cfg = cfg["calculator"]
+    key = json.dumps(calculator_cfg, sort_keys=True, default=str)
+    if key not in _WORKER_CALCULATORS:
+        _WORKER_CALCULATORS[key] = build_calculator(cfg)
+    elif calculator_cfg["name"].lower() == "orb":
+        from mof_ase_md.calculator.orb import apply_precision
+
+        apply_precision(calculator_cfg.get("precision", "float32"))
+    return _WORKER_CALCULATORS[key]
+
+
+def _pin_worker(slots) -> None:
+    """
+    Pool initializer: take one CPU slot from the partition queue, so
+    concurrent workers do not share cores or oversubscribe threads.
+    """
+    from mof_ase_md.resources import apply_resources
+
+    apply_resources({"resources": slots.get()})
+
+
+def _run_job(job: dict) -> dict:
+    from mof_ase_md.resources import apply_resources
+    from mof_ase_md.run import run_config
+
+    row = {"job": job["job"], **job["params"], "workdir": job["cfg"]["output"]["workdir"]}
+
+    try:
+        apply_resources(job["cfg"])
+        calculator = _worker_calculator(job["cfg"])
+        summary = run_config(job["cfg"], calculator=calculator)
+    except Exception as e:
+        traceback.print_exc()
+        row["status"] = f"failed: {e}"
+        return row
+
+    for column in SUMMARY_COLUMNS[:-1]:
+        row[column] = summary[column]
+    row["status"] = "ok"
+
+    return row
+
+
+def write_summary(rows: list[dict], path: str | Path) -> None:
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns and key not in SUMMARY_COLUMNS:
+                columns.append(key)
+    columns += SUMMARY_COLUMNS
+
+    with Path(path).open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def run_sweep(
+    config_path: str,
+    grid: dict,
+    workers: int = 1,
+    summary_file: str | None = None,
+    pin: bool = False,
+) -> list[dict]:
+    """
+    Run a config grid on a local process pool and write a summary table.
+
+    With pin, the node's cores are partitioned across the workers
+    (resources.partition) and every worker is pinned to its own slot; a
+    resources block in the config still takes precedence per job.
+    """
+    base_cfg = load_config(config_path)
+    jobs = expand_grid(base_cfg, grid)
+
+    base_workdir = Path(base_cfg["output"]["workdir"])
+    base_workdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Sweep: {len(jobs)} jobs on {workers} worker(s)")
+
+    if workers <= 1:
+        rows = [_run_job(job) for job in jobs]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        initializer = None
+        initargs = ()
+        if pin:
+            from mof_ase_md.resources import partition
+
+            slots = ctx.Queue()
+            for slot in partition(workers):
+                slots.put(slot)
+            initializer = _pin_worker
+            initargs = (slots,)
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initializer, initargs=initargs) as pool:
+            rows = list(pool.map(_run_job, jobs))
+
+    if summary_file is None:
+        summary_path = base_workdir / "sweep_summary.csv"
+    else:
+        summary_path = Path(summary_file)
+
+    write_summary(rows, summary_path)
+
+    n_failed = sum(1 for row in rows if row["status"] != "ok")
+
+    print("SWEEP COMPLETE")
+    print("Jobs:", len(rows), "failed:", n_failed)
+    print("Summary:", summary_path)
+
+    return rows
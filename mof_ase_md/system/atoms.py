@@ -1,20 +1,100 @@
 from __future__ import annotations
-from ase.io import read
+
+import numpy as np
+from ase.data import chemical_symbols, covalent_radii
+from ase.neighborlist import neighbor_list
+
+from mof_ase_md.config.validator import ConfigError
+from mof_ase_md.system.library import load_structure
+
+
+DEFAULT_HYDROGEN_MASS = 3.024   # amu, 3 x H (the usual HMR choice)
+DEFAULT_BOND_CUTOFF_SCALE = 1.2
+
+
+def hydrogen_parents(atoms, cutoff_scale: float = DEFAULT_BOND_CUTOFF_SCALE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (hydrogen indices, index of the heavy atom each is bonded to).
+
+    Only H-X pairs are searched (cell-list neighbour search with
+    cutoff_scale x the sum of covalent radii); a hydrogen bonded to several
+    heavy atoms goes to the nearest one, hydrogens without a heavy neighbour
+    are left out.
+    """
+    numbers = atoms.numbers
+    heavy = sorted(set(numbers[numbers != 1].tolist()))
+    if not np.any(numbers == 1) or not heavy:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    cutoffs = {
+        ("H", chemical_symbols[z]): cutoff_scale * (covalent_radii[1] + covalent_radii[z])
+        for z in heavy
+    }
+    i, j, d = neighbor_list("ijd", atoms, cutoffs)
+    keep = numbers[i] == 1
+    i, j, d = i[keep], j[keep], d[keep]
+
+    # nearest heavy neighbour per hydrogen
+    order = np.lexsort((d, i))
+    i, j = i[order], j[order]
+    hydrogens, first = np.unique(i, return_index=True)
+    return hydrogens, j[first]
+
+
+def repartition_masses(
+    atoms,
+    hydrogen_mass: float = DEFAULT_HYDROGEN_MASS,
+    cutoff_scale: float = DEFAULT_BOND_CUTOFF_SCALE,
+) -> dict:
+    """
+    Hydrogen mass repartitioning: raise every bonded hydrogen to
+    hydrogen_mass and take the difference from its heavy partner, so the
+    mass of every molecule (and of the cell) is unchanged. The masses are
+    set on atoms and therefore end up in trajectories, checkpoints and the
+    final structure.
+    """
+    masses = atoms.get_masses()
+    hydrogens, parents = hydrogen_parents(atoms, cutoff_scale=cutoff_scale)
+
+    transfer = hydrogen_mass - masses[hydrogens]
+    new_masses = masses.copy()
+    new_masses[hydrogens] = hydrogen_mass
+    np.subtract.at(new_masses, parents, transfer)
+
+    # a heavy atom must stay heavier than the hydrogens it feeds
+    donors = np.unique(parents)
+    too_light = donors[new_masses[donors] <= hydrogen_mass]
+    if len(too_light):
+        index = int(too_light[0])
+        raise ConfigError(
+            f"system.mass_repartitioning: {atoms[index].symbol} atom {index} would drop to "
+            f"{new_masses[index]:.3f} amu (hydrogen_mass {hydrogen_mass} is too large)"
+        )
+
+    atoms.set_masses(new_masses)
+
+    n_hydrogens = int(np.sum(atoms.numbers == 1))
+    return {
+        "hydrogen_mass": float(hydrogen_mass),
+        "n_repartitioned": int(len(hydrogens)),
+        "n_unbonded_hydrogens": n_hydrogens - int(len(hydrogens)),
+        "min_heavy_mass": float(new_masses[donors].min()) if len(donors) else None,
+    }
 
 
 def load_atoms(cfg: dict):
     """
     Load an ASE Atoms object from the structure file defined in config.
+
+    The parsed structure is kept in the structure library (system.cache),
+    so an unchanged input file is not parsed again by later runs.
     """
     system_cfg = cfg["system"]
-    
+
     input_path = system_cfg["input_file"]
     fmt = system_cfg.get("format", None)
 
-    if fmt is not None:
-        atoms = read(input_path, format=fmt)
-    else:
-        atoms = read(input_path)
+    atoms, _ = load_structure(input_path, fmt, system_cfg.get("cache", None))
 
     atoms.pbc = bool(system_cfg["pbc"])
 
@@ -27,4 +107,18 @@ def load_atoms(cfg: dict):
     if spin is not None:
         atoms.info["spin"] = spin
 
+    hmr_cfg = system_cfg.get("mass_repartitioning", None) or {}
+    if hmr_cfg.get("enabled", False):
+        stats = repartition_masses(
+            atoms,
+            hydrogen_mass=hmr_cfg.get("hydrogen_mass", DEFAULT_HYDROGEN_MASS),
+            cutoff_scale=hmr_cfg.get("cutoff_scale", DEFAULT_BOND_CUTOFF_SCALE),
+        )
+        message = f"Mass repartitioning: {stats['n_repartitioned']} H -> {stats['hydrogen_mass']:g} amu"
+        if stats["min_heavy_mass"] is not None:
+            message += f", lightest donor {stats['min_heavy_mass']:.3f} amu"
+        if stats["n_unbonded_hydrogens"]:
+            message += f" ({stats['n_unbonded_hydrogens']} H without a heavy neighbour left unchanged)"
+        print(message)
+
     return atoms
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+import ase
+import numpy as np
+from ase import Atoms
+from ase.calculators.singlepoint import SinglePointCalculator
+from ase.io import read
+
+
+DEFAULT_LIBRARY_DIR = "~/.cache/mof_ase_md/structures"
+
+# bump when the record layout changes; old records are then simply not found
+RECORD_VERSION = 2
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def structure_key(path, fmt: str | None = None) -> str:
+    """
+    Record key for a structure file: its content hash plus everything else
+    that decides what the parser returns (format, or the file suffix when
+    the format is guessed, and the ASE version).
+    """
+    path = Path(path)
+    payload = json.dumps(
+        {
+            "sha256": _file_sha256(path),
+            "format": fmt if fmt is not None else f"auto{path.suffix.lower()}",
+            "ase": ase.__version__,
+            "version": RECORD_VERSION,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def read_structure(path, fmt: str | None = None):
+    if fmt is not None:
+        return read(str(path), format=fmt)
+    return read(str(path))
+
+
+def _record_path(library_dir: Path, key: str) -> Path:
+    return library_dir / f"{key}.npz"
+
+
+def store_record(library_dir: Path, key: str, atoms, source: str | None = None) -> Path:
+    """
+    Write atoms as an uncompressed .npz record: cell, pbc and every per-atom
+    array as plain arrays; info, constraints (FixAtoms from an extxyz
+    move_mask, ...) and single-point results (energy/forces read from the
+    file) pickled alongside, so load_record returns what read() returned.
+
+    Raises ValueError for atoms the record cannot represent (a calculator
+    other than a SinglePointCalculator, unpicklable info).
+    """
+    if atoms.calc is not None and not isinstance(atoms.calc, SinglePointCalculator):
+        raise ValueError(f"cannot store a structure with a {type(atoms.calc).__name__} calculator")
+
+    arrays = {
+        "cell": atoms.cell.array,
+        "pbc": atoms.pbc,
+    }
+    object_arrays = {}
+    for name, value in atoms.arrays.items():
+        if value.dtype.hasobject:
+            object_arrays[name] = value
+        else:
+            arrays[f"array_{name}"] = value
+
+    extra = {
+        "info": dict(atoms.info),
+        "constraints": atoms.constraints,
+        "object_arrays": object_arrays,
+        "results": None if atoms.calc is None else dict(atoms.calc.results),
+    }
+    try:
+        arrays["extra"] = np.frombuffer(pickle.dumps(extra, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+    except Exception as e:
+        raise ValueError(f"cannot store the structure's info/constraints ({e})") from e
+    arrays["source"] = np.array(str(source or ""))
+
+    library_dir.mkdir(parents=True, exist_ok=True)
+    path = _record_path(library_dir, key)
+    tmp_path = path.with_name(f"{key}.tmp{os.getpid()}.npz")
+    try:
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def load_record(library_dir: Path, key: str):
+    """
+    Atoms from the record for key, or None if there is no (readable) record.
+    """
+    path = _record_path(library_dir, key)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path) as record:
+            data = {name: record[name] for name in record.files}
+        extra = pickle.loads(data["extra"].tobytes())
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError):
+        path.unlink(missing_ok=True)
+        return None
+
+    arrays = {name[len("array_"):]: value for name, value in data.items() if name.startswith("array_")}
+    arrays.update(extra["object_arrays"])
+
+    atoms = Atoms(
+        numbers=arrays.pop("numbers"),
+        positions=arrays.pop("positions"),
+        cell=data["cell"],
+        pbc=data["pbc"],
+        info=extra["info"],
+        constraint=extra["constraints"],
+    )
+    for name, value in arrays.items():
+        atoms.set_array(name, value)
+    if extra["results"] is not None:
+        atoms.calc = SinglePointCalculator(atoms, **extra["results"])
+    return atoms
+
+
+def library_settings(cache_cfg) -> tuple[bool, Path]:
+    """
+    (enabled, directory) from system.cache: a bool or {enabled, dir}.
+    """
+    if cache_cfg is None:
+        cache_cfg = {}
+    if isinstance(cache_cfg, bool):
+        cache_cfg = {"enabled": cache_cfg}
+
+    enabled = cache_cfg.get("enabled", True)
+    library_dir = Path(os.path.expanduser(cache_cfg.get("dir", DEFAULT_LIBRARY_DIR)))
+    return enabled, library_dir
+
+
+def load_structure(path, fmt: str | None = None, cache_cfg=None) -> tuple:
+    """
+    Return (atoms, source) for a structure file, source "library" or "parsed".
+
+    With the library enabled (the default) the file is hashed and, if a
+    record with that key exists, loaded from it without parsing; otherwise
+    the file is parsed and a record is stored for the next run.
+    """
+    enabled, library_dir = library_settings(cache_cfg)
+    if not enabled:
+        return read_structure(path, fmt), "parsed"
+
+    key = structure_key(path, fmt)
+    atoms = load_record(library_dir, key)
+    if atoms is not None:
+        return atoms, "library"
+
+    atoms = read_structure(path, fmt)
+    try:
+        store_record(library_dir, key, atoms, source=str(Path(path).resolve()))
+    except (OSError, ValueError) as e:
+        # e.g. a read-only home; the run itself is unaffected
+        print(f"Structure library: could not store {path} ({e})")
+    return atoms, "parsed"
+
+
+def _add_one(path: str, fmt: str | None, library_dir: str, force: bool) -> dict:
+    t0 = time.perf_counter()
+    row = {"path": path, "key": None, "status": None, "n_atoms": None, "formula": None, "seconds": None, "error": None}
+    try:
+        key = structure_key(path, fmt)
+        row["key"] = key
+
+        atoms = None if force else load_record(Path(library_dir), key)
+        if atoms is not None:
+            row["status"] = "cached"
+        else:
+            atoms = read_structure(path, fmt)
+            store_record(Path(library_dir), key, atoms, source=str(Path(path).resolve()))
+            row["status"] = "added"
+
+        row["n_atoms"] = len(atoms)
+        row["formula"] = atoms.get_chemical_formula()
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    row["seconds"] = time.perf_counter() - t0
+    return row
+
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """
+    Files matching the glob patterns (recursive **), sorted, without duplicates.
+    """
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(os.path.expanduser(pattern), recursive=True)
+        paths.update(match for match in matches if os.path.isfile(match))
+    return sorted(paths)
+
+
+def build_library(
+    patterns: list[str],
+    fmt: str | None = None,
+    library_dir: str | None = None,
+    workers: int = 1,
+    force: bool = False,
+) -> list[dict]:
+    """
+    Parse every file matching patterns (in parallel on a process pool with
+    workers > 1) and store a record for each, so later runs on these inputs
+    skip parsing. Files that already have a record are only hashed, unless
+    force. Returns one row per file.
+    """
+    _, directory = library_settings({"dir": library_dir} if library_dir else None)
+    paths = expand_inputs(patterns)
+    if not paths:
+        raise ValueError(f"No files match: {' '.join(patterns)}")
+
+    jobs = [(path, fmt, str(directory), force) for path in paths]
+
+    if workers <= 1 or len(jobs) == 1:
+        return [_add_one(*job) for job in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=get_context("spawn")) as pool:
+        return list(pool.map(_add_one, *zip(*jobs), chunksize=max(1, len(jobs) // (4 * workers))))
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from mof_ase_md.config.defaults import apply_defaults
+from mof_ase_md.config.loader import load_config
+from mof_ase_md.config.validator import ConfigError, max_timestep_fs, validate_config
+
+
+# probed when no ladder is given; steps above the system's limit are dropped
+DEFAULT_LADDER_FS = (0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0)
+
+DEFAULT_TOLERANCE = 1.0  # meV/atom/ps
+
+
+def ns_per_day(steps_per_s: float, timestep_fs: float) -> float:
+    return steps_per_s * timestep_fs * 86400.0 / 1.0e6
+
+
+def _probe(cfg: dict, timestep_fs: float, steps: int) -> dict:
+    """
+    NVE probe of the config's structure at one timestep (runs in a worker).
+    """
+    import numpy as np
+
+    from mof_ase_md.md.probes import nve_probe
+    from mof_ase_md.sweep import _worker_calculator
+    from mof_ase_md.system.atoms import load_atoms
+
+    row = {"timestep_fs": timestep_fs}
+    try:
+        atoms = load_atoms(cfg)
+        calculator = _worker_calculator(cfg)
+        row.update(
+            nve_probe(
+                atoms,
+                calculator,
+                steps=steps,
+                timestep_fs=timestep_fs,
+                temperature_K=float(cfg.get("state", {}).get("temperature_K", 300.0)),
+                seed=cfg.get("velocities", {}).get("seed", None) or 0,
+            )
+        )
+    except Exception as e:
+        row["error"] = str(e)
+        return row
+
+    if not np.isfinite(row["drift_meV_atom_ps"]):
+        row["error"] = "non-finite energy"
+    return row
+
+
+def _throughput(cfg: dict, timestep_fs: float, steps: int = 20) -> float:
+    """
+    Steps/s of a short uncontended velocity Verlet run in this process.
+    """
+    from ase import units
+    from ase.md.verlet import VelocityVerlet
+
+    from mof_ase_md.calculator.factory import build_calculator
+    from mof_ase_md.system.atoms import load_atoms
+
+    atoms = load_atoms(cfg)
+    atoms.calc = build_calculator(cfg)
+    dyn = VelocityVerlet(atoms, timestep=timestep_fs * units.fs)
+    dyn.run(2)  # warm-up (graph construction, lazy initialisation)
+
+    t0 = time.perf_counter()
+    dyn.run(steps)
+    return steps / (time.perf_counter() - t0)
+
+
+def tune_timestep(
+    config_path: str,
+    timesteps: list[float] | None = None,
+    steps: int = 200,
+    tolerance: float = DEFAULT_TOLERANCE,
+    workers: int = 1,
+    pin: bool = False,
+    write: str | None = None,
+) -> dict:
+    """
+    Run short NVE velocity Verlet probes of the config's structure (and
+    calculator) at a ladder of timesteps, in parallel with workers > 1, and
+    recommend the largest timestep whose |energy drift| - and that of every
+    smaller probe - is within tolerance (meV/atom/ps). Probes start from the
+    same seeded velocities at state.temperature_K. Timesteps above the
+    system's limit (hydrogen / mass repartitioning / safety.max_timestep_fs)
+    are not probed.
+
+    The projected ns/day comes from the probes' own speed when they ran one
+    at a time, otherwise from a short uncontended run in this process. With
+    write, the resolved config with the recommended md.timestep_fs is saved
+    there. Returns {"rows", "recommended_fs", "ns_per_day"}.
+    """
+    cfg = load_config(config_path)
+    if cfg.get("stages") is not None:
+        raise ConfigError("tune-timestep needs a config without stages")
+    cfg = validate_config(apply_defaults(cfg))
+    if cfg["md"]["method"] in ("respa", "respa_langevin"):
+        raise ConfigError("tune-timestep probes plain velocity Verlet steps; tune respa.inner_steps instead")
+
+    from mof_ase_md.system.atoms import load_atoms
+
+    atoms = load_atoms(cfg)
+    limit = max_timestep_fs(cfg, atoms)
+
+    if timesteps is None:
+        timesteps = list(DEFAULT_LADDER_FS)
+    timesteps = sorted(set(float(dt) for dt in timesteps))
+    if min(timesteps) <= 0:
+        raise ConfigError("Timesteps must be > 0")
+
+    skipped = [dt for dt in timesteps if limit is not None and dt > limit]
+    timesteps = [dt for dt in timesteps if dt not in skipped]
+    if skipped:
+        print(f"Not probed (above the {limit:g} fs limit for this system): {', '.join(f'{dt:g}' for dt in skipped)} fs")
+    if not timesteps:
+        raise ConfigError(f"No timestep to probe at or below the {limit:g} fs limit")
+
+    print(f"Timestep probes: {len(atoms)} atoms, {steps} NVE steps each at {len(timesteps)} timesteps on {workers} worker(s)")
+
+    if workers <= 1:
+        rows = [_probe(cfg, dt, steps) for dt in timesteps]
+    else:
+        from mof_ase_md.sweep import _pin_worker
+
+        ctx = multiprocessing.get_context("spawn")
+        initializer = None
+        initargs = ()
+        if pin:
+            from mof_ase_md.resources import partition
+
+            slots = ctx.Queue()
+            for slot in partition(workers):
+                slots.put(slot)
+            initializer = _pin_worker
+            initargs = (slots,)
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initializer, initargs=initargs) as pool:
+            rows = list(pool.map(_probe, [cfg] * len(timesteps), timesteps, [steps] * len(timesteps)))
+
+    for row in rows:
+        row["ok"] = "error" not in row and abs(row["drift_meV_atom_ps"]) <= tolerance
+
+    recommended = None
+    for row in rows:
+        if not row["ok"]:
+            break
+        recommended = row["timestep_fs"]
+
+    steps_per_s = None
+    if recommended is not None:
+        if workers <= 1:
+            steps_per_s = next(row["steps_per_s"] for row in rows if row["timestep_fs"] == recommended)
+        else:
+            steps_per_s = _throughput(cfg, recommended)
+
+    print(f"{'dt fs':>6} {'drift meV/atom/ps':>18} {'noise meV/atom':>15} {'max dev meV/atom':>17}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['timestep_fs']:>6g} {'failed: ' + row['error']}")
+            continue
+        status = "  ok" if row["ok"] else "  over tolerance"
+        print(
+            f"{row['timestep_fs']:>6g} {row['drift_meV_atom_ps']:>18.4f} {row['noise_meV_atom']:>15.4f} "
+            f"{row['max_dev_meV_atom']:>17.4f}{status}"
+        )
+
+    result = {"rows": rows, "recommended_fs": recommended, "ns_per_day": None}
+    if recommended is None:
+        print(f"No probed timestep keeps |drift| <= {tolerance:g} meV/atom/ps; try smaller timesteps")
+        return result
+
+    result["ns_per_day"] = ns_per_day(steps_per_s, recommended)
+    current = float(cfg["md"]["timestep_fs"])
+    print(
+        f"Recommended md.timestep_fs: {recommended:g} fs (|drift| <= {tolerance:g} meV/atom/ps), "
+        f"~{result['ns_per_day']:.3g} ns/day at {steps_per_s:.1f} steps/s "
+        f"(config: {current:g} fs, ~{ns_per_day(steps_per_s, current):.3g} ns/day)"
+    )
+
+    if write is not None:
+        tuned = copy.deepcopy(cfg)
+        tuned["md"]["timestep_fs"] = recommended
+        with Path(write).open("w", encoding="utf-8") as f:
+            yaml.safe_dump(tuned, f, sort_keys=False)
+        total_ps = tuned["md"]["total_steps"] * recommended / 1000.0
+        print(f"Wrote {write} (md.total_steps unchanged: {total_ps:.4g} ps of simulated time)")
+
+    return result
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# imported first by the cli: everything before this is interpreter start-up
+_T0 = time.perf_counter()
+_LAST = _T0
+
+# (name, seconds, depth), in completion order
+PHASES: list[tuple[str, float, int]] = []
+_DEPTH = 0
+
+
+def interpreter_startup_s() -> float | None:
+    """
+    Time from process creation to the import of this module (Linux /proc),
+    i.e. interpreter start-up plus site imports. None elsewhere.
+    """
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # the command name (field 2) may contain spaces; fields after ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    age = uptime - started
+    return max(age - (time.perf_counter() - _T0), 0.0)
+
+
+def mark(name: str) -> None:
+    """
+    Record the time since the previous mark (or module import) as a phase.
+    """
+    global _LAST
+    now = time.perf_counter()
+    PHASES.append((name, now - _LAST, _DEPTH))
+    _LAST = now
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Record an already measured duration as a phase at the current depth.
+    """
+    PHASES.append((name, seconds, _DEPTH))
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Record the duration of a block as a phase; phases may nest.
+    """
+    global _DEPTH, _LAST
+    t0 = time.perf_counter()
+    depth = _DEPTH
+    _DEPTH += 1
+    try:
+        yield
+    finally:
+        _DEPTH = depth
+        _LAST = time.perf_counter()
+        PHASES.append((name, _LAST - t0, depth))
+
+
+def report(stream=None) -> None:
+    """
+    Print the recorded phases (nested phases indented under their parent)
+    and the heavy modules that ended up imported.
+    """
+    stream = stream or sys.stderr
+
+    # phases complete child-first: a phase's children are the deeper rows
+    # recorded directly before it; move the phase in front of them
+    rows = []
+    for name, seconds, depth in PHASES:
+        start = len(rows)
+        while start > 0 and rows[start - 1][2] > depth:
+            start -= 1
+        rows.insert(start, (name, seconds, depth))
+
+    print("Startup timing:", file=stream)
+    interpreter = interpreter_startup_s()
+    if interpreter is not None:
+        print(f"  {'interpreter':<40} {interpreter * 1000:9.1f} ms", file=stream)
+    for name, seconds, depth in rows:
+        label = "  " * depth + name
+        print(f"  {label:<40} {seconds * 1000:9.1f} ms", file=stream)
+    print(f"  {'total (since cli import)':<40} {(time.perf_counter() - _T0) * 1000:9.1f} ms", file=stream)
+
+    heavy = [name for name in ("torch", "orb_models", "scipy", "ase.md", "ase.optimize") if name in sys.modules]
+    print("  heavy modules loaded:", ", ".join(heavy) if heavy else "none", file=stream)